@@ -3,7 +3,12 @@ Factory Flask pour ARTCI DCP Platform
 """
 from flask import Flask
 from config import config
-from app.extensions import db, jwt, cors, mail, migrate
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+from app.extensions import db, jwt, cors, mail, migrate, limiter, event_bus
+from app.utils.uploads import UploadRequest
+from app.utils.json_provider import OrjsonProvider
+from app.utils.compression import init_compression
+from app.utils.db_metrics import init_db_metrics
 
 def create_app(config_name='default'):
     """
@@ -16,6 +21,10 @@ def create_app(config_name='default'):
         Flask app instance
     """
     app = Flask(__name__)
+    # Fichiers téléversés validés pendant la réception (app.utils.uploads)
+    app.request_class = UploadRequest
+    # Réponses JSON encodées par orjson (datetimes, UUID, Enum natifs)
+    app.json = OrjsonProvider(app)
     
     # Charger la configuration
     app.config.from_object(config[config_name])
@@ -32,6 +41,12 @@ def create_app(config_name='default'):
         methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'OPTIONS'],
     )
     mail.init_app(app)
+    limiter.init_app(app)
+    event_bus.init_app(app)
+    # Compression gzip / brotli des réponses JSON volumineuses
+    init_compression(app)
+    # Requêtes SQL par requête HTTP (en-têtes debug, /metrics, alerte N+1)
+    init_db_metrics(app)
 
     # JWT blocklist loader : vérifie si un token est blacklisté
     from app.extensions import token_blacklist
@@ -50,6 +65,10 @@ def create_app(config_name='default'):
     
     # Gestionnaires d'erreurs
     register_error_handlers(app)
+
+    # Commandes CLI (maintenance, tâches planifiées)
+    from app.commands import register_commands
+    register_commands(app)
     
     # Context processors
     @app.shell_context_processor
@@ -63,13 +82,15 @@ def create_app(config_name='default'):
     return app
 
 def register_blueprints(app):
-    """Enregistrer les 4 blueprints API."""
-    from app.routes import auth_bp, public_bp, entreprise_bp, admin_bp
+    """Enregistrer les blueprints API."""
+    from app.routes import auth_bp, public_bp, entreprise_bp, admin_bp, events_bp, metrics_bp
 
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(public_bp, url_prefix='/api/public')
     app.register_blueprint(entreprise_bp, url_prefix='/api/entreprise')
     app.register_blueprint(admin_bp, url_prefix='/api/admin')
+    app.register_blueprint(events_bp, url_prefix='/api/events')
+    app.register_blueprint(metrics_bp)
 
 def register_error_handlers(app):
     """Gestionnaires d'erreurs globaux"""
@@ -86,3 +107,16 @@ def register_error_handlers(app):
     @app.errorhandler(400)
     def bad_request(error):
         return {'error': 'Bad request'}, 400
+
+    @app.errorhandler(413)
+    def request_entity_too_large(error):
+        # Description Werkzeug par défaut (MAX_CONTENT_LENGTH) -> message en français
+        if error.description == RequestEntityTooLarge.description:
+            return {'error': 'Fichier trop volumineux.'}, 413
+        return {'error': error.description}, 413
+
+    @app.errorhandler(415)
+    def unsupported_media_type(error):
+        if error.description == UnsupportedMediaType.description:
+            return {'error': 'Format de fichier non supporté.'}, 415
+        return {'error': error.description}, 415
@@ -0,0 +1,176 @@
+"""
+Commandes Flask CLI pour ARTCI DCP Platform.
+Tâches de maintenance lancées à la main ou par cron :
+    flask otp purge
+    flask backup create [--incremental]
+    flask backup restore ARCHIVE [ARCHIVE...]
+    flask backup prune [--dry-run]
+    flask backup reindex
+    flask jobs run-due | run NAME | list
+    flask notifications recount
+    flask documents apercus [--relancer]
+    flask documents gc [--dry-run] | usage
+"""
+import click
+from flask.cli import AppGroup
+
+
+otp_cli = AppGroup('otp', help='Maintenance des codes OTP.')
+backup_cli = AppGroup('backup', help='Sauvegardes de la base.')
+jobs_cli = AppGroup('jobs', help='Tâches planifiées (appelées par cron).')
+notifications_cli = AppGroup('notifications', help='Maintenance des notifications.')
+documents_cli = AppGroup('documents', help='Maintenance des documents téléversés.')
+
+
+@otp_cli.command('purge')
+@click.option('--batch-size', type=int, default=None,
+              help='Taille des lots de suppression (défaut : OTP_PURGE_BATCH_SIZE).')
+def purge_otp(batch_size):
+    """Supprimer les codes OTP expirés ou déjà utilisés."""
+    from app.utils.otp import purge_otp_codes
+    total = purge_otp_codes(batch_size)
+    click.echo(f'{total} code(s) OTP supprimé(s).')
+
+
+@backup_cli.command('create')
+@click.option('--incremental', is_flag=True,
+              help='Uniquement les lignes modifiées depuis la dernière sauvegarde.')
+def create_backup(incremental):
+    """Créer une archive de sauvegarde (type « planifié » : usage cron)."""
+    from app.services.backup_service import BackupService
+    result = BackupService.create_backup(incremental=incremental, planifie=True)
+    total = sum(t['rows'] for t in result['manifest']['tables'].values())
+    click.echo(
+        f"{result['filename']} ({result['manifest']['type']}) : {total} ligne(s), "
+        f"{result['taille_octets']} octets, sha256 {result['sha256']}"
+    )
+
+
+@backup_cli.command('restore')
+@click.argument('archives', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--force', is_flag=True,
+              help='Ignorer les contrôles de révision Alembic et de sauvegarde de référence.')
+@click.confirmation_option(prompt='Les données actuelles seront remplacées. Continuer ?')
+def restore_backup(archives, force):
+    """Restaurer une sauvegarde complète, puis ses incrémentales dans l'ordre donné."""
+    from app.services.restore_service import RestoreService
+    for archive, report in zip(archives, RestoreService.restore_chain(archives, force=force)):
+        total = sum(t['rows'] for t in report['tables'].values())
+        click.echo(
+            f"{archive} ({report['type']}) : {total} ligne(s) en {report['duration_s']} s "
+            f"[contraintes : {report['constraints']}]"
+        )
+        for table, count in report['secrets'].items():
+            click.echo(f'  {table} : mots de passe actuels conservés pour {count} compte(s) existant(s)')
+
+
+@backup_cli.command('prune')
+@click.option('--dry-run', is_flag=True, help='Lister sans supprimer.')
+def prune_backups(dry_run):
+    """Appliquer la politique de rétention (BACKUP_RETENTION_DAYS / _MIN_KEEP)."""
+    from app.services.backup_service import BackupService
+    removed = BackupService.apply_retention(dry_run=dry_run)
+    verbe = 'à supprimer' if dry_run else 'supprimée(s)'
+    click.echo(f'{len(removed)} sauvegarde(s) {verbe}.')
+    for filename in removed:
+        click.echo(f'  {filename}')
+
+
+@backup_cli.command('reindex')
+def reindex_backups():
+    """Indexer les archives présentes sur disque mais absentes de la table."""
+    from app.services.backup_service import BackupService
+    added = BackupService.reindex()
+    click.echo(f'{len(added)} archive(s) indexée(s).')
+
+
+@jobs_cli.command('run-due')
+def run_due_jobs():
+    """Exécuter les tâches dues (à appeler toutes les 5 minutes par cron)."""
+    from app.services.scheduler_service import SchedulerService
+    for run in SchedulerService.run_due():
+        click.echo(f'{run.job} : {run.statut} en {run.duree_secondes} s {run.resultat or run.erreur or ""}')
+
+
+@jobs_cli.command('run')
+@click.argument('name')
+def run_job(name):
+    """Exécuter une tâche immédiatement, qu'elle soit due ou non."""
+    from app.services.scheduler_service import SchedulerService
+    run = SchedulerService.run_job(name)
+    if run is None:
+        click.echo(f'{name} est déjà en cours d\'exécution.')
+        return
+    click.echo(f'{run.job} : {run.statut} en {run.duree_secondes} s {run.resultat or run.erreur or ""}')
+
+
+@jobs_cli.command('list')
+def list_jobs():
+    """Lister les tâches, leur dernier succès et si elles sont dues."""
+    from app.services.scheduler_service import SchedulerService
+    for item in SchedulerService.status():
+        etat = 'due' if item['due'] else 'à jour'
+        click.echo(
+            f"{item['job']:<18} toutes les {item['intervalle_minutes']} min, "
+            f"dernier succès {item['dernier_succes'] or 'jamais'} ({etat})"
+        )
+
+
+@notifications_cli.command('recount')
+def recount_notifications():
+    """Reconstruire les compteurs de notifications non lues."""
+    from app.services.notification_service import NotificationService
+    total = NotificationService.recalculer_compteurs()
+    click.echo(f'{total} compteur(s) recalculé(s).')
+
+
+@documents_cli.command('apercus')
+@click.option('--relancer', is_flag=True, help='Remettre en attente les aperçus en échec ou non supportés.')
+@click.option('--limit', default=500, show_default=True, help='Nombre maximal de contenus traités.')
+def generer_apercus(relancer, limit):
+    """Générer les miniatures et textes extraits en attente."""
+    from app.services.apercu_service import ApercuService
+    if relancer:
+        click.echo(f'{ApercuService.relancer()} aperçu(s) remis en attente.')
+    compteurs = ApercuService.traiter_en_attente(limit=limit)
+    click.echo(', '.join(f'{k} : {v}' for k, v in compteurs.items()))
+
+
+@documents_cli.command('gc')
+@click.option('--dry-run', is_flag=True, help='Lister sans supprimer.')
+@click.option('--batch-size', default=1000, show_default=True, help='Fichiers comparés par requête.')
+@click.option('--age-min', type=float, default=None,
+              help='Âge minimal (heures) d\'un orphelin ; défaut DOCUMENTS_GC_MIN_AGE_HOURS.')
+def gc_documents(dry_run, batch_size, age_min):
+    """Supprimer les fichiers orphelins et signaler les documents sans fichier."""
+    from app.services.document_service import DocumentService
+    r = DocumentService.reconcilier(dry_run=dry_run, batch_size=batch_size, age_min_heures=age_min)
+    mo = 1024 * 1024
+    click.echo(f"{r['fichiers']} fichier(s) analysé(s), {r['octets'] / mo:.1f} Mo.")
+    verbe = 'à supprimer' if dry_run else f"supprimé(s) : {r['supprimes']}"
+    click.echo(f"{r['orphelins']} orphelin(s), {r['octets_orphelins'] / mo:.1f} Mo ({verbe}) ; "
+               f"{r['recents_ignores']} récent(s) ignoré(s).")
+    for key in r['exemples_orphelins']:
+        click.echo(f'  {key}')
+    click.echo(f"{r['manquants']} document(s) sans fichier.")
+    for doc in r['documents_manquants']:
+        click.echo(f"  {doc['id']} (entité {doc['entite_id']}) : {doc['chemin_fichier']}")
+
+
+@documents_cli.command('usage')
+@click.option('--limit', default=20, show_default=True)
+def usage_documents(limit):
+    """Espace occupé par les documents de chaque entité (plus gros en premier)."""
+    from app.services.document_service import DocumentService
+    for item in DocumentService.usage_par_entite(limit=limit):
+        click.echo(f"{item['octets'] / (1024 * 1024):>9.1f} Mo  {item['documents']:>4} doc(s)  "
+                   f"{item['denomination']} ({item['entite_id']})")
+
+
+def register_commands(app):
+    """Enregistrer les groupes de commandes CLI."""
+    app.cli.add_command(otp_cli)
+    app.cli.add_command(backup_cli)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(notifications_cli)
+    app.cli.add_command(documents_cli)
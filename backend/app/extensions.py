@@ -6,6 +6,8 @@ from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_mail import Mail
+from app.utils.rate_limit import RateLimiter
+from app.utils.event_bus import EventBus
 
 # SQLAlchemy
 db = SQLAlchemy()
@@ -22,5 +24,11 @@ cors = CORS()
 # Email
 mail = Mail()
 
+# Rate limiting (token bucket, stockage partagé entre workers)
+limiter = RateLimiter()
+
+# Événements temps réel (SSE, PostgreSQL LISTEN/NOTIFY)
+event_bus = EventBus()
+
 # Token blacklist (in-memory pour dev, Redis en production)
 token_blacklist = set()
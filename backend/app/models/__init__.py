@@ -19,6 +19,8 @@ from app.models.enums import (
     BaseLegaleEnum,
     TypeMesureEnum,
     StatutRenouvellementEnum,
+    TypeSauvegardeEnum,
+    StatutSauvegardeEnum,
 )
 
 # Groupe 1 : Auth (2 tables)
@@ -60,8 +62,9 @@ from app.models.certifications_securite import CertificationSecurite
 from app.models.historique_statuts import HistoriqueStatut
 from app.models.renouvellements import Renouvellement
 
-# Groupe 8 : Notifications (1 table)
+# Groupe 8 : Notifications (2 tables)
 from app.models.notifications import Notification
+from app.models.compteurs_notifications import CompteurNotification
 
 # Groupe 9 : Contact (1 table)
 from app.models.contact_messages import ContactMessage
@@ -72,6 +75,19 @@ from app.models.formulaire_dcp import FormulaireDCP
 # Groupe 11 : Workflow Traiter (1 table)
 from app.models.traitement_dossier import TraitementDossier
 
+# Groupe 12 : Caches (2 tables)
+from app.models.cache_versions import CacheVersion
+from app.models.entite_detail_cache import EntiteDetailCache
+
+# Groupe 13 : Sauvegardes (1 table)
+from app.models.sauvegardes import Sauvegarde
+
+# Groupe 14 : Tâches planifiées (1 table)
+from app.models.job_runs import JobRun
+
+# Groupe 15 : Aperçus des documents (1 table)
+from app.models.apercus_documents import ApercuDocument
+
 __all__ = [
     # Mixins
     'UUIDMixin', 'TimestampMixin',
@@ -81,6 +97,7 @@ __all__ = [
     'StatutAssignationEnum', 'StatutRapprochementEnum',
     'TypeDocumentEnum', 'CategorieDonneesEnum', 'BaseLegaleEnum',
     'TypeMesureEnum', 'StatutRenouvellementEnum',
+    'TypeSauvegardeEnum', 'StatutSauvegardeEnum',
     # Modèles (25)
     'CompteEntreprise', 'User',
     'EntiteBase', 'EntiteContact', 'EntiteWorkflow',
@@ -93,5 +110,6 @@ __all__ = [
     'TransfertInternational', 'SecuriteConformite',
     'MesureSecurite', 'CertificationSecurite',
     'HistoriqueStatut', 'Renouvellement',
-    'Notification', 'ContactMessage', 'FormulaireDCP', 'TraitementDossier',
+    'Notification', 'CompteurNotification', 'ContactMessage', 'FormulaireDCP', 'TraitementDossier',
+    'CacheVersion', 'EntiteDetailCache', 'Sauvegarde', 'JobRun', 'ApercuDocument',
 ]
@@ -0,0 +1,32 @@
+"""
+Modèle ApercuDocument - Miniature et texte extrait d'un fichier téléversé.
+Clé = SHA-256 du contenu : un fichier partagé par plusieurs DocumentJoint
+(déduplication) n'est traité qu'une fois. Renseigné en arrière-plan par
+ApercuService ; la miniature est rangée dans le stockage (previews/...).
+"""
+from app.extensions import db
+
+
+class ApercuDocument(db.Model):
+    __tablename__ = 'apercus_documents'
+    __table_args__ = (
+        db.Index('ix_apercus_documents_statut', 'statut'),
+    )
+
+    sha256 = db.Column(db.String(64), primary_key=True)
+    statut = db.Column(db.String(20), nullable=False, default='en_attente', server_default='en_attente')  # en_attente, pret, non_supporte, echec
+    miniature = db.Column(db.String(500))  # clé previews/... ou NULL
+    largeur = db.Column(db.Integer)
+    hauteur = db.Column(db.Integer)
+    pages = db.Column(db.Integer)
+    texte = db.Column(db.Text)  # tronqué à APERCU_TEXTE_MAX caractères
+    tentatives = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    erreur = db.Column(db.Text)
+    createdAt = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
+    updatedAt = db.Column(
+        db.DateTime(timezone=True), nullable=False,
+        server_default=db.func.now(), onupdate=db.func.now()
+    )
+
+    def __repr__(self):
+        return f'<ApercuDocument {self.sha256[:12]} {self.statut}>'
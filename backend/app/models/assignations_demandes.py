@@ -11,6 +11,9 @@ class AssignationDemande(UUIDMixin, db.Model):
     __tablename__ = 'assignations_demandes'
     __table_args__ = (
         db.Index('ix_assign_agent_statut', 'agent_id', 'statut'),
+        db.Index('ix_assign_statut_echeance', 'statut', 'echeance'),
+        # Panier : parcours par agent dans l'ordre (echeance, id) de la pagination
+        db.Index('ix_assign_agent_echeance_id', 'agent_id', 'echeance', 'id'),
     )
 
     entite_id = db.Column(
@@ -0,0 +1,20 @@
+"""
+Modèle CacheVersion - Compteurs de version partagés entre workers.
+Le compteur 'published_data' est incrémenté à chaque modification des données
+visibles publiquement ; il sert de base aux ETags des endpoints /api/public/*.
+"""
+from app.extensions import db
+
+
+class CacheVersion(db.Model):
+    __tablename__ = 'cache_versions'
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=1)
+    updatedAt = db.Column(
+        db.DateTime(timezone=True), nullable=False,
+        server_default=db.func.now(), onupdate=db.func.now()
+    )
+
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
@@ -0,0 +1,21 @@
+"""
+Modèle CompteurNotification - Nombre de notifications non lues par destinataire.
+Tenu à jour par NotificationService (insertion, lecture, « tout marquer lu ») :
+le badge de notifications se lit en une requête sur clé primaire.
+"""
+from app.extensions import db
+
+
+class CompteurNotification(db.Model):
+    __tablename__ = 'compteurs_notifications'
+
+    destinataire_type = db.Column(db.String(20), primary_key=True)  # 'artci' ou 'entreprise'
+    destinataire_id = db.Column(db.String(36), primary_key=True)
+    non_lues = db.Column(db.Integer, nullable=False, default=0)
+    updatedAt = db.Column(
+        db.DateTime(timezone=True), nullable=False,
+        server_default=db.func.now(), onupdate=db.func.now()
+    )
+
+    def __repr__(self):
+        return f'<CompteurNotification {self.destinataire_id} non_lues={self.non_lues}>'
@@ -17,7 +17,8 @@ class DocumentJoint(UUIDMixin, db.Model):
         db.Enum(TypeDocumentEnum, name='type_document_enum'), nullable=False
     )
     nom_fichier = db.Column(db.String(255), nullable=False)
-    chemin_fichier = db.Column(db.String(500), nullable=False)
+    chemin_fichier = db.Column(db.String(500), nullable=False, index=True)  # clé blobs/... (stockage par contenu)
+    sha256 = db.Column(db.String(64), index=True)
     taille = db.Column(db.Integer)
     mime_type = db.Column(db.String(100))
     uploadedAt = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
@@ -0,0 +1,27 @@
+"""
+Modèle EntiteDetailCache - Fiche entité sérialisée (cache partagé entre workers).
+Une ligne par (entité, vue) : 'detail' (EntiteDetailOutputSchema, admin et
+entreprise) ou 'public' (EntitePublicDetailSchema).
+Invalidée à chaque flush touchant l'entité ou l'un de ses enfants : payload
+remis à NULL et generation incrémentée (une fiche construite avant
+l'invalidation n'est réécrite que si la génération n'a pas changé).
+"""
+from sqlalchemy.dialects.postgresql import JSONB
+from app.extensions import db
+
+
+class EntiteDetailCache(db.Model):
+    __tablename__ = 'entite_detail_cache'
+
+    entite_id = db.Column(
+        db.String(36), db.ForeignKey('entites_base.id', ondelete='CASCADE'), primary_key=True
+    )
+    vue = db.Column(db.String(20), primary_key=True)
+    payload = db.Column(JSONB)
+    generation = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')
+    createdAt = db.Column(
+        db.DateTime(timezone=True), nullable=False, server_default=db.func.now()
+    )
+
+    def __repr__(self):
+        return f'<EntiteDetailCache {self.entite_id} {self.vue}>'
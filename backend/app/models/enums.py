@@ -126,3 +126,17 @@ class StatutRenouvellementEnum(enum.Enum):
     en_cours = 'en_cours'
     approuve = 'approuve'
     rejete = 'rejete'
+
+
+class TypeSauvegardeEnum(enum.Enum):
+    """Origine / nature d'une sauvegarde."""
+    manuel = 'manuel'
+    planifie = 'planifie'
+    incremental = 'incremental'
+
+
+class StatutSauvegardeEnum(enum.Enum):
+    """Statut d'une sauvegarde."""
+    en_cours = 'en_cours'
+    termine = 'termine'
+    echec = 'echec'
@@ -0,0 +1,26 @@
+"""
+Modèle JobRun - Historique d'exécution des tâches planifiées.
+Une ligne par exécution : durée, statut, métriques retournées par la tâche.
+Sert aussi à déterminer quelles tâches sont dues (flask jobs run-due).
+"""
+from sqlalchemy.dialects.postgresql import JSONB
+from app.extensions import db
+from app.models.base import UUIDMixin
+
+
+class JobRun(UUIDMixin, db.Model):
+    __tablename__ = 'job_runs'
+    __table_args__ = (
+        db.Index('ix_job_runs_job_started', 'job', 'started_at'),
+    )
+
+    job = db.Column(db.String(50), nullable=False)
+    statut = db.Column(db.String(20), nullable=False, default='en_cours')  # en_cours, succes, echec
+    started_at = db.Column(db.DateTime(timezone=True), nullable=False)
+    finished_at = db.Column(db.DateTime(timezone=True))
+    duree_secondes = db.Column(db.Float)
+    resultat = db.Column(JSONB)
+    erreur = db.Column(db.Text)
+
+    def __repr__(self):
+        return f'<JobRun {self.job} {self.statut}>'
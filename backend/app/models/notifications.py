@@ -8,6 +8,10 @@ from app.models.base import UUIDMixin
 
 class Notification(UUIDMixin, db.Model):
     __tablename__ = 'notifications'
+    __table_args__ = (
+        # Liste des notifications d'un destinataire, plus récentes d'abord
+        db.Index('ix_notifications_dest_created', 'destinataire_id', 'createdAt'),
+    )
 
     destinataire_type = db.Column(
         db.String(20), nullable=False, index=True
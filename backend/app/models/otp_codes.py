@@ -1,6 +1,7 @@
 """
 Modèle OTPCode - Codes OTP pour inscription et connexion sensible.
 Nouveau v2.2 : vérification par email obligatoire.
+Le code n'est jamais stocké en clair : seul son HMAC-SHA256 (code_hash) est conservé.
 """
 from app.extensions import db
 from app.models.base import UUIDMixin
@@ -10,16 +11,19 @@ from app.models.enums import TypeOTPEnum
 class OTPCode(UUIDMixin, db.Model):
     __tablename__ = 'otp_codes'
     __table_args__ = (
-        db.Index('ix_otp_compte_type_used', 'compte_entreprise_id', 'type', 'used'),
+        # Couvre le prédicat de vérification : compte + type + non utilisé + expiration
+        db.Index('ix_otp_verification', 'compte_entreprise_id', 'type', 'used', 'expires_at'),
     )
 
     compte_entreprise_id = db.Column(
         db.String(36), db.ForeignKey('comptes_entreprises.id'), nullable=False, index=True
     )
-    code = db.Column(db.String(6), nullable=False, index=True)
+    code_hash = db.Column(db.String(64), nullable=False)
     type = db.Column(db.Enum(TypeOTPEnum, name='type_otp_enum'), nullable=False)
     expires_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
     used = db.Column(db.Boolean, default=False, nullable=False)
+    # Nombre de tentatives erronées (verrouillage au-delà de OTP_MAX_ATTEMPTS)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
     createdAt = db.Column(db.DateTime(timezone=True), nullable=False, server_default=db.func.now())
 
     # Relationship
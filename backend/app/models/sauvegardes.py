@@ -0,0 +1,47 @@
+"""
+Modèle Sauvegarde - Index des archives de sauvegarde de la base.
+Renseigné à la création (statut en_cours) puis complété (termine / echec) :
+la liste des sauvegardes est une requête indexée, sans parcours du disque.
+"""
+from sqlalchemy.dialects.postgresql import JSONB
+from app.extensions import db
+from app.models.base import UUIDMixin
+from app.models.enums import TypeSauvegardeEnum, StatutSauvegardeEnum
+
+
+class Sauvegarde(UUIDMixin, db.Model):
+    __tablename__ = 'sauvegardes'
+    __table_args__ = (
+        db.Index('ix_sauvegardes_statut_created', 'statut', 'createdAt'),
+    )
+
+    filename = db.Column(db.String(255), unique=True, nullable=False)
+    type = db.Column(
+        db.Enum(TypeSauvegardeEnum, name='type_sauvegarde_enum'), nullable=False
+    )
+    statut = db.Column(
+        db.Enum(StatutSauvegardeEnum, name='statut_sauvegarde_enum'),
+        nullable=False, default=StatutSauvegardeEnum.en_cours
+    )
+    taille_octets = db.Column(db.BigInteger)
+    total_lignes = db.Column(db.BigInteger)
+    lignes_par_table = db.Column(JSONB)
+    duree_secondes = db.Column(db.Float)
+    sha256 = db.Column(db.String(64))
+    erreur = db.Column(db.Text)
+    # Horloge de la base à l'instantané, ramenée au début de la plus ancienne
+    # transaction encore ouverte : ses écritures n'y figurent pas
+    borne = db.Column(db.DateTime(timezone=True))
+    # Incrémental : sauvegarde de référence et borne inférieure du filtre updatedAt
+    base_id = db.Column(
+        db.String(36), db.ForeignKey('sauvegardes.id', ondelete='SET NULL'), index=True
+    )
+    depuis = db.Column(db.DateTime(timezone=True))
+    created_by = db.Column(db.String(36), db.ForeignKey('users.id', ondelete='SET NULL'))
+    createdAt = db.Column(
+        db.DateTime(timezone=True), nullable=False, server_default=db.func.now(), index=True
+    )
+    termine_le = db.Column(db.DateTime(timezone=True))
+
+    def __repr__(self):
+        return f'<Sauvegarde {self.filename} {self.statut.value}>'
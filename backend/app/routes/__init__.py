@@ -1,10 +1,12 @@
 """
 Registry des blueprints Flask pour ARTCI DCP Platform.
-4 blueprints : auth, public, entreprise, admin.
+6 blueprints : auth, public, entreprise, admin, events (flux SSE), metrics.
 """
 from app.routes.auth import auth_bp
 from app.routes.public import public_bp
 from app.routes.entreprise import entreprise_bp
 from app.routes.admin import admin_bp
+from app.routes.events import events_bp
+from app.routes.metrics import metrics_bp
 
-__all__ = ['auth_bp', 'public_bp', 'entreprise_bp', 'admin_bp']
+__all__ = ['auth_bp', 'public_bp', 'entreprise_bp', 'admin_bp', 'events_bp', 'metrics_bp']
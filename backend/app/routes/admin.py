@@ -7,16 +7,21 @@ from flask import Blueprint, request, g
 from marshmallow import ValidationError
 from app.schemas.entite import (
     EntiteCreateInputSchema, EntiteUpdateInputSchema,
-    EntiteDetailOutputSchema, EntiteListOutputSchema
+    EntiteDetailOutputSchema, EntiteListOutputSchema, PublicationBatchInputSchema
 )
 from app.schemas.user import UserCreateInputSchema, UserUpdateInputSchema, UserOutputSchema
 from app.schemas.workflow import (
     AssignationCreateInputSchema, AssignationUpdateInputSchema, AssignationOutputSchema,
+    AssignationDispatchInputSchema, TransitionBatchInputSchema,
     FeedbackCreateInputSchema, ValidationN1InputSchema, HistoriqueStatutOutputSchema
 )
 from app.services.admin_service import AdminService
 from app.services.workflow_service import WorkflowService
+from app.services.entite_service import EntiteService
+from app.services.notification_service import NotificationService
 from app.utils.decorators import role_required, admin_or_above, editor_or_above
+from app.utils.uploads import validated_upload
+from app.utils.serializers import serializer_for, parse_fields
 from app.utils.responses import (
     success_response, created_response, error_response,
     validation_error_response, no_content_response
@@ -74,9 +79,14 @@ def list_entites():
 
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    # Champs clairsemés : ?fields=id,denomination,statut_workflow
+    try:
+        fields = parse_fields(request.args.get('fields'), EntiteListOutputSchema)
+    except ValueError as e:
+        return error_response(str(e), 400)
 
     result = AdminService.list_all_entites(
-        filters=filters or None, page=page, per_page=per_page
+        filters=filters or None, page=page, per_page=per_page, fields=fields
     )
     return success_response(result)
 
@@ -104,7 +114,7 @@ def create_entite():
     try:
         entite = AdminService.create_entite_artci(g.current_user_id, data)
         return created_response(
-            EntiteDetailOutputSchema().dump(entite),
+            EntiteDetailOutputSchema().dump(EntiteService.get_entite_for_read(entite.id)),
             'Entité créée avec succès.'
         )
     except ValueError as e:
@@ -126,7 +136,7 @@ def update_entite(entite_id):
             entite_id, g.current_user_id, data
         )
         return success_response(
-            EntiteDetailOutputSchema().dump(entite),
+            EntiteDetailOutputSchema().dump(EntiteService.get_entite_for_read(entite.id)),
             'Entité mise à jour.'
         )
     except ValueError as e:
@@ -205,7 +215,8 @@ def valider_traitement(traitement_id):
         return error_response(str(e), 400)
 
 
-# --- Backup (sauvegarde DB en JSON) ---
+# --- Backup (archive zip NDJSON, complete ou incrementale) ---
+# Restauration : CLI uniquement (flask backup restore), trop longue pour une requete HTTP.
 
 @admin_bp.route('/backup', methods=['GET'])
 @role_required('super_admin')
@@ -218,9 +229,12 @@ def list_backups():
 @admin_bp.route('/backup', methods=['POST'])
 @role_required('super_admin')
 def create_backup():
-    """Cree un backup manuel de la base (dump JSON)."""
+    """Cree un backup manuel de la base (body optionnel : {"type": "incremental"})."""
+    data = request.get_json(silent=True) or {}
     try:
-        result = AdminService.create_backup(g.current_user_id)
+        result = AdminService.create_backup(
+            g.current_user_id, incremental=data.get('type') == 'incremental'
+        )
         return created_response(result, 'Backup cree.')
     except Exception as e:
         return error_response(f'Erreur lors de la creation du backup : {e}', 500)
@@ -229,17 +243,22 @@ def create_backup():
 @admin_bp.route('/backup/<string:filename>', methods=['GET'])
 @role_required('super_admin')
 def download_backup(filename):
-    """Telecharge un fichier de backup."""
+    """Telecharge un fichier de backup (Range accepte, ETag = sha256 de l'archive)."""
     import os
-    from flask import send_file, current_app
-    upload_folder = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'backups')
+    from app.models.sauvegardes import Sauvegarde
+    from app.utils.file_delivery import send_download
+    upload_folder = AdminService._backup_dir()
     # Securite : empecher le path traversal
     if '..' in filename or '/' in filename or '\\' in filename:
         return error_response('Nom de fichier invalide.', 400)
     file_path = os.path.join(upload_folder, filename)
     if not os.path.exists(file_path):
         return error_response('Backup introuvable.', 404)
-    return send_file(file_path, as_attachment=True, download_name=filename)
+    sauvegarde = Sauvegarde.query.filter_by(filename=filename).first()
+    return send_download(
+        file_path, filename, mimetype='application/zip',
+        etag=sauvegarde.sha256 if sauvegarde and sauvegarde.sha256 else None
+    )
 
 
 # --- Suivi d'activite des agents (spec §5.1, §5.2) ---
@@ -259,7 +278,8 @@ def get_agents_activity():
 def retour_formulaire_entreprise(entite_id):
     """Le Super Admin retourne le formulaire a l'entreprise pour correction.
     Spec §5.1 : action reservee au Super Admin uniquement."""
-    from app.models import EntiteBase, EntiteWorkflow, Notification
+    from app.extensions import db
+    from app.models import EntiteBase, EntiteWorkflow
     from app.models.enums import StatutWorkflowEnum
     data = request.get_json() or {}
     motif = (data.get('motif') or '').strip()
@@ -277,18 +297,13 @@ def retour_formulaire_entreprise(entite_id):
 
     # Notifier l'entreprise
     if entite.compte_entreprise_id:
-        n = Notification(
-            destinataire_type='entreprise',
-            destinataire_id=entite.compte_entreprise_id,
+        NotificationService.notifier(
+            'entreprise', entite.compte_entreprise_id,
             type='retour_formulaire',
             titre="Votre dossier vous a été retourné",
             message=f"L'ARTCI vous demande de réviser votre dossier. Motif : {motif}",
             entite_id=entite.id,
-            lue=False,
         )
-        from app.extensions import db
-        db.session.add(n)
-    from app.extensions import db
     db.session.commit()
     return success_response({'entite_id': entite_id, 'statut': wf.statut.value if wf else None},
                             'Formulaire retourné à l\'entreprise.')
@@ -385,8 +400,29 @@ def depublier_entite(entite_id):
         return error_response(str(e), 400)
 
 
+@admin_bp.route('/entites/publication', methods=['POST'])
+@admin_or_above
+def publier_entites():
+    """Publier / depublier en masse (entite_ids ou filters). Les entites
+    non eligibles sont retournees dans 'rejetes'."""
+    schema = PublicationBatchInputSchema()
+    try:
+        data = schema.load(request.get_json())
+    except ValidationError as err:
+        return validation_error_response(err.messages)
+
+    try:
+        result = AdminService.publier_entites(
+            data['publier'], entite_ids=data.get('entite_ids'), filters=data.get('filters')
+        )
+        return success_response(result, f"{result['modifiees']} entite(s) mise(s) a jour.")
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+
 @admin_bp.route('/entites/<string:entite_id>/rapport-audit', methods=['POST'])
 @editor_or_above
+@validated_upload()
 def upload_rapport_audit(entite_id):
     """Téléverser un rapport d'audit pour une entité.
     Le rapport apparaitra automatiquement dans Mon dossier > Mes Rapports
@@ -410,14 +446,60 @@ def upload_rapport_audit(entite_id):
         return error_response(str(e), 400)
 
 
+@admin_bp.route('/documents/<string:document_id>/miniature', methods=['GET'])
+@editor_or_above
+def get_document_miniature(document_id):
+    """Miniature JPEG de la première page d'un document (si générée)."""
+    from app.models import ApercuDocument, DocumentJoint
+    from app.utils.file_delivery import send_download
+    from app.utils.storage import get_storage, LocalStorage
+    doc = DocumentJoint.query.get(document_id)
+    apercu = ApercuDocument.query.get(doc.sha256) if doc and doc.sha256 else None
+    if not apercu or not apercu.miniature:
+        return error_response('Aperçu non disponible.', 404)
+    storage = get_storage()
+    source = (storage.path(apercu.miniature) if isinstance(storage, LocalStorage)
+              else storage.open(apercu.miniature))
+    response = send_download(
+        source, f'{doc.nom_fichier}.jpg', mimetype='image/jpeg',
+        etag=f'{apercu.sha256}-{apercu.largeur}', as_attachment=False
+    )
+    # Contenu adressé par hash : immuable
+    response.headers['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
+@admin_bp.route('/documents/<string:document_id>/texte', methods=['GET'])
+@editor_or_above
+def get_document_texte(document_id):
+    """Texte extrait d'un document (PDF, DOCX), tronqué à APERCU_TEXTE_MAX."""
+    from app.models import ApercuDocument, DocumentJoint
+    doc = DocumentJoint.query.get(document_id)
+    if not doc:
+        return error_response('Document non trouvé.', 404)
+    apercu = ApercuDocument.query.get(doc.sha256) if doc.sha256 else None
+    return success_response({
+        'id': doc.id,
+        'nom_fichier': doc.nom_fichier,
+        'statut': apercu.statut if apercu else None,
+        'pages': apercu.pages if apercu else None,
+        'texte': apercu.texte if apercu else None,
+    })
+
+
 # --- Panier & Assignations ---
 
 @admin_bp.route('/panier', methods=['GET'])
 @editor_or_above
 def get_panier():
-    """Mon panier de demandes assignées."""
-    result = AdminService.get_panier(g.current_user_id)
-    return success_response(result)
+    """Mon panier de demandes assignées (?cursor=&limit=, curseur opaque)."""
+    try:
+        result = AdminService.get_panier(
+            g.current_user_id, cursor=request.args.get('cursor')
+        )
+        return success_response(result)
+    except ValueError as e:
+        return error_response(str(e), 400)
 
 
 @admin_bp.route('/assignation', methods=['POST'])
@@ -443,6 +525,47 @@ def assigner_demande():
         return error_response(str(e), 400)
 
 
+@admin_bp.route('/assignation/dispatch', methods=['POST'])
+@admin_or_above
+def dispatch_demandes():
+    """Répartir en masse des demandes soumises entre les éditeurs (par charge)."""
+    schema = AssignationDispatchInputSchema()
+    try:
+        data = schema.load(request.get_json())
+    except ValidationError as err:
+        return validation_error_response(err.messages)
+
+    try:
+        result = WorkflowService.dispatch_demandes(
+            g.current_user_id,
+            entite_ids=data.get('entite_ids'),
+            filters=data.get('filters'),
+            agent_ids=data.get('agent_ids'),
+            echeance=data.get('echeance'),
+        )
+        return created_response(result, f"{result['assignees']} demande(s) assignée(s).")
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+
+@admin_bp.route('/workflow/transitions', methods=['POST'])
+@admin_or_above
+def transition_batch():
+    """Appliquer un lot de transitions de workflow (résultat par entité)."""
+    schema = TransitionBatchInputSchema()
+    try:
+        data = schema.load(request.get_json())
+    except ValidationError as err:
+        return validation_error_response(err.messages)
+
+    result = WorkflowService.transition_batch(
+        data['transitions'], g.current_user_id, tout_ou_rien=data['tout_ou_rien']
+    )
+    return success_response(
+        result, f"{result['appliquees']} transition(s) appliquée(s), {result['refusees']} refusée(s)."
+    )
+
+
 @admin_bp.route('/assignation/<string:assignation_id>', methods=['PUT'])
 @editor_or_above
 def traiter_assignation(assignation_id):
@@ -467,7 +590,7 @@ def get_demandes_a_valider():
     """Demandes en attente de validation N+1."""
     demandes = WorkflowService.get_demandes_a_valider()
     return success_response(
-        AssignationOutputSchema(many=True).dump(demandes)
+        serializer_for(AssignationOutputSchema).dump(demandes, many=True)
     )
 
 
@@ -583,6 +706,7 @@ def deactivate_user(user_id):
 
 @admin_bp.route('/import', methods=['POST'])
 @admin_or_above
+@validated_upload(extensions=('xlsx', 'xls'))
 def import_excel():
     """Importer des entités depuis un fichier Excel."""
     if 'file' not in request.files:
@@ -604,6 +728,7 @@ def import_excel():
 
 @admin_bp.route('/import/boloforms', methods=['POST'])
 @admin_or_above
+@validated_upload(extensions=('csv',))
 def import_boloforms():
     """Importer les reponses du formulaire BoloForms / Google Forms (CSV 171 colonnes)."""
     from app.services.import_boloforms_service import import_boloforms_csv
@@ -774,6 +899,21 @@ def list_notifications():
     return success_response(result)
 
 
+@admin_bp.route('/notifications/unread-count', methods=['GET'])
+@role_required('super_admin', 'admin', 'editor', 'reader')
+def unread_notifications_count():
+    """Nombre de notifications non lues (compteur, adapté au polling)."""
+    return success_response({'non_lues': NotificationService.non_lues('artci', g.current_user_id)})
+
+
+@admin_bp.route('/notifications/read-all', methods=['PUT'])
+@role_required('super_admin', 'admin', 'editor', 'reader')
+def mark_all_notifications_read():
+    """Marquer toutes les notifications du user connecté comme lues."""
+    marquees = NotificationService.marquer_toutes_lues('artci', g.current_user_id)
+    return success_response({'marquees': marquees}, f'{marquees} notification(s) marquée(s) comme lue(s).')
+
+
 @admin_bp.route('/notifications/<string:notification_id>/read', methods=['PUT'])
 @role_required('super_admin', 'admin', 'editor', 'reader')
 def mark_notification_read(notification_id):
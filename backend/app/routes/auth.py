@@ -14,6 +14,7 @@ from app.schemas.auth import (
 )
 from app.schemas.user import UserOutputSchema
 from app.services.auth_service import AuthService
+from app.extensions import limiter
 from app.utils.responses import (
     success_response, created_response, error_response,
     validation_error_response
@@ -23,6 +24,7 @@ auth_bp = Blueprint('auth', __name__)
 
 
 @auth_bp.route('/register', methods=['POST'])
+@limiter.limit('RATELIMIT_AUTH')
 def register():
     """Inscription entreprise (3 sections : DG, DPO, acces).
     Le compte est cree mais reste inactif jusqu'a validation manuelle ARTCI."""
@@ -43,6 +45,7 @@ def register():
 
 
 @auth_bp.route('/verify-otp', methods=['POST'])
+@limiter.limit('RATELIMIT_OTP', scope='otp')
 def verify_otp():
     """Vérifier un code OTP à 6 chiffres."""
     schema = VerifyOTPInputSchema()
@@ -62,6 +65,7 @@ def verify_otp():
 
 
 @auth_bp.route('/login', methods=['POST'])
+@limiter.limit('RATELIMIT_AUTH')
 def login():
     """Connexion entreprise OU ARTCI staff (via login_type)."""
     schema = LoginInputSchema()
@@ -108,6 +112,7 @@ def logout():
 
 
 @auth_bp.route('/forgot-password', methods=['POST'])
+@limiter.limit('RATELIMIT_OTP', scope='otp')
 def forgot_password():
     """Envoyer un OTP de réinitialisation du mot de passe."""
     schema = ForgotPasswordInputSchema()
@@ -124,6 +129,7 @@ def forgot_password():
 
 
 @auth_bp.route('/reset-password', methods=['POST'])
+@limiter.limit('RATELIMIT_OTP', scope='otp')
 def reset_password():
     """Réinitialiser le mot de passe avec un code OTP."""
     schema = ResetPasswordInputSchema()
@@ -8,7 +8,9 @@ from marshmallow import ValidationError
 from app.schemas.entite import EntiteCreateInputSchema, EntiteUpdateInputSchema, EntiteDetailOutputSchema
 from app.schemas.workflow import FeedbackOutputSchema
 from app.services.entreprise_service import EntrepriseService
+from app.services.entite_service import EntiteService
 from app.utils.decorators import entreprise_auth_required
+from app.utils.uploads import validated_upload
 from app.utils.responses import (
     success_response, created_response, error_response,
     validation_error_response, no_content_response
@@ -49,7 +51,7 @@ def create_demande():
     try:
         entite = EntrepriseService.create_demande(g.current_user_id, data)
         return created_response(
-            EntiteDetailOutputSchema().dump(entite),
+            EntiteDetailOutputSchema().dump(EntiteService.get_entite_for_read(entite.id)),
             'Demande créée avec succès.'
         )
     except ValueError as e:
@@ -71,7 +73,7 @@ def update_demande(entite_id):
             g.current_user_id, entite_id, data
         )
         return success_response(
-            EntiteDetailOutputSchema().dump(entite),
+            EntiteDetailOutputSchema().dump(EntiteService.get_entite_for_read(entite.id)),
             'Demande mise à jour.'
         )
     except ValueError as e:
@@ -99,6 +101,7 @@ def get_feedbacks():
 
 @entreprise_bp.route('/rapports', methods=['POST'])
 @entreprise_auth_required
+@validated_upload()
 def soumettre_rapport():
     """Soumettre un rapport d'activité (réservé aux conformes)."""
     if 'file' not in request.files:
@@ -300,6 +303,7 @@ def get_dossier_dpo():
 
 @entreprise_bp.route('/dossier-dpo', methods=['POST'])
 @entreprise_auth_required
+@validated_upload()
 def upload_document_dpo():
     """Upload d'un document DPO (remplace le precedent du meme type)."""
     if 'file' not in request.files:
@@ -0,0 +1,113 @@
+"""
+Flux d'événements temps réel (Server-Sent Events) pour ARTCI DCP Platform.
+Remplace le polling des notifications et du tableau de bord : le client ouvre
+GET /api/events/stream et reçoit uniquement les changements qui le concernent.
+
+Événements :
+    non_lues      {non_lues}                     à l'ouverture du flux
+    notification  {type, titre, entite_id}       nouvelle notification
+    workflow      {changements: [{entite_id, ancien_statut, nouveau_statut}]}
+Un commentaire « : ping » est envoyé toutes les EVENTS_HEARTBEAT secondes.
+Le flux est fermé après EVENTS_STREAM_MAX_SECONDS : le client se reconnecte
+(et réactualise au passage son jeton).
+
+Chaque flux occupe un thread du worker gunicorn (gthread) : au-delà de
+EVENTS_MAX_STREAMS flux ouverts dans le worker, la connexion est refusée
+(503 + Retry-After) et le client se rabat sur le rechargement périodique,
+pour que les flux ne privent jamais l'API de threads.
+"""
+import json
+import threading
+import time
+from flask import Blueprint, Response, current_app, g, jsonify
+from flask_jwt_extended import verify_jwt_in_request, get_jwt, get_jwt_identity
+from app.extensions import db, event_bus
+from app.services.notification_service import NotificationService
+from app.utils.event_bus import BROADCAST_ARTCI, channel_key
+
+
+events_bp = Blueprint('events', __name__)
+
+_streams_lock = threading.Lock()
+_streams_ouverts = 0
+
+
+def _reserver_flux(maximum):
+    """Réserver une place de flux dans ce worker ; False si la limite est atteinte."""
+    global _streams_ouverts
+    with _streams_lock:
+        if maximum and _streams_ouverts >= maximum:
+            return False
+        _streams_ouverts += 1
+        return True
+
+
+def _liberer_flux():
+    global _streams_ouverts
+    with _streams_lock:
+        _streams_ouverts -= 1
+
+
+def _sse(event_name, data):
+    return f'event: {event_name}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n'
+
+
+@events_bp.route('/stream', methods=['GET'])
+def stream():
+    """Flux SSE du user connecté (personnel ARTCI ou entreprise)."""
+    verify_jwt_in_request()
+    user_type = get_jwt().get('user_type')
+    if user_type not in ('artci', 'entreprise'):
+        return jsonify({'error': 'Accès non autorisé.'}), 403
+    g.current_user_id = get_jwt_identity()
+
+    retry_after = current_app.config.get('EVENTS_RETRY_AFTER', 60)
+    if not _reserver_flux(current_app.config.get('EVENTS_MAX_STREAMS', 4)):
+        response = jsonify({'error': 'Flux temps réel indisponible, réessayer plus tard.'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+    try:
+        response = _ouvrir_flux(user_type)
+    except BaseException:
+        _liberer_flux()
+        raise
+    # Appelé par le serveur à la fermeture, que le générateur ait démarré ou non
+    libere = threading.Event()
+
+    def liberer():
+        if not libere.is_set():
+            libere.set()
+            _liberer_flux()
+    response.call_on_close(liberer)
+    return response
+
+
+def _ouvrir_flux(user_type):
+    """Abonnement et réponse streamée du flux (place déjà réservée)."""
+    keys = [channel_key(user_type, g.current_user_id)]
+    if user_type == 'artci':
+        keys.append(channel_key('artci', BROADCAST_ARTCI))
+    non_lues = NotificationService.non_lues(user_type, g.current_user_id)
+    # Le flux peut durer plusieurs minutes : ne pas garder de connexion du pool
+    db.session.remove()
+
+    heartbeat = current_app.config.get('EVENTS_HEARTBEAT', 15)
+    max_seconds = current_app.config.get('EVENTS_STREAM_MAX_SECONDS', 300)
+    subscription = event_bus.subscribe(keys)
+
+    def generate():
+        with subscription:
+            yield f'retry: 3000\n{_sse("non_lues", {"non_lues": non_lues})}'
+            deadline = time.monotonic() + max_seconds
+            while time.monotonic() < deadline:
+                item = subscription.get(timeout=heartbeat)
+                if item is None:
+                    yield ': ping\n\n'
+                else:
+                    yield _sse(item['event'], item['data'])
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
@@ -0,0 +1,74 @@
+"""
+Métriques d'exploitation pour ARTCI DCP Platform (GET /metrics).
+
+Format texte Prometheus. Compteurs du worker gunicorn qui répond (pid en
+label) : requêtes SQL et durée par endpoint, pool de connexions.
+Accès : en-tête `Authorization: Bearer <METRICS_TOKEN>` ; sans METRICS_TOKEN,
+l'endpoint n'existe qu'en debug.
+"""
+import hmac
+import os
+from flask import Blueprint, current_app, request
+from app.extensions import db
+from app.utils.db_metrics import pool_status, snapshot
+from app.utils.responses import error_response
+
+
+metrics_bp = Blueprint('metrics', __name__)
+
+
+def _autorise():
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        return current_app.debug
+    fourni = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    return hmac.compare_digest(fourni.encode('utf-8'), token.encode('utf-8'))
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Compteurs SQL par endpoint et état du pool (worker courant)."""
+    if not _autorise():
+        return error_response('Resource not found', 404)
+
+    pid = os.getpid()
+    totaux, endpoints = snapshot()
+    lignes = [
+        '# HELP artci_db_queries_total Requêtes SQL exécutées.',
+        '# TYPE artci_db_queries_total counter',
+        f'artci_db_queries_total{{pid="{pid}"}} {totaux["requetes_sql"]}',
+        f'artci_db_queries_total{{pid="{pid}",endpoint="hors_http"}} {totaux["requetes_sql_hors_http"]}',
+        '# HELP artci_db_seconds_total Durée cumulée des requêtes SQL.',
+        '# TYPE artci_db_seconds_total counter',
+        f'artci_db_seconds_total{{pid="{pid}"}} {totaux["duree_sql"]:.6f}',
+    ]
+
+    series = [
+        ('artci_http_requests_total', 'counter', 'Requêtes HTTP instrumentées.', 'requetes_http'),
+        ('artci_endpoint_db_queries_total', 'counter', 'Requêtes SQL par endpoint.', 'requetes_sql'),
+        ('artci_endpoint_db_seconds_total', 'counter', 'Durée SQL cumulée par endpoint.', 'duree_sql'),
+        ('artci_endpoint_db_queries_max', 'gauge', 'Maximum de requêtes SQL pour une requête HTTP.',
+         'max_requetes_sql'),
+    ]
+    for nom, type_, aide, cle in series:
+        lignes.append(f'# HELP {nom} {aide}')
+        lignes.append(f'# TYPE {nom} {type_}')
+        for endpoint, agregat in sorted(endpoints.items()):
+            valeur = agregat[cle]
+            valeur = f'{valeur:.6f}' if isinstance(valeur, float) else valeur
+            lignes.append(f'{nom}{{pid="{pid}",endpoint="{_label(endpoint)}"}} {valeur}')
+
+    pool = pool_status(db.engine)
+    if pool:
+        lignes.append('# HELP artci_db_pool_connections Connexions du pool SQLAlchemy.')
+        lignes.append('# TYPE artci_db_pool_connections gauge')
+        for etat, valeur in pool.items():
+            lignes.append(f'artci_db_pool_connections{{pid="{pid}",etat="{etat}"}} {valeur}')
+
+    return current_app.response_class(
+        '\n'.join(lignes) + '\n', mimetype='text/plain; version=0.0.4'
+    )
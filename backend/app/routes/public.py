@@ -2,12 +2,15 @@
 Routes publiques pour ARTCI DCP Platform.
 Entités conformes, statistiques, export, téléchargement documents, contact.
 """
-import os
 import re
-from flask import Blueprint, request, send_file, current_app
+from flask import Blueprint, request, send_file
 from app.services.public_service import PublicService
+from app.services.document_service import DocumentService
 from app.utils.responses import success_response, error_response, created_response
-from app.extensions import db
+from app.utils.http_cache import cached_public_response
+from app.utils.serializers import parse_fields
+from app.schemas.entite import EntiteListOutputSchema
+from app.extensions import db, limiter
 from app.models.documents_joints import DocumentJoint
 from app.models.contact_messages import ContactMessage
 from app.models.enums import TypeDocumentEnum
@@ -20,6 +23,7 @@ EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
 
 
 @public_bp.route('/entites', methods=['GET'])
+@cached_public_response
 def list_entites():
     """Liste paginée des entités conformes publiées."""
     filters = {
@@ -36,14 +40,20 @@ def list_entites():
 
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 20, type=int)
+    # Champs clairsemés (carte, listes déroulantes) : ?fields=id,denomination,latitude,longitude
+    try:
+        fields = parse_fields(request.args.get('fields'), EntiteListOutputSchema)
+    except ValueError as e:
+        return error_response(str(e), 400)
 
     result = PublicService.get_entites_conformes(
-        filters=filters or None, page=page, per_page=per_page
+        filters=filters or None, page=page, per_page=per_page, fields=fields
     )
     return success_response(result)
 
 
 @public_bp.route('/entites/<string:entite_id>', methods=['GET'])
+@cached_public_response
 def get_entite_detail(entite_id):
     """Fiche détaillée publique d'une entité conforme."""
     result = PublicService.get_entite_public_detail(entite_id)
@@ -53,6 +63,7 @@ def get_entite_detail(entite_id):
 
 
 @public_bp.route('/stats', methods=['GET'])
+@cached_public_response
 def get_stats():
     """Statistiques agrégées publiques."""
     stats = PublicService.get_public_stats()
@@ -60,6 +71,7 @@ def get_stats():
 
 
 @public_bp.route('/export', methods=['GET'])
+@limiter.limit('RATELIMIT_EXPORT')
 def export_entites():
     """Export des entités conformes en Excel, CSV ou PDF."""
     format_type = request.args.get('format', 'excel')
@@ -104,19 +116,14 @@ def download_document(document_id):
     if doc.type_document != TypeDocumentEnum.autorisation:
         return error_response('Ce document n\'est pas accessible publiquement.', 403)
 
-    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], doc.chemin_fichier)
-    if not os.path.exists(file_path):
+    try:
+        return DocumentService.download_response(doc, mimetype=doc.mime_type or 'application/pdf')
+    except FileNotFoundError:
         return error_response('Fichier introuvable sur le serveur.', 404)
 
-    return send_file(
-        file_path,
-        mimetype=doc.mime_type or 'application/pdf',
-        as_attachment=True,
-        download_name=doc.nom_fichier
-    )
-
 
 @public_bp.route('/contact', methods=['POST'])
+@limiter.limit('RATELIMIT_CONTACT')
 def submit_contact():
     """Reception d'un message du formulaire de contact public."""
     data = request.get_json()
@@ -2,7 +2,7 @@
 Schemas Marshmallow pour les entités et toutes les tables enfants.
 Le fichier le plus volumineux : couvre les 17 tables liées à EntiteBase.
 """
-from marshmallow import Schema, fields, validate, EXCLUDE
+from marshmallow import Schema, fields, validate, validates_schema, ValidationError, EXCLUDE
 from app.schemas.common import EnumField
 from app.models.enums import TypeDocumentEnum
 
@@ -127,6 +127,7 @@ class DocumentJointOutputSchema(Schema):
     type_document = EnumField()
     nom_fichier = fields.String()
     chemin_fichier = fields.String()
+    sha256 = fields.String()
     taille = fields.Integer()
     mime_type = fields.String()
     uploadedAt = fields.DateTime()
@@ -230,6 +231,42 @@ class RenouvellementOutputSchema(Schema):
     createdAt = fields.DateTime()
 
 
+class RenouvellementListOutputSchema(Schema):
+    """Demande de renouvellement (liste admin, avec la dénomination de l'entité)."""
+    id = fields.String()
+    entite_id = fields.String()
+    entreprise_denomination = fields.Method('get_denomination')
+    date_expiration = fields.Date(attribute='date_expiration_agrement')
+    motif = fields.String()
+    statut = EnumField()
+    commentaire = fields.String()
+    traite_par = fields.String()
+    createdAt = fields.DateTime()
+
+    def get_denomination(self, obj):
+        return obj.entite.denomination if obj.entite else ''
+
+
+class RapportOutputSchema(Schema):
+    """Rapport d'activité ou d'audit déposé (liste admin)."""
+    id = fields.String()
+    entite_id = fields.String()
+    entreprise_denomination = fields.Method('get_denomination')
+    type_document = EnumField()
+    nom_fichier = fields.String()
+    date_soumission = fields.DateTime(attribute='uploadedAt')
+    statut = fields.Method('get_statut')
+    createdAt = fields.DateTime(attribute='uploadedAt')
+
+    def get_denomination(self, obj):
+        return obj.entite.denomination if obj.entite else ''
+
+    def get_statut(self, obj):
+        # Pas de table de validation des rapports : on considere "en_attente"
+        # tant qu'un mecanisme de validation n'est pas implemente.
+        return 'en_attente'
+
+
 class RenouvellementInputSchema(Schema):
     date_expiration_agrement = fields.Date()
     motif = fields.String()
@@ -511,3 +548,30 @@ class EntiteFilterSchema(Schema):
         'auto_recensement', 'saisie_artci', 'rapprochement'
     ]))
     publie_sur_carte = fields.Boolean()
+
+
+def effective_filters(filters, ignore=()):
+    """
+    Critères réellement appliqués d'un filtre d'entités (valeurs non vides,
+    clés de `ignore` retirées). Un dict vide = aucune restriction : les
+    opérations en masse doivent alors le refuser.
+    """
+    return {
+        k: v for k, v in (filters or {}).items()
+        if k not in ignore and v is not None and v != ''
+    }
+
+
+class PublicationBatchInputSchema(Schema):
+    """POST /api/admin/entites/publication"""
+    publier = fields.Boolean(required=True)
+    entite_ids = fields.List(fields.String(), validate=validate.Length(max=5000))
+    filters = fields.Nested(EntiteFilterSchema)
+
+    @validates_schema
+    def validate_cible(self, data, **kwargs):
+        # publie_sur_carte est ignoré (la cible est l'état inverse de `publier`)
+        if 'filters' in data and not effective_filters(data['filters'], ignore=('publie_sur_carte',)):
+            raise ValidationError('Le filtre doit contenir au moins un critère.', 'filters')
+        if not data.get('entite_ids') and 'filters' not in data:
+            raise ValidationError('Préciser entite_ids ou filters.', 'entite_ids')
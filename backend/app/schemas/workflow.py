@@ -1,8 +1,9 @@
 """
 Schemas Marshmallow pour le workflow, assignations, feedbacks, stats.
 """
-from marshmallow import Schema, fields, validate
+from marshmallow import Schema, fields, validate, validates_schema, ValidationError
 from app.schemas.common import EnumField
+from app.schemas.entite import EntiteFilterSchema, effective_filters
 
 
 # --- ASSIGNATION ---
@@ -14,6 +15,21 @@ class AssignationCreateInputSchema(Schema):
     echeance = fields.Date(required=True)
 
 
+class AssignationDispatchInputSchema(Schema):
+    """POST /api/admin/assignation/dispatch"""
+    entite_ids = fields.List(fields.String())
+    filters = fields.Nested(EntiteFilterSchema)
+    agent_ids = fields.List(fields.String())
+    echeance = fields.Date()
+
+    @validates_schema
+    def validate_cible(self, data, **kwargs):
+        if 'filters' in data and not effective_filters(data['filters']):
+            raise ValidationError('Le filtre doit contenir au moins un critère.', 'filters')
+        if not data.get('entite_ids') and 'filters' not in data:
+            raise ValidationError('Préciser entite_ids ou filters.', 'entite_ids')
+
+
 class AssignationUpdateInputSchema(Schema):
     """PUT /api/admin/assignation/:id"""
     statut = fields.String(validate=validate.OneOf([
@@ -77,6 +93,26 @@ class ValidationN1InputSchema(Schema):
     commentaire = fields.String()
 
 
+# --- TRANSITIONS ---
+
+class TransitionItemInputSchema(Schema):
+    entite_id = fields.String(required=True)
+    statut = fields.String(required=True, validate=validate.OneOf([
+        'soumis', 'en_verification', 'en_attente_complements', 'conforme',
+        'conforme_sous_reserve', 'rejete', 'valide', 'publie'
+    ]))
+    commentaire = fields.String()
+
+
+class TransitionBatchInputSchema(Schema):
+    """POST /api/admin/workflow/transitions"""
+    transitions = fields.List(
+        fields.Nested(TransitionItemInputSchema), required=True,
+        validate=validate.Length(min=1, max=500)
+    )
+    tout_ou_rien = fields.Boolean(load_default=False)
+
+
 # --- HISTORIQUE ---
 
 class HistoriqueStatutOutputSchema(Schema):
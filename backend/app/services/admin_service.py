@@ -2,28 +2,54 @@
 Service admin pour ARTCI DCP Platform.
 Dashboard stats, gestion utilisateurs, import Excel, logs.
 """
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from sqlalchemy import func
+from sqlalchemy.orm import joinedload
 from app.extensions import db
 from app.models import (
     EntiteBase, EntiteWorkflow, EntiteConformite,
     AssignationDemande, FeedbackVerification,
     HistoriqueStatut, User,
-    Renouvellement, DocumentJoint, Notification
+    Renouvellement, DocumentJoint
 )
 from app.models.enums import (
     StatutWorkflowEnum, StatutConformiteEnum,
     StatutAssignationEnum, RoleEnum, OrigineSaisieEnum,
     StatutRenouvellementEnum, TypeDocumentEnum
 )
-from app.schemas.entite import EntiteListOutputSchema, EntiteDetailOutputSchema
+from app.schemas.entite import (
+    EntiteListOutputSchema, EntiteDetailOutputSchema,
+    RenouvellementListOutputSchema, RapportOutputSchema, effective_filters
+)
 from app.schemas.user import UserOutputSchema
 from app.schemas.workflow import (
     AssignationOutputSchema, FeedbackOutputSchema, HistoriqueStatutOutputSchema
 )
 from app.services.entite_service import EntiteService
+from app.services.detail_cache_service import DetailCacheService, VUE_DETAIL
+from app.services.document_service import DocumentService
 from app.utils.password import hash_password
-from app.utils.pagination import paginate
+from app.utils.pagination import paginate, page_limit, encode_cursor, decode_cursor
+from app.utils.serializers import columns_for, serializer_for
+
+
+# Statuts de workflow visibles dans le panier (brouillons exclus, spec §5.3)
+PANIER_STATUTS = (
+    StatutWorkflowEnum.soumis,
+    StatutWorkflowEnum.en_verification,
+    StatutWorkflowEnum.en_attente_complements,
+    StatutWorkflowEnum.conforme,
+    StatutWorkflowEnum.conforme_sous_reserve,
+    StatutWorkflowEnum.valide,
+    StatutWorkflowEnum.publie,
+)
+
+# Statuts de conformité permettant la publication sur la cartographie
+STATUTS_PUBLIABLES = (
+    StatutConformiteEnum.conforme,
+    StatutConformiteEnum.demarche_en_cours,
+    StatutConformiteEnum.partiellement_conforme,
+)
 
 
 class AdminService:
@@ -121,19 +147,25 @@ class AdminService:
         return stats
 
     @staticmethod
-    def list_all_entites(filters=None, page=None, per_page=None):
-        """Liste toutes les entités (tous statuts) avec filtres."""
-        query = EntiteService.build_entite_query(filters)
+    def list_all_entites(filters=None, page=None, per_page=None, fields=None):
+        """Liste toutes les entités (tous statuts) avec filtres ; `fields` : champs clairsemés."""
+        query = EntiteService.build_entite_query(filters, fields=fields)
         query = query.order_by(EntiteBase.createdAt.desc())
-        return paginate(query, EntiteListOutputSchema(), page=page, per_page=per_page)
+        return paginate(
+            query, EntiteListOutputSchema, page=page, per_page=per_page,
+            loader=EntiteService.list_loader(fields), only=fields
+        )
 
     @staticmethod
     def get_entite_detail(entite_id):
-        """Détail complet d'une entité (vue admin)."""
-        entite = EntiteService.get_entite_with_eager_load(entite_id)
-        if not entite:
-            return None
-        return EntiteDetailOutputSchema().dump(entite)
+        """Détail complet d'une entité (vue admin, servi depuis le cache des fiches)."""
+        def build():
+            entite = EntiteService.get_entite_for_read(entite_id)
+            if not entite:
+                return None
+            return EntiteDetailOutputSchema().dump(entite)
+
+        return DetailCacheService.get_or_build(entite_id, VUE_DETAIL, build)
 
     @staticmethod
     def create_entite_artci(user_id, data):
@@ -154,32 +186,33 @@ class AdminService:
 
     @staticmethod
     def _backup_dir():
-        import os
-        from flask import current_app
-        d = os.path.join(current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'backups')
-        os.makedirs(d, exist_ok=True)
-        return d
+        from app.services.backup_service import BackupService
+        return BackupService.backup_dir()
 
     @staticmethod
-    def list_backups():
-        """Liste les fichiers de backup."""
-        import os
-        d = AdminService._backup_dir()
-        items = []
-        for f in sorted(os.listdir(d), reverse=True):
-            path = os.path.join(d, f)
-            if not os.path.isfile(path):
-                continue
-            stat = os.stat(path)
-            items.append({
-                'filename': f,
-                'taille_octets': stat.st_size,
-                'taille': AdminService._humansize(stat.st_size),
-                'createdAt': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
-                'type': 'manuel',
-                'statut': 'termine',
-            })
-        return items
+    def list_backups(limit=200):
+        """Liste les sauvegardes (index `sauvegardes`, y compris celles en cours)."""
+        from app.models.sauvegardes import Sauvegarde
+        sauvegardes = Sauvegarde.query.order_by(Sauvegarde.createdAt.desc()).limit(limit)
+        return [AdminService._serialize_backup(s) for s in sauvegardes]
+
+    @staticmethod
+    def _serialize_backup(s):
+        return {
+            'id': s.id,
+            'filename': s.filename,
+            'taille_octets': s.taille_octets,
+            'taille': AdminService._humansize(s.taille_octets) if s.taille_octets is not None else None,
+            'createdAt': s.createdAt.isoformat() if s.createdAt else None,
+            'termine_le': s.termine_le.isoformat() if s.termine_le else None,
+            'type': s.type.value,
+            'statut': s.statut.value,
+            'total_lignes': s.total_lignes,
+            'lignes': s.lignes_par_table,
+            'duree_secondes': s.duree_secondes,
+            'sha256': s.sha256,
+            'erreur': s.erreur,
+        }
 
     @staticmethod
     def _humansize(n):
@@ -190,81 +223,11 @@ class AdminService:
         return f"{n:.1f} To"
 
     @staticmethod
-    def create_backup(user_id):
-        """Cree un dump JSON des principales tables."""
-        import os, json
-        from datetime import datetime as dt
-        from app.models import (
-            EntiteBase, EntiteWorkflow, EntiteConformite, EntiteContact,
-            EntiteLocalisation, ResponsableLegal, DPO, ConformiteAdministrative,
-            RegistreTraitement, CategorieDonnees, FinaliteBaseLegale, SousTraitance,
-            TransfertInternational, SecuriteConformite, MesureSecurite, CertificationSecurite,
-            HistoriqueStatut, Renouvellement, Notification, DocumentJoint,
-        )
-        from app.models.comptes_entreprises import CompteEntreprise
-        from app.models import User
-
-        d = AdminService._backup_dir()
-        timestamp = dt.utcnow().strftime('%Y%m%d_%H%M%S')
-        filename = f'backup_{timestamp}.json'
-        filepath = os.path.join(d, filename)
-
-        def _row_to_dict(row, exclude=()):
-            out = {}
-            for col in row.__table__.columns:
-                if col.name in exclude:
-                    continue
-                v = getattr(row, col.name)
-                if isinstance(v, (dt,)):
-                    out[col.name] = v.isoformat()
-                elif hasattr(v, 'value'):  # enum
-                    out[col.name] = v.value
-                else:
-                    out[col.name] = v
-            return out
-
-        data = {}
-        models = [
-            ('comptes_entreprises', CompteEntreprise, ('password_hash',)),
-            ('users', User, ('password_hash',)),
-            ('entites_base', EntiteBase, ()),
-            ('entites_contact', EntiteContact, ()),
-            ('entites_workflow', EntiteWorkflow, ()),
-            ('entites_localisation', EntiteLocalisation, ()),
-            ('entites_conformite', EntiteConformite, ()),
-            ('responsables_legaux', ResponsableLegal, ()),
-            ('dpo', DPO, ()),
-            ('conformite_administrative', ConformiteAdministrative, ()),
-            ('registre_traitements', RegistreTraitement, ()),
-            ('categories_donnees', CategorieDonnees, ()),
-            ('finalites_bases_legales', FinaliteBaseLegale, ()),
-            ('sous_traitance', SousTraitance, ()),
-            ('transferts_internationaux', TransfertInternational, ()),
-            ('securite_conformite', SecuriteConformite, ()),
-            ('mesures_securite', MesureSecurite, ()),
-            ('certifications_securite', CertificationSecurite, ()),
-            ('historique_statuts', HistoriqueStatut, ()),
-            ('renouvellements', Renouvellement, ()),
-            ('notifications', Notification, ()),
-            ('documents_joints', DocumentJoint, ()),
-        ]
-        for name, model, exclude in models:
-            try:
-                data[name] = [_row_to_dict(r, exclude) for r in model.query.all()]
-            except Exception:
-                data[name] = []
-
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump({'created_at': dt.utcnow().isoformat(),
-                       'created_by': user_id,
-                       'tables': data}, f, ensure_ascii=False, default=str, indent=2)
-
-        size = os.path.getsize(filepath)
-        return {
-            'filename': filename,
-            'taille_octets': size,
-            'taille': AdminService._humansize(size),
-        }
+    def create_backup(user_id, incremental=False):
+        """Cree une archive de sauvegarde (streaming, compressee, complete ou incrementale)."""
+        from app.services.backup_service import BackupService
+        result = BackupService.create_backup(user_id=user_id, incremental=incremental)
+        return AdminService._serialize_backup(result['sauvegarde'])
 
     # --- Suivi d'activite des agents (spec §5.1, §5.2 reunion 07/05) ---
 
@@ -493,11 +456,7 @@ class AdminService:
             raise ValueError('Entite non trouvee.')
         conformite = EntiteConformite.query.get(entite_id)
         statut = conformite.statut_conformite if conformite else None
-        if statut not in (
-            StatutConformiteEnum.conforme,
-            StatutConformiteEnum.demarche_en_cours,
-            StatutConformiteEnum.partiellement_conforme,
-        ):
+        if statut not in STATUTS_PUBLIABLES:
             raise ValueError(
                 "Seules les entites au statut 'Conforme' ou 'Demarche en cours' "
                 'peuvent etre publiees.'
@@ -516,6 +475,73 @@ class AdminService:
         db.session.commit()
         return {'id': entite.id, 'publie_sur_carte': False}
 
+    @staticmethod
+    def publier_entites(publier=True, entite_ids=None, filters=None):
+        """Publier / dépublier en masse, par liste d'IDs ou par filtre
+        (mêmes filtres que la liste des entités, ex. statut_conformite + region).
+
+        Un seul UPDATE ... RETURNING : l'éligibilité (statut de conformité,
+        pour la publication) est dans la clause WHERE ; les entités déjà dans
+        l'état demandé ne sont pas réécrites. Version des données publiées
+        incrémentée une fois pour tout le lot.
+
+        Returns:
+            dict {publie_sur_carte, modifiees, deja, rejetes: [id], introuvables: [id]}
+        """
+        from sqlalchemy import select, update
+        from app.utils.http_cache import bump_published_version
+
+        filters = effective_filters(filters, ignore=('publie_sur_carte',))
+        if not entite_ids and not filters:
+            raise ValueError('Préciser des entités (entite_ids) ou un filtre.')
+
+        cibles = select(EntiteBase.id)
+        if entite_ids:
+            cibles = cibles.where(EntiteBase.id.in_(entite_ids))
+        if filters:
+            filtered = EntiteService.apply_entite_filters(db.session.query(EntiteBase.id), filters)
+            cibles = cibles.where(EntiteBase.id.in_(filtered.statement))
+
+        conditions = [EntiteBase.id.in_(cibles), EntiteBase.publie_sur_carte.isnot(publier)]
+        if publier:
+            conditions.append(EntiteBase.id.in_(
+                select(EntiteConformite.entite_id)
+                .where(EntiteConformite.statut_conformite.in_(STATUTS_PUBLIABLES))
+            ))
+        modifiees = db.session.execute(
+            update(EntiteBase).where(*conditions).values(publie_sur_carte=publier)
+            .returning(EntiteBase.id),
+            execution_options={'synchronize_session': False},
+        ).scalars().all()
+
+        # Compte rendu : cibles restées dans l'autre état = non éligibles
+        restantes = db.session.execute(
+            select(EntiteBase.id, EntiteBase.publie_sur_carte).where(EntiteBase.id.in_(cibles))
+        ).all()
+        modifiees_set = set(modifiees)
+        rejetes = sorted(
+            entite_id for entite_id, publie in restantes
+            if entite_id not in modifiees_set and bool(publie) != publier
+        )
+        deja = sum(
+            1 for entite_id, publie in restantes
+            if entite_id not in modifiees_set and bool(publie) == publier
+        )
+        introuvables = sorted(set(entite_ids or []) - {r[0] for r in restantes})
+
+        if modifiees:
+            # UPDATE ensembliste : hors unit of work, invalidations explicites
+            DetailCacheService.invalidate(modifiees)
+            bump_published_version()
+        db.session.commit()
+        return {
+            'publie_sur_carte': publier,
+            'modifiees': len(modifiees),
+            'deja': deja,
+            'rejetes': rejetes,
+            'introuvables': introuvables,
+        }
+
     @staticmethod
     def upload_rapport_audit(entite_id, file):
         """Téléverser un rapport d'audit pour une entité.
@@ -524,35 +550,32 @@ class AdminService:
         if not entite:
             raise ValueError('Entité non trouvée.')
 
-        import os
-        from flask import current_app
-        upload_folder = os.path.join(
-            current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'audits'
-        )
-        os.makedirs(upload_folder, exist_ok=True)
-        filename = f"{entite_id}_{file.filename}"
-        filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
-
-        doc = DocumentJoint(
-            entite_id=entite_id,
-            type_document=TypeDocumentEnum.rapport_audit,
-            nom_fichier=file.filename,
-            chemin_fichier=filepath,
-            taille=os.path.getsize(filepath),
-            mime_type=file.content_type,
-        )
+        blob = DocumentService.store_upload(file)
+        doc = DocumentJoint(entite_id=entite_id, type_document=TypeDocumentEnum.rapport_audit)
+        DocumentService.apply_blob(doc, blob, file)
         db.session.add(doc)
         db.session.commit()
         return doc
 
     @staticmethod
-    def get_panier(agent_id, role=None):
-        """Récupérer le panier de l'agent (spec §5).
+    def get_panier(agent_id, role=None, cursor=None, limit=None):
+        """Récupérer le panier de l'agent (spec §5), paginé par curseur.
         - Editeur : seulement les entités assignées + créées par lui (pas brouillons).
         - Admin / Super Admin : toutes les assignations + nouveaux enregistrements.
+
+        Tri (échéance, id), échéances absentes en dernier : l'ordre de l'index
+        ix_assign_agent_echeance_id, parcouru sans tri ni OFFSET. Entité, agent
+        et validateur sont chargés dans la même requête.
+
+        Returns:
+            dict {items, next_cursor, has_next, limit}
+        Raises:
+            ValueError: curseur invalide
         """
-        from sqlalchemy import or_
+        from sqlalchemy import and_, or_
+        from sqlalchemy.orm import contains_eager
+        limit = page_limit(limit)
+
         # Assignations directes de l'agent
         query = AssignationDemande.query.filter(
             AssignationDemande.agent_id == agent_id
@@ -562,18 +585,43 @@ class AdminService:
         query = query.join(EntiteBase, AssignationDemande.entite_id == EntiteBase.id).join(
             EntiteWorkflow, EntiteBase.id == EntiteWorkflow.entite_id
         ).filter(
-            or_(
-                EntiteWorkflow.statut == StatutWorkflowEnum.soumis,
-                EntiteWorkflow.statut == StatutWorkflowEnum.en_verification,
-                EntiteWorkflow.statut == StatutWorkflowEnum.en_attente_complements,
-                EntiteWorkflow.statut == StatutWorkflowEnum.conforme,
-                EntiteWorkflow.statut == StatutWorkflowEnum.conforme_sous_reserve,
-                EntiteWorkflow.statut == StatutWorkflowEnum.valide,
-                EntiteWorkflow.statut == StatutWorkflowEnum.publie,
-            )
+            EntiteWorkflow.statut.in_(PANIER_STATUTS)
+        ).options(
+            contains_eager(AssignationDemande.entite),
+            joinedload(AssignationDemande.agent),
+            joinedload(AssignationDemande.validateur),
         )
-        assignations = query.order_by(AssignationDemande.echeance.asc()).all()
-        return AssignationOutputSchema(many=True).dump(assignations)
+
+        if cursor:
+            echeance, last_id = decode_cursor(cursor, 2)
+            if echeance is None:
+                query = query.filter(
+                    AssignationDemande.echeance.is_(None), AssignationDemande.id > last_id
+                )
+            else:
+                try:
+                    echeance = date.fromisoformat(echeance)
+                except (TypeError, ValueError):
+                    raise ValueError('Curseur de pagination invalide.')
+                query = query.filter(or_(
+                    AssignationDemande.echeance > echeance,
+                    and_(AssignationDemande.echeance == echeance,
+                         AssignationDemande.id > last_id),
+                    AssignationDemande.echeance.is_(None),
+                ))
+
+        rows = query.order_by(
+            AssignationDemande.echeance.asc().nulls_last(), AssignationDemande.id.asc()
+        ).limit(limit + 1).all()
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].echeance, rows[-1].id) if has_next else None
+        return {
+            'items': serializer_for(AssignationOutputSchema).dump(rows, many=True),
+            'next_cursor': next_cursor,
+            'has_next': has_next,
+            'limit': limit,
+        }
 
     @staticmethod
     def add_feedback(agent_id, data):
@@ -609,8 +657,9 @@ class AdminService:
     @staticmethod
     def list_users(page=None, per_page=None):
         """Liste paginée des utilisateurs ARTCI."""
-        query = User.query.order_by(User.createdAt.desc())
-        return paginate(query, UserOutputSchema(), page=page, per_page=per_page)
+        # Projection sur les colonnes du schéma : lignes légères, sans objets ORM
+        query = db.session.query(*columns_for(User, UserOutputSchema)).order_by(User.createdAt.desc())
+        return paginate(query, UserOutputSchema, page=page, per_page=per_page)
 
     @staticmethod
     def create_user(data):
@@ -885,15 +934,16 @@ class AdminService:
             if filters.get('modifie_par'):
                 query = query.filter_by(modifie_par=filters['modifie_par'])
 
-        return paginate(query, HistoriqueStatutOutputSchema(), page=page, per_page=per_page)
+        query = query.options(
+            joinedload(HistoriqueStatut.entite), joinedload(HistoriqueStatut.modifie_par_user)
+        )
+        return paginate(query, HistoriqueStatutOutputSchema, page=page, per_page=per_page)
 
     # --- Formalités (Renouvellements + Autorisations + Déclarations) ---
 
     @staticmethod
     def list_renouvellements(filters=None, page=None, per_page=None):
         """Liste paginée des demandes de renouvellement."""
-        from marshmallow import Schema, fields as ma_fields
-
         query = Renouvellement.query.order_by(Renouvellement.createdAt.desc())
         if filters:
             if filters.get('statut'):
@@ -904,31 +954,8 @@ class AdminService:
                     EntiteBase.denomination.ilike(search)
                 )
 
-        class RenouvellementOutputSchema(Schema):
-            id = ma_fields.String()
-            entite_id = ma_fields.String()
-            entreprise_denomination = ma_fields.Method('get_denomination')
-            date_expiration = ma_fields.Method('get_date_expiration')
-            motif = ma_fields.String()
-            statut = ma_fields.Method('get_statut')
-            commentaire = ma_fields.String()
-            traite_par = ma_fields.String()
-            createdAt = ma_fields.DateTime()
-
-            def get_denomination(self, obj):
-                if obj.entite:
-                    return obj.entite.denomination
-                return ''
-
-            def get_date_expiration(self, obj):
-                if obj.date_expiration_agrement:
-                    return obj.date_expiration_agrement.isoformat()
-                return None
-
-            def get_statut(self, obj):
-                return obj.statut.value if obj.statut else None
-
-        return paginate(query, RenouvellementOutputSchema(), page=page, per_page=per_page)
+        query = query.options(joinedload(Renouvellement.entite))
+        return paginate(query, RenouvellementListOutputSchema, page=page, per_page=per_page)
 
     @staticmethod
     def traiter_renouvellement(renouvellement_id, user_id, data):
@@ -956,7 +983,6 @@ class AdminService:
     @staticmethod
     def list_rapports(filters=None, page=None, per_page=None):
         """Liste paginée des rapports d'activité et d'audit déposés."""
-        from marshmallow import Schema, fields as ma_fields
         from app.models import EntiteBase as _EB
 
         # Inclure rapports d'activite ET rapports d'audit
@@ -979,30 +1005,8 @@ class AdminService:
 
         query = query.order_by(DocumentJoint.uploadedAt.desc())
 
-        class RapportOutputSchema(Schema):
-            id = ma_fields.String()
-            entite_id = ma_fields.String()
-            entreprise_denomination = ma_fields.Method('get_denomination')
-            type_document = ma_fields.Method('get_type_document')
-            nom_fichier = ma_fields.String()
-            date_soumission = ma_fields.DateTime(attribute='uploadedAt')
-            statut = ma_fields.Method('get_statut')
-            createdAt = ma_fields.DateTime(attribute='uploadedAt')
-
-            def get_denomination(self, obj):
-                if obj.entite:
-                    return obj.entite.denomination
-                return ''
-
-            def get_type_document(self, obj):
-                return obj.type_document.value if obj.type_document else None
-
-            def get_statut(self, obj):
-                # Pas de table de validation des rapports : on considere "en_attente"
-                # tant qu'un mecanisme de validation n'est pas implemente.
-                return 'en_attente'
-
-        return paginate(query, RapportOutputSchema(), page=page, per_page=per_page)
+        query = query.options(joinedload(DocumentJoint.entite))
+        return paginate(query, RapportOutputSchema, page=page, per_page=per_page)
 
     @staticmethod
     def traiter_rapport(document_id, user_id, data):
@@ -1023,50 +1027,23 @@ class AdminService:
     @staticmethod
     def list_notifications(user_id, filters=None):
         """Notifications du user connecté."""
-        query = Notification.query.filter_by(
-            destinataire_id=user_id, destinataire_type='artci'
-        ).order_by(Notification.createdAt.desc())
-
-        if filters:
-            if filters.get('type'):
-                query = query.filter_by(type=filters['type'])
-            if filters.get('lue') is not None:
-                lue_val = filters['lue']
-                if isinstance(lue_val, str):
-                    lue_val = lue_val.lower() == 'true'
-                query = query.filter_by(lue=lue_val)
-
-        notifications = query.limit(100).all()
-        return [
-            {
-                'id': n.id,
-                'type': n.type,
-                'titre': n.titre,
-                'message': n.message,
-                'lue': n.lue,
-                'entite_id': n.entite_id,
-                'createdAt': n.createdAt.isoformat() if n.createdAt else None,
-            }
-            for n in notifications
-        ]
+        from app.services.notification_service import NotificationService
+        return NotificationService.lister('artci', user_id, filters=filters)
 
     @staticmethod
     def mark_notification_read(notification_id, user_id):
         """Marquer une notification comme lue."""
-        notification = Notification.query.get(notification_id)
-        if not notification:
-            raise ValueError('Notification non trouvée.')
-        if notification.destinataire_id != user_id:
-            raise ValueError('Notification non autorisée.')
-        notification.lue = True
-        db.session.commit()
+        from app.services.notification_service import NotificationService
+        NotificationService.marquer_lue(notification_id, user_id)
 
     # --- Feedbacks listing ---
 
     @staticmethod
     def list_feedbacks(page=None, per_page=None):
         """Liste paginée de tous les feedbacks de vérification."""
-        query = FeedbackVerification.query.order_by(
+        query = FeedbackVerification.query.options(
+            joinedload(FeedbackVerification.agent)
+        ).order_by(
             FeedbackVerification.createdAt.desc()
         )
-        return paginate(query, FeedbackOutputSchema(), page=page, per_page=per_page)
+        return paginate(query, FeedbackOutputSchema, page=page, per_page=per_page)
@@ -0,0 +1,345 @@
+"""
+Service aperçus des documents ARTCI DCP : miniature de la première page
+(images, PDF) et texte extrait (PDF, DOCX), pour que l'écran de traitement
+d'un dossier affiche des aperçus légers au lieu de télécharger chaque pièce.
+
+Pipeline :
+- au téléversement, DocumentService.apply_blob appelle ApercuService.planifier :
+  une ligne apercus_documents 'en_attente' est créée dans la transaction ;
+- après le commit, la génération est confiée à un pool de threads du worker
+  (APERCUS_ASYNC) ; la tâche planifiée 'apercus' reprend ce qui n'a pas abouti
+  (redémarrage, échec temporaire) et les documents antérieurs.
+
+Dépendances : Pillow et PyMuPDF (miniature + texte PDF) ; à défaut de
+PyMuPDF (plateforme sans roue binaire), pypdf fournit le texte seul.
+"""
+import io
+import re
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+from flask import current_app
+from sqlalchemy import event, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models import ApercuDocument, DocumentJoint
+from app.utils.db_timeouts import disable_statement_timeout
+from app.utils.storage import get_storage, preview_key
+
+IMAGE_TYPES = {'png', 'jpg', 'jpeg'}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_BLANKS = re.compile(r'[ \t\r\f\v]+')
+_BLANK_LINES = re.compile(r'\n\s*\n+')
+
+
+def _type_fichier(doc):
+    """Extension normalisée (d'après le nom, à défaut le type MIME)."""
+    nom = (doc.nom_fichier or '').rsplit('.', 1)
+    if len(nom) == 2:
+        return nom[1].lower()
+    mime = (doc.mime_type or '').lower()
+    if mime == 'application/pdf':
+        return 'pdf'
+    if mime.startswith('image/'):
+        return mime.split('/', 1)[1]
+    return ''
+
+
+def _normaliser_texte(texte, texte_max):
+    texte = _BLANK_LINES.sub('\n\n', _BLANKS.sub(' ', texte or '')).strip()
+    return texte[:texte_max] or None
+
+
+def _jpeg(img, taille):
+    """Réduire une image PIL et l'encoder en JPEG ; retourne (octets, (l, h))."""
+    img.thumbnail((taille, taille))
+    if img.mode not in ('RGB', 'L'):
+        img = img.convert('RGB')
+    out = io.BytesIO()
+    img.save(out, 'JPEG', quality=80, optimize=True)
+    return out.getvalue(), img.size
+
+
+def _apercu_image(data, taille):
+    from PIL import Image, ImageOps
+    with Image.open(io.BytesIO(data)) as img:
+        # JPEG : décodage directement à l'échelle réduite
+        img.draft('RGB', (taille, taille))
+        img = ImageOps.exif_transpose(img)
+        miniature, dimensions = _jpeg(img, taille)
+    return {'miniature': miniature, 'dimensions': dimensions, 'pages': 1, 'texte': None}
+
+
+def _apercu_pdf(data, taille, texte_max):
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        fitz = None
+
+    if fitz is not None:
+        from PIL import Image
+        with fitz.open(stream=data, filetype='pdf') as pdf:
+            page = pdf.load_page(0)
+            zoom = taille / max(page.rect.width, page.rect.height, 1)
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            img = Image.frombytes('RGB', (pix.width, pix.height), pix.samples)
+            miniature, dimensions = _jpeg(img, taille)
+            morceaux, longueur = [], 0
+            for p in pdf:
+                if longueur >= texte_max:
+                    break
+                t = p.get_text()
+                morceaux.append(t)
+                longueur += len(t)
+            return {'miniature': miniature, 'dimensions': dimensions,
+                    'pages': pdf.page_count, 'texte': '\n'.join(morceaux)}
+
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return None
+    reader = PdfReader(io.BytesIO(data))
+    morceaux, longueur = [], 0
+    for p in reader.pages:
+        if longueur >= texte_max:
+            break
+        t = p.extract_text() or ''
+        morceaux.append(t)
+        longueur += len(t)
+    return {'miniature': None, 'dimensions': None,
+            'pages': len(reader.pages), 'texte': '\n'.join(morceaux)}
+
+
+def _apercu_docx(data, texte_max):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        with archive.open('word/document.xml') as xml:
+            paragraphes, courant, longueur = [], [], 0
+            for _, elem in ElementTree.iterparse(xml):
+                if elem.tag == f'{_WORD_NS}t' and elem.text:
+                    courant.append(elem.text)
+                elif elem.tag == f'{_WORD_NS}p':
+                    ligne = ''.join(courant)
+                    paragraphes.append(ligne)
+                    longueur += len(ligne)
+                    courant = []
+                    elem.clear()
+                    if longueur >= texte_max:
+                        break
+    return {'miniature': None, 'dimensions': None, 'pages': None,
+            'texte': '\n'.join(paragraphes)}
+
+
+def _generer_en_tache(app, sha256):
+    with app.app_context():
+        try:
+            ApercuService.generer(sha256)
+        except Exception:
+            app.logger.exception(f'Aperçu {sha256} en échec')
+        finally:
+            db.session.remove()
+
+
+def _get_executor(max_workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='apercus')
+        return _executor
+
+
+class ApercuService:
+
+    @staticmethod
+    def planifier(sha256):
+        """
+        Demander l'aperçu d'un contenu (sans effet s'il existe déjà).
+        Ne valide pas la transaction ; la génération démarre après son commit.
+        """
+        if not sha256:
+            return
+        db.session.execute(
+            pg_insert(ApercuDocument.__table__)
+            .values(sha256=sha256, statut='en_attente', tentatives=0)
+            .on_conflict_do_nothing(index_elements=['sha256'])
+        )
+        db.session.info.setdefault('_apercus_planifies', set()).add(sha256)
+
+    @staticmethod
+    def generer(sha256):
+        """
+        Générer miniature et texte d'un contenu en attente.
+        Returns ApercuDocument, ou None si rien à faire (déjà traité / pris ailleurs).
+        """
+        config = current_app.config
+        apercu = (
+            ApercuDocument.query
+            .filter_by(sha256=sha256, statut='en_attente')
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if apercu is None:
+            db.session.rollback()
+            return None
+        doc = DocumentJoint.query.filter_by(sha256=sha256).first()
+        if doc is None:
+            # Plus aucun document ne référence ce contenu
+            db.session.delete(apercu)
+            db.session.commit()
+            return None
+
+        apercu.tentatives += 1
+        taille = config.get('APERCU_TAILLE', 320)
+        texte_max = config.get('APERCU_TEXTE_MAX', 20000)
+        try:
+            resultat = ApercuService._extraire(doc, taille, texte_max)
+        except Exception as e:
+            epuise = apercu.tentatives >= config.get('APERCU_MAX_TENTATIVES', 3)
+            apercu.statut = 'echec' if epuise else 'en_attente'
+            apercu.erreur = str(e)[:2000]
+            db.session.commit()
+            return apercu
+
+        if resultat is None:
+            apercu.statut = 'non_supporte'
+            db.session.commit()
+            return apercu
+
+        if resultat['miniature']:
+            key = preview_key(sha256)
+            get_storage().put(key, resultat['miniature'])
+            apercu.miniature = key
+            apercu.largeur, apercu.hauteur = resultat['dimensions']
+        apercu.pages = resultat['pages']
+        apercu.texte = _normaliser_texte(resultat['texte'], texte_max)
+        apercu.statut = 'pret'
+        apercu.erreur = None
+        db.session.commit()
+        return apercu
+
+    @staticmethod
+    def _extraire(doc, taille, texte_max):
+        """dict {miniature, dimensions, pages, texte}, ou None si type non géré."""
+        from app.services.document_service import DocumentService
+        kind = _type_fichier(doc)
+        if kind not in IMAGE_TYPES | {'pdf', 'docx'}:
+            return None
+        max_octets = current_app.config.get('APERCU_MAX_OCTETS', 20 * 1024 * 1024)
+        if doc.taille and doc.taille > max_octets:
+            return None
+        with DocumentService.open(doc) as f:
+            data = f.read(max_octets + 1)
+        if len(data) > max_octets:
+            return None
+
+        if kind in IMAGE_TYPES:
+            return _apercu_image(data, taille)
+        if kind == 'pdf':
+            return _apercu_pdf(data, taille, texte_max)
+        return _apercu_docx(data, texte_max)
+
+    @staticmethod
+    def rattraper():
+        """Mettre en attente les contenus sans aperçu (documents antérieurs)."""
+        sans_apercu = (
+            select(DocumentJoint.sha256).distinct()
+            .where(DocumentJoint.sha256.isnot(None))
+            .where(~select(ApercuDocument.sha256)
+                   .where(ApercuDocument.sha256 == DocumentJoint.sha256).exists())
+        )
+        stmt = pg_insert(ApercuDocument.__table__).from_select(['sha256'], sans_apercu)
+        # INSERT … SELECT sur tous les documents : pas de statement_timeout
+        disable_statement_timeout(db.session)
+        result = db.session.execute(stmt.on_conflict_do_nothing(index_elements=['sha256']))
+        db.session.commit()
+        return result.rowcount
+
+    @staticmethod
+    def traiter_en_attente(limit=200):
+        """Générer les aperçus en attente (tâche planifiée) ; retourne les compteurs."""
+        ajoutes = ApercuService.rattraper()
+        shas = db.session.scalars(
+            select(ApercuDocument.sha256)
+            .where(ApercuDocument.statut == 'en_attente')
+            .order_by(ApercuDocument.createdAt)
+            .limit(limit)
+        ).all()
+        db.session.rollback()
+        compteurs = {'rattrapes': ajoutes, 'pret': 0, 'non_supporte': 0, 'echec': 0, 'en_attente': 0}
+        for sha256 in shas:
+            apercu = ApercuService.generer(sha256)
+            if apercu is not None:
+                compteurs[apercu.statut] += 1
+        return compteurs
+
+    @staticmethod
+    def relancer(statuts=('echec', 'non_supporte')):
+        """Remettre en attente (ex. après installation de PyMuPDF)."""
+        count = ApercuDocument.query.filter(ApercuDocument.statut.in_(statuts)).update(
+            {'statut': 'en_attente', 'tentatives': 0, 'erreur': None},
+            synchronize_session=False
+        )
+        db.session.commit()
+        return count
+
+    @staticmethod
+    def par_sha(shas):
+        """{sha256: ApercuDocument} en une requête."""
+        shas = {s for s in shas if s}
+        if not shas:
+            return {}
+        rows = ApercuDocument.query.filter(ApercuDocument.sha256.in_(shas)).all()
+        return {a.sha256: a for a in rows}
+
+    @staticmethod
+    def serialize_documents(documents, extrait=300):
+        """Documents d'un dossier avec leur aperçu (sans le texte complet)."""
+        documents = list(documents)
+        apercus = ApercuService.par_sha(d.sha256 for d in documents)
+        result = []
+        for doc in documents:
+            apercu = apercus.get(doc.sha256)
+            result.append({
+                'id': doc.id,
+                'type_document': doc.type_document.value,
+                'nom_fichier': doc.nom_fichier,
+                'taille': doc.taille,
+                'mime_type': doc.mime_type,
+                'uploadedAt': doc.uploadedAt.isoformat() if doc.uploadedAt else None,
+                'apercu': {
+                    'statut': apercu.statut,
+                    'miniature_url': (
+                        f'/api/admin/documents/{doc.id}/miniature' if apercu.miniature else None
+                    ),
+                    'largeur': apercu.largeur,
+                    'hauteur': apercu.hauteur,
+                    'pages': apercu.pages,
+                    'extrait': apercu.texte[:extrait] if apercu.texte else None,
+                } if apercu else None,
+            })
+        return result
+
+
+# ============================================================
+# Génération après commit (pool de threads du worker)
+# ============================================================
+
+@event.listens_for(Session, 'after_commit')
+def _lancer_planifies(session):
+    shas = session.info.pop('_apercus_planifies', None)
+    if not shas or not current_app.config.get('APERCUS_ASYNC', True):
+        return
+    app = current_app._get_current_object()
+    executor = _get_executor(app.config.get('APERCUS_WORKERS', 1))
+    for sha256 in shas:
+        executor.submit(_generer_en_tache, app, sha256)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _oublier_planifies(session, previous_transaction):
+    session.info.pop('_apercus_planifies', None)
@@ -75,21 +75,18 @@ class AuthService:
 
         # Notifier tous les admins+ via la table notifications (un par admin)
         try:
-            from app.models import Notification, User
-            from app.models.enums import RoleEnum
-            admins = User.query.filter(
-                User.role.in_([RoleEnum.admin, RoleEnum.super_admin, RoleEnum.editor])
-            ).all()
-            for u in admins:
-                n = Notification(
-                    destinataire_type='artci',
-                    destinataire_id=u.id,
-                    type='nouvelle_inscription',
-                    titre='Nouvelle inscription a verifier',
-                    message=f"{compte.denomination} (CC {compte.numero_cc}) - DG: {compte.dg_email}",
-                    lue=False,
+            from app.services.notification_service import NotificationService
+            admin_ids = db.session.execute(
+                db.select(User.id).where(
+                    User.role.in_([RoleEnum.admin, RoleEnum.super_admin, RoleEnum.editor])
                 )
-                db.session.add(n)
+            ).scalars().all()
+            NotificationService.notifier(
+                'artci', admin_ids,
+                type='nouvelle_inscription',
+                titre='Nouvelle inscription a verifier',
+                message=f"{compte.denomination} (CC {compte.numero_cc}) - DG: {compte.dg_email}",
+            )
             db.session.commit()
         except Exception:
             db.session.rollback()
@@ -239,8 +236,8 @@ class AuthService:
         if not compte:
             return  # Silencieux pour éviter l'énumération de comptes
 
-        otp = create_otp(compte.id, 'reset_password')
-        send_otp_email(email, otp.code, 'reset_password')
+        _, code = create_otp(compte.id, 'reset_password')
+        send_otp_email(email, code, 'reset_password')
 
     @staticmethod
     def reset_password(email, code, new_password):
@@ -0,0 +1,473 @@
+"""
+Service de sauvegarde de la base ARTCI DCP.
+
+Format : archive zip (deflate) contenant
+    manifest.json          -> type, dates, révision Alembic, lignes et sha256 par table
+    <table>.ndjson         -> une ligne JSON par enregistrement
+    <table>.ids.ndjson     -> (incrémental) clés primaires existantes, pour rejouer
+                              les suppressions à la restauration
+
+Chaque table est lue par curseur serveur (stream_results) et écrite au fil de
+l'eau : la mémoire consommée ne dépend pas de la taille de la base.
+Mode incrémental : seules les lignes dont updatedAt est postérieur à la borne
+de la sauvegarde de référence (moins BACKUP_INCREMENTAL_OVERLAP_SECONDS) sont
+exportées ; les tables sans updatedAt (dont les lignes peuvent être modifiées
+sans trace datée) sont exportées intégralement.
+
+updatedAt vaut now() du DÉBUT de la transaction qui écrit : une transaction
+ouverte avant l'instantané et validée après date ses lignes d'avant celui-ci.
+La borne est donc l'horloge de la base à l'instantané, ramenée au début de la
+plus ancienne transaction encore ouverte (pg_stat_activity) ; la marge couvre
+les sessions invisibles (autre rôle sans pg_read_all_stats) et les
+validations entre la prise d'instantané et la lecture de pg_stat_activity.
+"""
+import base64
+import enum
+import hashlib
+import json
+import os
+import time as _time
+import zipfile
+from datetime import datetime, date, time, timezone, timedelta
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import select, text
+from app.extensions import db
+from app.models.sauvegardes import Sauvegarde
+from app.models.enums import TypeSauvegardeEnum, StatutSauvegardeEnum
+from app.utils.db_timeouts import disable_statement_timeout
+
+
+MANIFEST_NAME = 'manifest.json'
+FORMAT_VERSION = 1
+
+# Tables jamais sauvegardées (caches reconstruits, codes OTP éphémères).
+# cache_versions est exclue pour qu'une restauration ne ramène pas une
+# version déjà servie dans des ETags (elle est incrémentée à la place).
+# sauvegardes (index des archives) et job_runs restent propres à l'instance.
+EXCLUDED_TABLES = frozenset({
+    'entite_detail_cache', 'cache_versions', 'otp_codes', 'alembic_version',
+    'sauvegardes', 'job_runs',
+})
+
+# Colonnes sensibles exclues sauf BACKUP_INCLUDE_SECRETS=True
+SECRET_COLUMNS = {
+    'users': ('password_hash',),
+    'comptes_entreprises': ('password_hash',),
+}
+
+# Colonne d'horodatage du mode incrémental. createdAt / uploadedAt ne
+# suffisent pas : une modification en place (notifications.lue, statut d'une
+# demande, document remplacé) ne les change pas.
+CHANGE_COLUMN = 'updatedAt'
+
+_WRITE_CHUNK = 1024 * 1024
+
+
+def _aware(value):
+    """Datetime avec fuseau (SQLite rend des valeurs naïves, en UTC)."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def backup_tables():
+    """Tables sauvegardées, triées selon les dépendances de clés étrangères."""
+    return [t for t in db.metadata.sorted_tables if t.name not in EXCLUDED_TABLES]
+
+
+def encode_value(value):
+    """Sérialiser une valeur de colonne en JSON (enums stockés par NOM en base)."""
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (bytes, memoryview)):
+        return base64.b64encode(bytes(value)).decode('ascii')
+    raise TypeError(f'Type non sérialisable : {type(value).__name__}')
+
+
+class _MemberWriter:
+    """Écriture bufferisée d'un membre de l'archive avec calcul du sha256."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+        self._buffer = []
+        self._buffered = 0
+
+    def write_line(self, obj):
+        line = json.dumps(obj, ensure_ascii=False, default=encode_value).encode('utf-8') + b'\n'
+        self._buffer.append(line)
+        self._buffered += len(line)
+        if self._buffered >= _WRITE_CHUNK:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        data = b''.join(self._buffer)
+        self.sha256.update(data)
+        self.size += len(data)
+        self.stream.write(data)
+        self._buffer = []
+        self._buffered = 0
+
+
+class BackupService:
+
+    @staticmethod
+    def backup_dir():
+        d = current_app.config.get('BACKUP_FOLDER') or os.path.join(
+            current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'backups'
+        )
+        os.makedirs(d, exist_ok=True)
+        return d
+
+    @staticmethod
+    def read_manifest(filepath):
+        """Lire le manifest d'une archive de sauvegarde."""
+        with zipfile.ZipFile(filepath) as zf:
+            return json.loads(zf.read(MANIFEST_NAME))
+
+    @staticmethod
+    def reference_backup():
+        """Dernière sauvegarde réussie (référence du mode incrémental), ou None."""
+        return Sauvegarde.query.filter(
+            Sauvegarde.statut == StatutSauvegardeEnum.termine
+        ).order_by(Sauvegarde.createdAt.desc()).first()
+
+    @staticmethod
+    def incremental_since(reference):
+        """Borne inférieure du filtre updatedAt pour une incrémentale sur `reference`."""
+        overlap = current_app.config.get('BACKUP_INCREMENTAL_OVERLAP_SECONDS', 300)
+        return (reference.borne or reference.createdAt) - timedelta(seconds=overlap)
+
+    @staticmethod
+    def _snapshot_clock(conn):
+        """
+        (instant, borne) de l'instantané, à lire en PREMIÈRE instruction de la
+        transaction : now(), et le début de la plus ancienne transaction encore
+        ouverte s'il est antérieur.
+        """
+        if conn.dialect.name != 'postgresql':
+            now = datetime.now(timezone.utc)
+            return now, now
+        return tuple(conn.execute(text(
+            'SELECT now(), LEAST(now(), (SELECT min(xact_start) FROM pg_stat_activity '
+            'WHERE datname = current_database() AND pid <> pg_backend_pid()))'
+        )).one())
+
+    @staticmethod
+    def _base_state(reference):
+        """
+        Référence d'une incrémentale : nom, borne, instant de l'instantané et
+        lignes par table de la sauvegarde de base (lues dans son manifest),
+        contrôlées avant de l'appliquer (RestoreService._check_base).
+        """
+        state = {
+            'filename': reference.filename,
+            'boundary': (reference.borne or reference.createdAt).isoformat(),
+            'snapshot_at': None,
+            'rows': {},
+        }
+        try:
+            base = BackupService.read_manifest(os.path.join(BackupService.backup_dir(), reference.filename))
+        except (OSError, zipfile.BadZipFile, KeyError, ValueError):
+            return state
+        state['snapshot_at'] = base.get('snapshot_at')
+        for name, entry in base['tables'].items():
+            if entry['mode'] == 'full':
+                state['rows'][name] = entry['rows']
+            elif entry.get('ids'):
+                state['rows'][name] = entry['ids']['rows']
+        return state
+
+    @staticmethod
+    def _alembic_revision(conn):
+        try:
+            return conn.execute(text('SELECT version_num FROM alembic_version')).scalar()
+        except Exception:
+            return None
+
+    @staticmethod
+    def _dump_table(conn, zf, table, since, include_secrets, batch_size):
+        """Écrire une table dans l'archive ; retourne son entrée de manifest."""
+        excluded = () if include_secrets else SECRET_COLUMNS.get(table.name, ())
+        columns = [c for c in table.columns if c.name not in excluded]
+        change_col = table.c.get(CHANGE_COLUMN)
+
+        stmt = select(*columns)
+        mode = 'full'
+        if since is not None and change_col is not None:
+            stmt = stmt.where(change_col > since)
+            mode = 'incremental'
+        pk_cols = list(table.primary_key.columns)
+        if pk_cols:
+            stmt = stmt.order_by(*pk_cols)
+
+        names = [c.name for c in columns]
+        rows = 0
+        with zf.open(f'{table.name}.ndjson', 'w', force_zip64=True) as member:
+            writer = _MemberWriter(member)
+            result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(stmt)
+            for partition in result.partitions(batch_size):
+                for row in partition:
+                    writer.write_line(dict(zip(names, row)))
+                rows += len(partition)
+            writer.flush()
+
+        entry = {
+            'rows': rows,
+            'sha256': writer.sha256.hexdigest(),
+            'bytes': writer.size,
+            'mode': mode,
+            'change_column': change_col.name if mode == 'incremental' else None,
+            'columns': names,
+            'primary_key': [c.name for c in pk_cols],
+        }
+
+        # Incrémental : liste des clés encore présentes (suppressions à rejouer)
+        if mode == 'incremental' and pk_cols:
+            ids_rows = 0
+            with zf.open(f'{table.name}.ids.ndjson', 'w', force_zip64=True) as member:
+                writer = _MemberWriter(member)
+                result = conn.execution_options(stream_results=True, max_row_buffer=batch_size).execute(
+                    select(*pk_cols).order_by(*pk_cols)
+                )
+                for partition in result.partitions(batch_size):
+                    for row in partition:
+                        writer.write_line(list(row))
+                    ids_rows += len(partition)
+                writer.flush()
+            entry['ids'] = {'rows': ids_rows, 'sha256': writer.sha256.hexdigest()}
+
+        return entry
+
+    @staticmethod
+    def create_backup(user_id=None, incremental=False, planifie=False):
+        """
+        Créer une archive de sauvegarde (complète ou incrémentale).
+        La sauvegarde est indexée dans `sauvegardes` dès son lancement
+        (en_cours), puis marquée termine ou echec avec ses métriques.
+        Returns dict {filename, filepath, taille_octets, sha256, manifest, sauvegarde}.
+        """
+        started_at = datetime.now(timezone.utc)
+        started = _time.monotonic()
+        reference = BackupService.reference_backup() if incremental else None
+        if incremental and reference is None:
+            # Aucune sauvegarde de référence : on bascule en complet
+            incremental = False
+        since = BackupService.incremental_since(reference) if incremental else None
+
+        include_secrets = current_app.config.get('BACKUP_INCLUDE_SECRETS', False)
+        batch_size = current_app.config.get('BACKUP_BATCH_SIZE', 1000)
+        suffix = '_incr' if incremental else ''
+        filename = f"backup_{started_at.strftime('%Y%m%d_%H%M%S')}{suffix}.zip"
+        filepath = os.path.join(BackupService.backup_dir(), filename)
+        partial = filepath + '.partial'
+
+        if incremental:
+            type_sauvegarde = TypeSauvegardeEnum.incremental
+        elif planifie:
+            type_sauvegarde = TypeSauvegardeEnum.planifie
+        else:
+            type_sauvegarde = TypeSauvegardeEnum.manuel
+        sauvegarde = Sauvegarde(
+            filename=filename, type=type_sauvegarde,
+            statut=StatutSauvegardeEnum.en_cours, depuis=since,
+            base_id=reference.id if incremental else None,
+            created_by=user_id, createdAt=started_at,
+        )
+        db.session.add(sauvegarde)
+        db.session.commit()
+
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'type': 'incremental' if incremental else 'full',
+            'since': since.isoformat() if since else None,
+            'base': BackupService._base_state(reference) if incremental else None,
+            'started_at': started_at.isoformat(),
+            'created_by': user_id,
+            'include_secrets': include_secrets,
+            'tables': {},
+        }
+        try:
+            # Une seule transaction REPEATABLE READ : instantané cohérent de toutes les tables
+            with db.engine.connect() as conn, \
+                    zipfile.ZipFile(partial, 'w', compression=zipfile.ZIP_DEFLATED,
+                                    compresslevel=6) as zf:
+                if conn.dialect.name == 'postgresql':
+                    conn = conn.execution_options(isolation_level='REPEATABLE READ')
+                with conn.begin():
+                    snapshot_at, boundary = BackupService._snapshot_clock(conn)
+                    manifest['snapshot_at'] = snapshot_at.isoformat()
+                    manifest['boundary'] = boundary.isoformat()
+                    # Export potentiellement long : pas de statement_timeout
+                    disable_statement_timeout(conn)
+                    manifest['alembic_revision'] = BackupService._alembic_revision(conn)
+                    for table in backup_tables():
+                        manifest['tables'][table.name] = BackupService._dump_table(
+                            conn, zf, table, since, include_secrets, batch_size
+                        )
+                manifest['finished_at'] = datetime.now(timezone.utc).isoformat()
+                zf.writestr(MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+            os.replace(partial, filepath)
+
+            sha256 = hashlib.sha256()
+            with open(filepath, 'rb') as f:
+                for chunk in iter(lambda: f.read(_WRITE_CHUNK), b''):
+                    sha256.update(chunk)
+        except Exception as e:
+            if os.path.exists(partial):
+                os.remove(partial)
+            db.session.rollback()
+            sauvegarde.statut = StatutSauvegardeEnum.echec
+            sauvegarde.erreur = str(e)[:2000]
+            sauvegarde.duree_secondes = round(_time.monotonic() - started, 2)
+            sauvegarde.termine_le = datetime.now(timezone.utc)
+            db.session.commit()
+            raise
+
+        lignes = {name: t['rows'] for name, t in manifest['tables'].items()}
+        sauvegarde.statut = StatutSauvegardeEnum.termine
+        sauvegarde.borne = datetime.fromisoformat(manifest['boundary'])
+        sauvegarde.taille_octets = os.path.getsize(filepath)
+        sauvegarde.lignes_par_table = lignes
+        sauvegarde.total_lignes = sum(lignes.values())
+        sauvegarde.sha256 = sha256.hexdigest()
+        sauvegarde.duree_secondes = round(_time.monotonic() - started, 2)
+        sauvegarde.termine_le = datetime.now(timezone.utc)
+        db.session.commit()
+
+        return {
+            'filename': filename,
+            'filepath': filepath,
+            'taille_octets': sauvegarde.taille_octets,
+            'sha256': sauvegarde.sha256,
+            'manifest': manifest,
+            'sauvegarde': sauvegarde,
+        }
+
+    @staticmethod
+    def _chains(sauvegardes):
+        """
+        Regrouper les sauvegardes réussies (triées par date) en chaînes : une
+        complète suivie des incrémentales qui en dépendent (base_id, ou à
+        défaut la chaîne courante). Une incrémentale dont la base a disparu
+        forme une chaîne sans complète, déjà irrestaurable.
+        """
+        chains = []
+        chain_of = {}
+        for s in sauvegardes:
+            if s.type != TypeSauvegardeEnum.incremental:
+                chain = [s]
+                chains.append(chain)
+            elif s.base_id in chain_of:
+                chain = chain_of[s.base_id]
+                chain.append(s)
+            elif s.base_id is None and chains:
+                chain = chains[-1]
+                chain.append(s)
+            else:
+                chain = [s]
+                chains.append(chain)
+            chain_of[s.id] = chain
+        return chains
+
+    @staticmethod
+    def apply_retention(retention_days=None, min_keep=None, dry_run=False):
+        """
+        Politique de rétention, par chaîne entière (complète + incrémentales) :
+        une chaîne est supprimée (fichiers + index) si sa sauvegarde la plus
+        récente date d'avant BACKUP_RETENTION_DAYS, hors les
+        BACKUP_RETENTION_MIN_KEEP dernières chaînes complètes. La base d'une
+        incrémentale conservée n'est donc jamais supprimée. Les échecs sont
+        supprimés passé le délai ; les sauvegardes restées en_cours au-delà
+        d'un jour sont marquées echec.
+        Returns liste des fichiers supprimés.
+        """
+        if retention_days is None:
+            retention_days = current_app.config.get('BACKUP_RETENTION_DAYS', 30)
+        if min_keep is None:
+            min_keep = current_app.config.get('BACKUP_RETENTION_MIN_KEEP', 5)
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=retention_days)
+
+        # Processus interrompus (redémarrage, OOM) : statut bloqué en_cours
+        stale = Sauvegarde.query.filter(
+            Sauvegarde.statut == StatutSauvegardeEnum.en_cours,
+            Sauvegarde.createdAt < now - timedelta(days=1)
+        )
+        if not dry_run:
+            stale.update({
+                'statut': StatutSauvegardeEnum.echec,
+                'erreur': 'Sauvegarde interrompue.',
+                'termine_le': now,
+            }, synchronize_session=False)
+
+        to_delete = Sauvegarde.query.filter(
+            Sauvegarde.statut == StatutSauvegardeEnum.echec,
+            Sauvegarde.createdAt < cutoff,
+        ).all()
+
+        chains = BackupService._chains(Sauvegarde.query.filter(
+            Sauvegarde.statut == StatutSauvegardeEnum.termine
+        ).order_by(Sauvegarde.createdAt.asc()))
+        complete = [c for c in chains if c[0].type != TypeSauvegardeEnum.incremental]
+        kept = {id(c) for c in complete[-min_keep:]} if min_keep > 0 else set()
+        for chain in chains:
+            if id(chain) not in kept and _aware(chain[-1].createdAt) < cutoff:
+                to_delete.extend(chain)
+
+        d = BackupService.backup_dir()
+        removed = []
+        for sauvegarde in sorted(to_delete, key=lambda s: _aware(s.createdAt)):
+            removed.append(sauvegarde.filename)
+            if dry_run:
+                continue
+            path = os.path.join(d, sauvegarde.filename)
+            if os.path.exists(path):
+                os.remove(path)
+            db.session.delete(sauvegarde)
+        db.session.commit()
+        return removed
+
+    @staticmethod
+    def reindex():
+        """Indexer les archives présentes sur disque mais absentes de la table."""
+        d = BackupService.backup_dir()
+        known = {f for (f,) in db.session.query(Sauvegarde.filename)}
+        added = []
+        for filename in sorted(os.listdir(d)):
+            path = os.path.join(d, filename)
+            if (filename in known or not filename.startswith('backup_')
+                    or filename.endswith('.partial') or not os.path.isfile(path)):
+                continue
+            stat = os.stat(path)
+            sauvegarde = Sauvegarde(
+                filename=filename,
+                type=(TypeSauvegardeEnum.incremental if filename.endswith('_incr.zip')
+                      else TypeSauvegardeEnum.manuel),
+                statut=StatutSauvegardeEnum.termine,
+                taille_octets=stat.st_size,
+                createdAt=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+                termine_le=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            )
+            if filename.endswith('.zip'):
+                try:
+                    manifest = BackupService.read_manifest(path)
+                    lignes = {n: t['rows'] for n, t in manifest['tables'].items()}
+                    sauvegarde.lignes_par_table = lignes
+                    sauvegarde.total_lignes = sum(lignes.values())
+                    sauvegarde.createdAt = datetime.fromisoformat(manifest['started_at'])
+                    if manifest.get('boundary'):
+                        sauvegarde.borne = datetime.fromisoformat(manifest['boundary'])
+                except (zipfile.BadZipFile, KeyError, ValueError):
+                    sauvegarde.statut = StatutSauvegardeEnum.echec
+                    sauvegarde.erreur = 'Archive illisible.'
+            db.session.add(sauvegarde)
+            added.append(filename)
+        db.session.commit()
+        return added
@@ -0,0 +1,179 @@
+"""
+Cache des fiches entités sérialisées pour ARTCI DCP.
+Une fiche complète coûte une douzaine de requêtes (relations lazy='dynamic') ;
+une fois sérialisée elle est servie par une seule lecture de entite_detail_cache.
+
+Invalidation automatique : tout flush qui crée / modifie / supprime l'entité
+ou un objet portant son entite_id (enfants, workflow, documents, historique...)
+invalide ses fiches dans la même transaction : payload à NULL, generation + 1.
+
+Une fiche est construite hors verrou : si une invalidation est validée entre
+sa lecture et son écriture, l'écriture ne doit pas remettre l'ancienne
+version. L'écriture est donc conditionnelle à la génération lue (ligne
+absente : insertion seule, sans écraser une invalidation arrivée entre-temps).
+"""
+from datetime import datetime, timezone, timedelta
+from flask import current_app
+from sqlalchemy import event, delete
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models import EntiteBase
+from app.models.entite_detail_cache import EntiteDetailCache
+
+
+VUE_DETAIL = 'detail'
+VUE_PUBLIC = 'public'
+VUES = (VUE_DETAIL, VUE_PUBLIC)
+
+# Marqueur de session : la transaction en cours a écrit (flush, UPDATE/DELETE ORM)
+_ECRITURES = 'detail_cache_ecritures'
+
+
+def _insert(dialect):
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(EntiteDetailCache.__table__)
+
+
+class DetailCacheService:
+
+    @staticmethod
+    def get_or_build(entite_id, vue, builder):
+        """
+        Retourner la fiche `vue` de l'entité depuis le cache, ou la construire
+        via builder() et la mettre en cache. builder() peut retourner None
+        (entité absente ou non visible) : rien n'est alors mis en cache.
+        """
+        if not current_app.config.get('DETAIL_CACHE_ENABLED', True):
+            return builder()
+
+        ttl = current_app.config.get('DETAIL_CACHE_TTL', 3600)
+        row = db.session.get(EntiteDetailCache, (entite_id, vue))
+        generation = None
+        if row is not None:
+            if (row.payload is not None
+                    and row.createdAt >= datetime.now(timezone.utc) - timedelta(seconds=ttl)):
+                return row.payload
+            generation = row.generation
+            db.session.expunge(row)
+
+        payload = builder()
+        if payload is None:
+            return None
+
+        table = EntiteDetailCache.__table__
+        stmt = _insert(db.engine.dialect.name).values(
+            entite_id=entite_id, vue=vue, payload=payload, generation=0,
+            createdAt=datetime.now(timezone.utc)
+        )
+        if generation is None:
+            stmt = stmt.on_conflict_do_nothing(index_elements=['entite_id', 'vue'])
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['entite_id', 'vue'],
+                set_={'payload': stmt.excluded.payload, 'createdAt': stmt.excluded.createdAt},
+                where=table.c.generation == generation,
+            )
+        try:
+            DetailCacheService._ecrire(stmt)
+        except Exception as e:
+            # Le cache est facultatif : un échec d'écriture ne doit pas casser la lecture
+            current_app.logger.warning(f'Cache fiche {entite_id} non écrit : {e}')
+        return payload
+
+    @staticmethod
+    def _ecrire(stmt):
+        """
+        Écrire une fiche sans valider ni annuler la transaction de l'appelant.
+        - Session sans écriture en cours (lecture) : connexion dédiée, validée
+          aussitôt ; la session de l'appelant n'est pas touchée.
+        - Session avec écritures non validées : SAVEPOINT dans sa transaction ;
+          la fiche, construite sur ces données, n'est conservée que si
+          l'appelant valide (et une connexion séparée attendrait ses verrous).
+        """
+        session = db.session
+        if session.new or session.dirty or session.deleted or session.info.get(_ECRITURES):
+            with session.begin_nested():
+                session.execute(stmt)
+        else:
+            with db.engine.begin() as conn:
+                conn.execute(stmt)
+
+    @staticmethod
+    def invalidate(entite_ids, session=None):
+        """
+        Invalider les fiches en cache des entités données (une ligne par vue,
+        créée si absente, génération incrémentée).
+        À appeler après des UPDATE/DELETE en masse (hors unit of work).
+        """
+        if isinstance(entite_ids, str):
+            entite_ids = [entite_ids]
+        entite_ids = sorted(e for e in set(entite_ids) if e)
+        if not entite_ids:
+            return
+        connection = (session or db.session).connection()
+        table = EntiteDetailCache.__table__
+        now = datetime.now(timezone.utc)
+        stmt = _insert(connection.dialect.name).values([
+            {'entite_id': e, 'vue': vue, 'payload': None, 'generation': 1, 'createdAt': now}
+            for e in entite_ids for vue in VUES
+        ])
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=['entite_id', 'vue'],
+            set_={'payload': None, 'generation': table.c.generation + 1, 'createdAt': now},
+        ))
+
+    @staticmethod
+    def forget(entite_ids, session=None):
+        """Supprimer les lignes de cache d'entités supprimées (pas d'invalidation possible)."""
+        entite_ids = [e for e in set(entite_ids) if e]
+        if entite_ids:
+            (session or db.session).connection().execute(
+                delete(EntiteDetailCache.__table__).where(
+                    EntiteDetailCache.__table__.c.entite_id.in_(entite_ids)
+                )
+            )
+
+
+def _touched_entite_ids(session):
+    """(entités concernées, entités supprimées) par les objets du flush courant."""
+    ids = set()
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, EntiteBase)}
+    candidates = list(session.new) + list(session.deleted) + [
+        obj for obj in session.dirty if session.is_modified(obj, include_collections=False)
+    ]
+    for obj in candidates:
+        if isinstance(obj, EntiteDetailCache):
+            continue
+        if isinstance(obj, EntiteBase):
+            ids.add(obj.id)
+        else:
+            entite_id = getattr(obj, 'entite_id', None)
+            if entite_id:
+                ids.add(entite_id)
+    return ids - deleted, deleted
+
+
+@event.listens_for(Session, 'after_flush')
+def _invalidate_on_flush(session, flush_context):
+    # after_flush : new/dirty/deleted reflètent encore l'état d'avant flush
+    session.info[_ECRITURES] = True
+    ids, deleted = _touched_entite_ids(session)
+    if ids:
+        DetailCacheService.invalidate(ids, session=session)
+    if deleted:
+        DetailCacheService.forget(deleted, session=session)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _noter_ecritures_ensemblistes(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        orm_execute_state.session.info[_ECRITURES] = True
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_soft_rollback')
+def _oublier_ecritures(session, *args):
+    session.info.pop(_ECRITURES, None)
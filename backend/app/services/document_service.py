@@ -0,0 +1,277 @@
+"""
+Service documents ARTCI DCP : enregistrement des fichiers téléversés dans le
+stockage adressé par contenu (app.utils.storage) et accès aux fichiers.
+
+Un blob peut être partagé par plusieurs DocumentJoint (déduplication) : il
+n'est supprimé que lorsque plus aucun document ne le référence.
+Les documents antérieurs au stockage par contenu gardent leur chemin
+historique (relatif au répertoire courant ou à UPLOAD_FOLDER).
+"""
+import os
+import time
+from itertools import islice
+from flask import current_app, redirect
+from sqlalchemy import func, select
+from app.extensions import db
+from app.models import ApercuDocument, DocumentJoint, EntiteBase
+from app.services.apercu_service import ApercuService
+from app.utils.file_delivery import send_download
+from app.utils.storage import (
+    get_storage, is_blob_key, LocalStorage, S3Storage, BLOB_PREFIX, PREVIEW_PREFIX
+)
+from app.utils.uploads import UploadSpool
+
+
+class DocumentService:
+
+    @staticmethod
+    def store_upload(file):
+        """
+        Enregistrer un fichier téléversé (werkzeug FileStorage) par morceaux.
+        Un fichier déjà validé et haché à la réception (route @validated_upload)
+        est simplement renommé dans le stockage.
+        Returns StoredBlob(key, sha256, taille, deduplique).
+        """
+        if isinstance(file.stream, UploadSpool):
+            return get_storage().save_spooled(file.stream)
+        return get_storage().save_stream(file.stream)
+
+    @staticmethod
+    def apply_blob(doc, blob, file):
+        """Renseigner un DocumentJoint à partir du blob enregistré (et demander son aperçu)."""
+        doc.nom_fichier = os.path.basename(file.filename or '') or blob.sha256
+        doc.chemin_fichier = blob.key
+        doc.sha256 = blob.sha256
+        doc.taille = blob.taille
+        # Type reconnu par signature si disponible, plutôt que celui annoncé par le client
+        sniffed = file.stream.mimetype if isinstance(file.stream, UploadSpool) else None
+        doc.mime_type = sniffed or file.content_type
+        ApercuService.planifier(blob.sha256)
+
+    @staticmethod
+    def release(chemin):
+        """
+        Supprimer le fichier `chemin` s'il n'est plus référencé par aucun document.
+        À appeler après le commit qui a retiré / remplacé la référence.
+        """
+        if not chemin:
+            return False
+        still_used = db.session.query(
+            DocumentJoint.query.filter_by(chemin_fichier=chemin).exists()
+        ).scalar()
+        if still_used:
+            return False
+        if is_blob_key(chemin):
+            get_storage().delete(chemin)
+            return True
+        path = DocumentService.legacy_path(chemin)
+        if path:
+            try:
+                os.remove(path)
+                return True
+            except OSError:
+                pass
+        return False
+
+    @staticmethod
+    def legacy_path(chemin):
+        """Chemin local d'un document historique (hors stockage par contenu), ou None."""
+        for candidate in (chemin, os.path.join(current_app.config['UPLOAD_FOLDER'], chemin)):
+            if candidate and os.path.isfile(candidate):
+                return candidate
+        return None
+
+    @staticmethod
+    def local_path(doc):
+        """Chemin local du fichier d'un document, ou None (absent / stockage distant)."""
+        if is_blob_key(doc.chemin_fichier):
+            storage = get_storage()
+            if isinstance(storage, LocalStorage) and storage.exists(doc.chemin_fichier):
+                return storage.path(doc.chemin_fichier)
+            return None
+        return DocumentService.legacy_path(doc.chemin_fichier)
+
+    @staticmethod
+    def open(doc):
+        """Flux binaire du fichier d'un document (FileNotFoundError si absent)."""
+        if is_blob_key(doc.chemin_fichier):
+            storage = get_storage()
+            if not storage.exists(doc.chemin_fichier):
+                raise FileNotFoundError(doc.chemin_fichier)
+            return storage.open(doc.chemin_fichier)
+        path = DocumentService.legacy_path(doc.chemin_fichier)
+        if not path:
+            raise FileNotFoundError(doc.chemin_fichier)
+        return open(path, 'rb')
+
+    @staticmethod
+    def download_response(doc, mimetype=None, as_attachment=True):
+        """
+        Réponse de téléchargement d'un document : fichier local (Range, ETag
+        sha256, délégation X-Accel/X-Sendfile) ou redirection vers une URL S3
+        signée. FileNotFoundError si le fichier est absent.
+        """
+        mimetype = mimetype or doc.mime_type or 'application/octet-stream'
+        path = DocumentService.local_path(doc)
+        if path is not None:
+            return send_download(path, doc.nom_fichier, mimetype=mimetype,
+                                 etag=doc.sha256, as_attachment=as_attachment)
+
+        storage = get_storage()
+        if (is_blob_key(doc.chemin_fichier) and isinstance(storage, S3Storage)
+                and current_app.config.get('DOWNLOAD_S3_REDIRECT', True)):
+            if not storage.exists(doc.chemin_fichier):
+                raise FileNotFoundError(doc.chemin_fichier)
+            return redirect(storage.presigned_url(
+                doc.chemin_fichier, doc.nom_fichier, mimetype,
+                expires=current_app.config.get('DOWNLOAD_S3_URL_EXPIRES', 300)
+            ))
+        return send_download(DocumentService.open(doc), doc.nom_fichier, mimetype=mimetype,
+                             etag=doc.sha256, as_attachment=as_attachment)
+
+    # --- Réconciliation stockage / base (ramasse-miettes) ---
+
+    @staticmethod
+    def reconcilier(dry_run=True, batch_size=1000, age_min_heures=None, max_exemples=50):
+        """
+        Comparer les fichiers du stockage aux DocumentJoint, par lots.
+
+        - orphelins : fichiers qu'aucun document ne référence (blobs, aperçus,
+          fichiers historiques, temporaires abandonnés) ; supprimés sauf dry_run.
+          Les fichiers plus récents que age_min_heures sont ignorés (téléversement
+          en cours, pas encore commité).
+        - manquants : documents dont le fichier n'existe plus (signalés seulement).
+        """
+        config = current_app.config
+        storage = get_storage()
+        if age_min_heures is None:
+            age_min_heures = config.get('DOCUMENTS_GC_MIN_AGE_HOURS', 24)
+        limite_mtime = time.time() - age_min_heures * 3600
+
+        exclude = []
+        if isinstance(storage, LocalStorage):
+            from app.services.backup_service import BackupService
+            exclude.append(BackupService.backup_dir())
+
+        rapport = {
+            'dry_run': dry_run,
+            'fichiers': 0, 'octets': 0,
+            'orphelins': 0, 'octets_orphelins': 0, 'supprimes': 0, 'recents_ignores': 0,
+            'exemples_orphelins': [],
+            'manquants': 0, 'documents_manquants': [],
+        }
+        entries = storage.iter_entries(exclude=exclude)
+        while True:
+            lot = list(islice(entries, batch_size))
+            if not lot:
+                break
+            rapport['fichiers'] += len(lot)
+            rapport['octets'] += sum(taille for _, taille, _ in lot)
+            references = DocumentService._references(k for k, _, _ in lot)
+            for key, taille, mtime in lot:
+                if key in references:
+                    continue
+                if mtime > limite_mtime:
+                    rapport['recents_ignores'] += 1
+                    continue
+                rapport['orphelins'] += 1
+                rapport['octets_orphelins'] += taille
+                if len(rapport['exemples_orphelins']) < max_exemples:
+                    rapport['exemples_orphelins'].append(key)
+                if not dry_run:
+                    storage.delete(key)
+                    rapport['supprimes'] += 1
+            if not dry_run:
+                DocumentService._purger_apercus(
+                    k for k, _, m in lot
+                    if k.startswith(PREVIEW_PREFIX) and k not in references and m <= limite_mtime
+                )
+
+        DocumentService._signaler_manquants(storage, rapport, batch_size, max_exemples)
+        return rapport
+
+    @staticmethod
+    def _references(keys):
+        """Sous-ensemble des clés encore référencées par un DocumentJoint."""
+        upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
+        chemins, shas, historiques = {}, {}, {}
+        for key in keys:
+            if key.startswith(BLOB_PREFIX):
+                chemins[key] = key
+            elif key.startswith(PREVIEW_PREFIX):
+                shas[os.path.basename(key).split('.', 1)[0]] = key
+            elif not key.startswith('tmp/'):
+                # Chemins historiques : relatifs à UPLOAD_FOLDER ou au répertoire courant
+                historiques[key] = key
+                historiques[os.path.join(upload_folder, key).replace(os.sep, '/')] = key
+
+        references = set()
+        candidats = list(chemins) + list(historiques)
+        if candidats:
+            for chemin in db.session.scalars(
+                select(DocumentJoint.chemin_fichier).distinct()
+                .where(DocumentJoint.chemin_fichier.in_(candidats))
+            ):
+                references.add(chemins.get(chemin) or historiques[chemin])
+        if shas:
+            for sha in db.session.scalars(
+                select(DocumentJoint.sha256).distinct().where(DocumentJoint.sha256.in_(list(shas)))
+            ):
+                references.add(shas[sha])
+        return references
+
+    @staticmethod
+    def _purger_apercus(keys):
+        """Supprimer les lignes apercus_documents des miniatures orphelines."""
+        shas = [os.path.basename(k).split('.', 1)[0] for k in keys]
+        if shas:
+            ApercuDocument.query.filter(ApercuDocument.sha256.in_(shas)).delete(
+                synchronize_session=False
+            )
+            db.session.commit()
+
+    @staticmethod
+    def _signaler_manquants(storage, rapport, batch_size, max_exemples):
+        """Documents dont le fichier est absent (lecture en flux, un contrôle par chemin)."""
+        verifies = {}
+        rows = db.session.execute(
+            select(DocumentJoint.id, DocumentJoint.entite_id, DocumentJoint.chemin_fichier)
+            .order_by(DocumentJoint.chemin_fichier)
+            .execution_options(yield_per=batch_size)
+        )
+        for doc_id, entite_id, chemin in rows:
+            present = verifies.get(chemin)
+            if present is None:
+                if is_blob_key(chemin):
+                    present = storage.exists(chemin)
+                else:
+                    present = DocumentService.legacy_path(chemin) is not None
+                # Tri par chemin : seul le dernier contrôle doit être retenu
+                verifies = {chemin: present}
+            if not present:
+                rapport['manquants'] += 1
+                if len(rapport['documents_manquants']) < max_exemples:
+                    rapport['documents_manquants'].append(
+                        {'id': doc_id, 'entite_id': entite_id, 'chemin_fichier': chemin}
+                    )
+        rows.close()
+
+    @staticmethod
+    def usage_par_entite(limit=20):
+        """Espace disque par entité (somme des tailles déclarées, blobs partagés compris)."""
+        rows = db.session.execute(
+            select(
+                DocumentJoint.entite_id,
+                EntiteBase.denomination,
+                func.count(DocumentJoint.id),
+                func.coalesce(func.sum(DocumentJoint.taille), 0).label('octets'),
+            )
+            .join(EntiteBase, EntiteBase.id == DocumentJoint.entite_id)
+            .group_by(DocumentJoint.entite_id, EntiteBase.denomination)
+            .order_by(func.coalesce(func.sum(DocumentJoint.taille), 0).desc())
+            .limit(limit)
+        ).all()
+        return [
+            {'entite_id': e, 'denomination': d, 'documents': n, 'octets': int(o)}
+            for e, d, n, o in rows
+        ]
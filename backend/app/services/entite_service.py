@@ -15,8 +15,38 @@ from app.models.enums import (
     OrigineSaisieEnum, StatutWorkflowEnum, TypeDPOEnum,
     CategorieDonneesEnum, BaseLegaleEnum, TypeMesureEnum
 )
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, load_only
 from app.services.scoring_service import ScoringService
+from app.utils.batch_loader import batch_load_children
+
+
+# Relations ONE-TO-MANY parcourues par chaque schéma de lecture
+DETAIL_RELATIONS = (
+    'responsables_legaux', 'dpos', 'conformites_administratives', 'documents',
+    'registre_traitements', 'categories_donnees', 'finalites', 'sous_traitants',
+    'transferts', 'mesures_securite', 'certifications', 'renouvellements',
+)
+PUBLIC_DETAIL_RELATIONS = ('dpos', 'finalites', 'documents')
+LIST_RELATIONS = ('dpos', 'finalites', 'documents')
+
+# Champs calculés d'EntiteListOutputSchema -> (relation, colonne lue) ;
+# les autres champs sont des colonnes d'EntiteBase de même nom.
+# Relation ONE-TO-ONE : joinedload ; ONE-TO-MANY : préchargement groupé.
+LIST_FIELD_SOURCES = {
+    'statut_conformite': ('conformite', 'statut_conformite'),
+    'score_conformite': ('conformite', 'score_conformite'),
+    'a_dpo': ('conformite', 'a_dpo'),
+    'statut_workflow': ('workflow', 'statut'),
+    'numero_autorisation': ('workflow', 'numero_autorisation_artci'),
+    'latitude': ('localisation', 'latitude'),
+    'longitude': ('localisation', 'longitude'),
+    'dpo_nom': ('dpos', None),
+    'dpo_email': ('dpos', None),
+    'dpo_telephone': ('dpos', None),
+    'finalite_principale': ('finalites', None),
+    'finalites_top': ('finalites', None),
+    'autorisation_pdf_url': ('documents', None),
+}
 
 
 class EntiteService:
@@ -226,17 +256,87 @@ class EntiteService:
         ).get(entite_id)
 
     @staticmethod
-    def build_entite_query(filters=None):
+    def get_entite_for_read(entite_id, relations=DETAIL_RELATIONS):
+        """
+        Charger une entité pour sérialisation : ONE-TO-ONE en joinedload,
+        ONE-TO-MANY préchargées (une requête IN par relation).
+        Retourne une vue lecture seule, ou None.
+        """
+        entite = EntiteService.get_entite_with_eager_load(entite_id)
+        if not entite:
+            return None
+        return batch_load_children([entite], relations)[0]
+
+    @staticmethod
+    def preload_for_list(entites, relations=LIST_RELATIONS):
+        """Précharger les relations utilisées par EntiteListOutputSchema (pagination, exports)."""
+        return batch_load_children(entites, relations)
+
+    @staticmethod
+    def list_relations(fields=None):
+        """Relations ONE-TO-MANY à précharger pour ces champs de EntiteListOutputSchema."""
+        if fields is None:
+            return LIST_RELATIONS
+        return tuple(
+            rel for rel in LIST_RELATIONS
+            if any(LIST_FIELD_SOURCES.get(f, (None,))[0] == rel for f in fields)
+        )
+
+    @staticmethod
+    def list_loader(fields=None):
+        """Loader de pagination préchargeant uniquement les relations nécessaires."""
+        relations = EntiteService.list_relations(fields)
+        if not relations:
+            return None
+        return lambda entites: EntiteService.preload_for_list(entites, relations)
+
+    @staticmethod
+    def _list_options(fields):
+        """
+        Options de chargement limitées aux champs demandés : colonnes
+        d'EntiteBase (load_only) et jointures ONE-TO-ONE réellement lues.
+        """
+        colonnes = {'id'}
+        jointures = {}
+        for name in fields:
+            rel, col = LIST_FIELD_SOURCES.get(name, (None, name))
+            if rel is None:
+                colonnes.add(col)
+            elif rel not in LIST_RELATIONS:
+                jointures.setdefault(rel, []).append(col)
+
+        options = [load_only(*(getattr(EntiteBase, c) for c in sorted(colonnes)))]
+        for rel, cols in jointures.items():
+            attr = getattr(EntiteBase, rel)
+            target = attr.property.mapper.class_
+            options.append(joinedload(attr).load_only(*(getattr(target, c) for c in cols)))
+        return options
+
+    @staticmethod
+    def build_entite_query(filters=None, fields=None):
         """
         Construire une requête de base avec filtres optionnels.
+        `fields` (champs de EntiteListOutputSchema, voir parse_fields) limite
+        les colonnes lues et les jointures aux champs affichés.
         Retourne un objet query SQLAlchemy.
         """
-        query = EntiteBase.query.options(
-            joinedload(EntiteBase.conformite),
-            joinedload(EntiteBase.workflow),
-            joinedload(EntiteBase.localisation),
-        )
+        if fields is None:
+            options = [
+                joinedload(EntiteBase.conformite),
+                joinedload(EntiteBase.workflow),
+                joinedload(EntiteBase.localisation),
+            ]
+        else:
+            options = EntiteService._list_options(fields)
+        query = EntiteBase.query.options(*options)
+        return EntiteService.apply_entite_filters(query, filters)
 
+    @staticmethod
+    def apply_entite_filters(query, filters=None):
+        """
+        Appliquer les filtres standards à une requête partant d'EntiteBase
+        (requête d'entités ou de colonnes, ex. db.session.query(EntiteBase.id)).
+        """
         if not filters:
             return query
 
@@ -16,8 +16,11 @@ from app.schemas.entite import EntiteDetailOutputSchema
 from app.schemas.auth import CompteEntrepriseOutputSchema
 from app.schemas.workflow import FeedbackOutputSchema
 from app.services.entite_service import EntiteService
+from app.services.detail_cache_service import DetailCacheService, VUE_DETAIL
+from app.services.document_service import DocumentService
 from app.services.workflow_service import WorkflowService
 from app.models.comptes_entreprises import CompteEntreprise
+from app.utils.serializers import serializer_for
 
 
 class EntrepriseService:
@@ -117,8 +120,12 @@ class EntrepriseService:
         if not entite:
             return None
 
-        entite = EntiteService.get_entite_with_eager_load(entite.id)
-        return EntiteDetailOutputSchema().dump(entite)
+        def build():
+            return EntiteDetailOutputSchema().dump(
+                EntiteService.get_entite_for_read(entite.id)
+            )
+
+        return DetailCacheService.get_or_build(entite.id, VUE_DETAIL, build)
 
     @staticmethod
     def create_demande(compte_id, data):
@@ -181,7 +188,7 @@ class EntrepriseService:
             entite_id=entite.id
         ).order_by(FeedbackVerification.date_feedback.desc()).all()
 
-        return FeedbackOutputSchema(many=True).dump(feedbacks)
+        return serializer_for(FeedbackOutputSchema).dump(feedbacks, many=True)
 
     @staticmethod
     def soumettre_rapport(compte_id, file, type_document='rapport_activite'):
@@ -196,22 +203,10 @@ class EntrepriseService:
         if not conformite or conformite.statut_conformite != StatutConformiteEnum.conforme:
             raise ValueError('Les rapports sont disponibles uniquement pour les entités conformes.')
 
-        # Sauvegarder le fichier
-        import os
-        from flask import current_app
-        upload_folder = current_app.config.get('UPLOAD_FOLDER', 'uploads')
-        os.makedirs(upload_folder, exist_ok=True)
-        filepath = os.path.join(upload_folder, file.filename)
-        file.save(filepath)
-
-        doc = DocumentJoint(
-            entite_id=entite.id,
-            type_document=TypeDocumentEnum(type_document),
-            nom_fichier=file.filename,
-            chemin_fichier=filepath,
-            taille=os.path.getsize(filepath),
-            mime_type=file.content_type
-        )
+        # Stockage adressé par contenu : pas de collision entre noms de fichiers
+        blob = DocumentService.store_upload(file)
+        doc = DocumentJoint(entite_id=entite.id, type_document=TypeDocumentEnum(type_document))
+        DocumentService.apply_blob(doc, blob, file)
         db.session.add(doc)
         db.session.commit()
         return doc
@@ -323,42 +318,25 @@ class EntrepriseService:
         if not entite:
             raise ValueError('Aucune entite trouvee.')
 
-        import os
-        from flask import current_app
-        upload_folder = os.path.join(
-            current_app.config.get('UPLOAD_FOLDER', 'uploads'), 'dpo'
-        )
-        os.makedirs(upload_folder, exist_ok=True)
-        filename = f"{entite.id}_{type_document}_{file.filename}"
-        filepath = os.path.join(upload_folder, filename)
-        file.save(filepath)
+        blob = DocumentService.store_upload(file)
 
         # Remplacer le precedent document du meme type si existant
         existing = DocumentJoint.query.filter_by(
             entite_id=entite.id, type_document=type_enum
         ).first()
+        ancien_chemin = None
         if existing:
-            try:
-                if existing.chemin_fichier and os.path.exists(existing.chemin_fichier):
-                    os.remove(existing.chemin_fichier)
-            except OSError:
-                pass
-            existing.nom_fichier = file.filename
-            existing.chemin_fichier = filepath
-            existing.taille = os.path.getsize(filepath)
-            existing.mime_type = file.content_type
+            ancien_chemin = existing.chemin_fichier
             doc = existing
         else:
-            doc = DocumentJoint(
-                entite_id=entite.id,
-                type_document=type_enum,
-                nom_fichier=file.filename,
-                chemin_fichier=filepath,
-                taille=os.path.getsize(filepath),
-                mime_type=file.content_type,
-            )
+            doc = DocumentJoint(entite_id=entite.id, type_document=type_enum)
             db.session.add(doc)
+        DocumentService.apply_blob(doc, blob, file)
         db.session.commit()
+
+        # Ancien fichier supprimé seulement s'il n'est plus référencé (dédupliqué)
+        if ancien_chemin and ancien_chemin != doc.chemin_fichier:
+            DocumentService.release(ancien_chemin)
         return doc
 
     @staticmethod
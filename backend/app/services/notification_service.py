@@ -0,0 +1,196 @@
+"""
+Service de notifications ARTCI DCP.
+Création (unitaire ou en masse), lecture, compteur de non lues par destinataire.
+
+Toutes les créations passent par NotificationService.creer : une seule
+insertion pour le lot et un upsert des compteurs (compteurs_notifications).
+Les méthodes de création ne valident pas la transaction : la notification
+est enregistrée avec l'opération métier qui l'a provoquée, et l'événement
+temps réel (flux SSE) n'est délivré qu'à son commit.
+"""
+import uuid
+from collections import Counter
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.extensions import db, event_bus
+from app.models import Notification, CompteurNotification
+from app.utils.db_timeouts import disable_statement_timeout
+
+
+class NotificationService:
+
+    @staticmethod
+    def creer(notifications):
+        """
+        Insérer un lot de notifications (dicts : destinataire_type, destinataire_id,
+        type, titre, message, entite_id) et incrémenter les compteurs de non lues.
+
+        Returns:
+            int nombre de notifications insérées
+        """
+        rows = [{'id': str(uuid.uuid4()), 'lue': False, **n} for n in notifications]
+        if not rows:
+            return 0
+        db.session.execute(insert(Notification), rows)
+        NotificationService._publier(rows)
+
+        counts = Counter(
+            (r['destinataire_type'], r['destinataire_id']) for r in rows if not r['lue']
+        )
+        if counts:
+            table = CompteurNotification.__table__
+            # Ordre stable des clés : pas d'interblocage entre lots concurrents
+            stmt = pg_insert(table).values([
+                {'destinataire_type': t, 'destinataire_id': d, 'non_lues': n}
+                for (t, d), n in sorted(counts.items())
+            ])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['destinataire_type', 'destinataire_id'],
+                set_={
+                    'non_lues': table.c.non_lues + stmt.excluded.non_lues,
+                    'updatedAt': func.now(),
+                }
+            )
+            db.session.execute(stmt)
+        return len(rows)
+
+    @staticmethod
+    def _publier(rows):
+        """Un événement SSE par contenu distinct (un fan-out = un seul NOTIFY)."""
+        groupes = {}
+        for r in rows:
+            contenu = (r['type'], r['titre'], r.get('entite_id'))
+            groupes.setdefault(contenu, []).append((r['destinataire_type'], r['destinataire_id']))
+        for (type_, titre, entite_id), destinataires in groupes.items():
+            event_bus.publish(destinataires, 'notification', {
+                'type': type_, 'titre': titre, 'entite_id': entite_id,
+            })
+
+    @staticmethod
+    def notifier(destinataire_type, destinataire_ids, type, titre, message=None, entite_id=None):
+        """Même notification envoyée à plusieurs destinataires (fan-out)."""
+        if isinstance(destinataire_ids, str):
+            destinataire_ids = [destinataire_ids]
+        return NotificationService.creer([
+            {
+                'destinataire_type': destinataire_type,
+                'destinataire_id': destinataire_id,
+                'type': type,
+                'titre': titre,
+                'message': message,
+                'entite_id': entite_id,
+            }
+            for destinataire_id in dict.fromkeys(destinataire_ids) if destinataire_id
+        ])
+
+    @staticmethod
+    def lister(destinataire_type, destinataire_id, filters=None, limit=100):
+        """Notifications d'un destinataire, plus récentes d'abord."""
+        query = Notification.query.filter_by(
+            destinataire_id=destinataire_id, destinataire_type=destinataire_type
+        ).order_by(Notification.createdAt.desc())
+
+        if filters:
+            if filters.get('type'):
+                query = query.filter_by(type=filters['type'])
+            if filters.get('lue') is not None:
+                lue_val = filters['lue']
+                if isinstance(lue_val, str):
+                    lue_val = lue_val.lower() == 'true'
+                query = query.filter_by(lue=lue_val)
+
+        return [
+            {
+                'id': n.id,
+                'type': n.type,
+                'titre': n.titre,
+                'message': n.message,
+                'lue': n.lue,
+                'entite_id': n.entite_id,
+                'createdAt': n.createdAt.isoformat() if n.createdAt else None,
+            }
+            for n in query.limit(limit).all()
+        ]
+
+    @staticmethod
+    def non_lues(destinataire_type, destinataire_id):
+        """Nombre de notifications non lues (lecture du compteur)."""
+        return db.session.execute(
+            select(CompteurNotification.non_lues).where(
+                CompteurNotification.destinataire_type == destinataire_type,
+                CompteurNotification.destinataire_id == destinataire_id,
+            )
+        ).scalar() or 0
+
+    @staticmethod
+    def _decrementer(destinataire_type, destinataire_id, n):
+        db.session.execute(
+            update(CompteurNotification)
+            .where(
+                CompteurNotification.destinataire_type == destinataire_type,
+                CompteurNotification.destinataire_id == destinataire_id,
+            )
+            .values(non_lues=func.greatest(CompteurNotification.non_lues - n, 0))
+        )
+
+    @staticmethod
+    def marquer_lue(notification_id, destinataire_id):
+        """Marquer une notification comme lue et décrémenter le compteur."""
+        notification = db.session.get(Notification, notification_id)
+        if not notification:
+            raise ValueError('Notification non trouvée.')
+        if notification.destinataire_id != destinataire_id:
+            raise ValueError('Notification non autorisée.')
+
+        # Condition lue = false : deux lectures concurrentes ne décrémentent qu'une fois
+        marquees = db.session.execute(
+            update(Notification)
+            .where(Notification.id == notification_id, Notification.lue.is_(False))
+            .values(lue=True),
+            execution_options={'synchronize_session': False},
+        ).rowcount
+        if marquees:
+            NotificationService._decrementer(
+                notification.destinataire_type, destinataire_id, marquees
+            )
+        db.session.commit()
+
+    @staticmethod
+    def marquer_toutes_lues(destinataire_type, destinataire_id):
+        """Tout marquer comme lu en un UPDATE ; retourne le nombre de notifications marquées."""
+        marquees = db.session.execute(
+            update(Notification)
+            .where(
+                Notification.destinataire_type == destinataire_type,
+                Notification.destinataire_id == destinataire_id,
+                Notification.lue.is_(False),
+            )
+            .values(lue=True),
+            execution_options={'synchronize_session': False},
+        ).rowcount
+        if marquees:
+            NotificationService._decrementer(destinataire_type, destinataire_id, marquees)
+        db.session.commit()
+        return marquees
+
+    @staticmethod
+    def recalculer_compteurs():
+        """Reconstruire tous les compteurs depuis la table notifications (réparation)."""
+        table = CompteurNotification.__table__
+        # Agrégat sur toute la table notifications : pas de statement_timeout
+        disable_statement_timeout(db.session)
+        db.session.execute(table.delete())
+        counts = db.session.execute(
+            select(
+                Notification.destinataire_type, Notification.destinataire_id, func.count()
+            )
+            .where(Notification.lue.is_(False))
+            .group_by(Notification.destinataire_type, Notification.destinataire_id)
+        ).all()
+        if counts:
+            db.session.execute(insert(table), [
+                {'destinataire_type': t, 'destinataire_id': d, 'non_lues': n}
+                for t, d, n in counts
+            ])
+        db.session.commit()
+        return len(counts)
@@ -7,7 +7,8 @@ from app.extensions import db
 from app.models import EntiteBase, EntiteConformite, EntiteWorkflow
 from app.models.enums import StatutConformiteEnum
 from app.schemas.entite import EntiteListOutputSchema, EntitePublicDetailSchema
-from app.services.entite_service import EntiteService
+from app.services.entite_service import EntiteService, PUBLIC_DETAIL_RELATIONS
+from app.services.detail_cache_service import DetailCacheService, VUE_PUBLIC
 from app.utils.pagination import paginate
 from app.utils.export import prepare_export_data, export_to_excel, export_to_csv, export_to_pdf
 
@@ -15,10 +16,11 @@ from app.utils.export import prepare_export_data, export_to_excel, export_to_csv
 class PublicService:
 
     @staticmethod
-    def get_entites_conformes(filters=None, page=None, per_page=None):
+    def get_entites_conformes(filters=None, page=None, per_page=None, fields=None):
         """
         Liste paginée des entités CONFORMES uniquement.
         Filtre automatique : statut_conformite = 'Conforme' AND publie_sur_carte = True
+        `fields` : champs clairsemés (colonnes et jointures limitées).
         """
         # Parse statut_conformite filter
         statut_filter = None
@@ -32,7 +34,7 @@ class PublicService:
                 except ValueError:
                     pass
 
-        query = EntiteService.build_entite_query(filters)
+        query = EntiteService.build_entite_query(filters, fields=fields)
 
         # Join conformite
         query = query.join(
@@ -62,24 +64,32 @@ class PublicService:
 
         query = query.order_by(EntiteBase.denomination.asc())
 
-        return paginate(query, EntiteListOutputSchema(), page=page, per_page=per_page)
+        return paginate(
+            query, EntiteListOutputSchema, page=page, per_page=per_page,
+            loader=EntiteService.list_loader(fields), only=fields
+        )
 
     @staticmethod
     def get_entite_public_detail(entite_id):
         """
         Détail public d'une entité.
         Doit être Conforme pour être visible.
+        Seules les fiches visibles sont mises en cache ; le changement de
+        conformité invalide la fiche (entite_id sur EntiteConformite).
         """
-        entite = EntiteService.get_entite_with_eager_load(entite_id)
-        if not entite:
-            return None
+        def build():
+            entite = EntiteService.get_entite_for_read(entite_id, PUBLIC_DETAIL_RELATIONS)
+            if not entite:
+                return None
+
+            # Vérifier que l'entité est conforme
+            if (not entite.conformite or
+                    entite.conformite.statut_conformite != StatutConformiteEnum.conforme):
+                return None
 
-        # Vérifier que l'entité est conforme
-        if (not entite.conformite or
-                entite.conformite.statut_conformite != StatutConformiteEnum.conforme):
-            return None
+            return EntitePublicDetailSchema().dump(entite)
 
-        return EntitePublicDetailSchema().dump(entite)
+        return DetailCacheService.get_or_build(entite_id, VUE_PUBLIC, build)
 
     @staticmethod
     def get_public_stats():
@@ -0,0 +1,462 @@
+"""
+Restauration des archives de sauvegarde ARTCI DCP (voir backup_service).
+
+- Tables chargées dans l'ordre des clés étrangères, en une seule transaction.
+- PostgreSQL : COPY FROM STDIN (csv) pour les restaurations complètes,
+  triggers de clés étrangères désactivés (session_replication_role=replica)
+  si les droits le permettent.
+- Autres SGBD (SQLite local) : executemany par lots avec conversion des types.
+- Incrémentale : appliquée seulement si la base est dans l'état de sa
+  sauvegarde de référence (lignes par table, rien de modifié depuis) ;
+  suppressions rejouées (enfants d'abord), puis lignes insérées ou mises à
+  jour en place (INSERT … ON CONFLICT DO UPDATE).
+- Secrets absents de l'archive (cas par défaut) : les hash de mots de passe
+  en base sont réappliqués aux comptes de même id ; seuls les comptes
+  inconnus reçoivent PLACEHOLDER_PASSWORD_HASH.
+- Chaque membre est vérifié (sha256 + nombre de lignes) contre le manifest ;
+  toute divergence annule la restauration.
+
+Lancée uniquement par la CLI (flask backup restore) : une restauration
+dépasse largement le délai d'une requête HTTP.
+"""
+import base64
+import hashlib
+import json
+import time as _time
+import zipfile
+from datetime import datetime, date, time
+from decimal import Decimal
+import sqlalchemy as sa
+from flask import current_app
+from sqlalchemy import text, tuple_
+from app.extensions import db
+from app.utils.db_timeouts import disable_statement_timeout
+from app.services.backup_service import (
+    MANIFEST_NAME, FORMAT_VERSION, SECRET_COLUMNS, CHANGE_COLUMN, backup_tables
+)
+
+
+# Tables hors sauvegarde conservées lors d'une restauration complète
+# (index des archives : la restauration ne doit pas effacer sa propre source)
+PRESERVED_TABLES = ('sauvegardes', 'job_runs')
+
+# Hash inutilisable : les comptes restaurés sans secrets doivent réinitialiser leur mot de passe
+PLACEHOLDER_PASSWORD_HASH = '!restored-without-secret'
+
+_NULL = b'\\N'
+
+
+class _ByteStream:
+    """Adaptateur fichier (read) au-dessus d'un itérateur de bytes, pour COPY."""
+
+    def __init__(self, chunks):
+        self._chunks = chunks
+        self._buf = bytearray()
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buf) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buf.extend(chunk)
+        if size < 0 or size >= len(self._buf):
+            data = bytes(self._buf)
+            self._buf.clear()
+        else:
+            data = bytes(self._buf[:size])
+            del self._buf[:size]
+        return data
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+def _csv_field(value):
+    if value is None:
+        return _NULL
+    if isinstance(value, bool):
+        value = 'true' if value else 'false'
+    elif isinstance(value, (dict, list)):
+        value = json.dumps(value, ensure_ascii=False)
+    else:
+        value = str(value)
+    # Toujours entre guillemets : une valeur quotée n'est jamais lue comme NULL
+    return b'"' + value.replace('"', '""').encode('utf-8') + b'"'
+
+
+def _decode(column, value):
+    """Convertir une valeur JSON de l'archive vers le type Python de la colonne."""
+    if value is None:
+        return None
+    col_type = column.type
+    if isinstance(col_type, sa.Enum) and col_type.enum_class is not None:
+        return col_type.enum_class[value]
+    if isinstance(col_type, sa.DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(col_type, sa.Date):
+        return date.fromisoformat(value)
+    if isinstance(col_type, sa.Time):
+        return time.fromisoformat(value)
+    if isinstance(col_type, sa.Numeric) and not isinstance(col_type, sa.Float):
+        return Decimal(value)
+    if isinstance(col_type, sa.LargeBinary):
+        return base64.b64decode(value)
+    return value
+
+
+class RestoreService:
+
+    @staticmethod
+    def _iter_member(zf, name, expected_sha256):
+        """Lignes décodées d'un membre NDJSON ; le sha256 est vérifié en fin de lecture."""
+        sha256 = hashlib.sha256()
+        with zf.open(name) as member:
+            for line in member:
+                sha256.update(line)
+                yield json.loads(line)
+        if expected_sha256 and sha256.hexdigest() != expected_sha256:
+            raise ValueError(f'Somme de contrôle invalide pour {name}.')
+
+    @staticmethod
+    def _missing_columns(table, archived_columns):
+        """
+        Colonnes NOT NULL absentes de l'archive (secrets exclus) -> valeur de
+        remplacement, écrasée ensuite par _reapply_secrets pour les comptes connus.
+        """
+        fills = {}
+        for name in SECRET_COLUMNS.get(table.name, ()):
+            if name in table.c and name not in archived_columns:
+                fills[name] = PLACEHOLDER_PASSWORD_HASH
+        return fills
+
+    @staticmethod
+    def _live_secrets(conn, tables, manifest):
+        """Secrets absents de l'archive : {table: (colonnes, lignes pk + valeurs actuelles)}."""
+        live = {}
+        for table in tables:
+            archived = manifest['tables'][table.name]['columns']
+            names = [n for n in SECRET_COLUMNS.get(table.name, ()) if n in table.c and n not in archived]
+            pk_cols = list(table.primary_key.columns)
+            if names and pk_cols:
+                rows = conn.execute(sa.select(*pk_cols, *(table.c[n] for n in names))).all()
+                live[table] = (names, rows)
+        return live
+
+    @staticmethod
+    def _reapply_secrets(conn, live, batch_size):
+        """Remettre les secrets d'avant la restauration sur les lignes de même clé ; retourne {table: lignes}."""
+        counts = {}
+        for table, (names, rows) in live.items():
+            pk_cols = list(table.primary_key.columns)
+            values = {n: sa.bindparam(f'v_{n}') for n in names}
+            if CHANGE_COLUMN in table.c:
+                # Pas d'onupdate : updatedAt reste celui de l'archive (référence des incrémentales)
+                values[CHANGE_COLUMN] = table.c[CHANGE_COLUMN]
+            stmt = table.update().where(
+                *(c == sa.bindparam(f'pk_{c.name}') for c in pk_cols)
+            ).values(values)
+            params = [
+                {**{f'pk_{c.name}': v for c, v in zip(pk_cols, row)},
+                 **{f'v_{n}': v for n, v in zip(names, row[len(pk_cols):])}}
+                for row in rows
+            ]
+            for i in range(0, len(params), batch_size):
+                conn.execute(stmt, params[i:i + batch_size])
+            counts[table.name] = len(params)
+        return counts
+
+    @staticmethod
+    def _check_base(conn, tables, manifest):
+        """
+        Incrémentale : la base doit être dans l'état de la sauvegarde de
+        référence (même nombre de lignes par table, aucune ligne modifiée après
+        son instantané), sinon l'appliquer mélangerait deux historiques.
+        """
+        base = manifest.get('base')
+        if not base:
+            raise ValueError('Archive incrémentale sans sauvegarde de référence. Forcer pour l\'appliquer.')
+        snapshot_at = datetime.fromisoformat(base['snapshot_at']) if base.get('snapshot_at') else None
+        for table in tables:
+            expected = base['rows'].get(table.name)
+            if expected is not None:
+                in_db = conn.execute(sa.select(sa.func.count()).select_from(table)).scalar()
+                if in_db != expected:
+                    raise ValueError(
+                        f"{table.name} : {in_db} ligne(s) en base, {expected} dans la sauvegarde de "
+                        f"référence {base['filename']}. Restaurer d'abord cette sauvegarde."
+                    )
+            change_column = manifest['tables'][table.name].get('change_column')
+            if snapshot_at is not None and change_column and change_column in table.c:
+                modified = conn.execute(
+                    sa.select(sa.exists().where(table.c[change_column] > snapshot_at))
+                ).scalar()
+                if modified:
+                    raise ValueError(
+                        f"{table.name} : données modifiées après la sauvegarde de référence "
+                        f"{base['filename']}."
+                    )
+
+    @staticmethod
+    def _disable_constraints(conn):
+        """Désactiver / différer les contrôles de clés étrangères pendant le chargement."""
+        if conn.dialect.name == 'postgresql':
+            savepoint = conn.begin_nested()
+            try:
+                conn.execute(text('SET LOCAL session_replication_role = replica'))
+                savepoint.commit()
+                return 'replica'
+            except Exception:
+                savepoint.rollback()
+                conn.execute(text('SET CONSTRAINTS ALL DEFERRED'))
+                return 'deferred'
+        if conn.dialect.name == 'sqlite':
+            conn.execute(text('PRAGMA defer_foreign_keys = ON'))
+            return 'deferred'
+        return 'fk_order'
+
+    @staticmethod
+    def _dependents(tables):
+        """Tables hors sauvegarde dont une clé étrangère référence les tables restaurées."""
+        names = {t.name for t in tables}
+        dependents = []
+        ajout = True
+        while ajout:
+            ajout = False
+            for t in db.metadata.sorted_tables:
+                if t.name not in names and any(fk.column.table.name in names for fk in t.foreign_keys):
+                    names.add(t.name)
+                    dependents.append(t)
+                    ajout = True
+        return dependents
+
+    @staticmethod
+    def _truncate(conn, tables):
+        """
+        Vider les tables restaurées, sans CASCADE : les tables qui les
+        référencent sont listées explicitement. Celles de PRESERVED_TABLES
+        (index des sauvegardes...) sont copiées avant puis réinsérées par
+        _restore_preserved. Retourne {table: lignes copiées}.
+        """
+        if conn.dialect.name != 'postgresql':
+            for table in reversed(tables):
+                conn.execute(table.delete())
+            return {}
+        dependents = RestoreService._dependents(tables)
+        preserved = {
+            t: conn.execute(sa.select(t)).mappings().all()
+            for t in dependents if t.name in PRESERVED_TABLES
+        }
+        names = ', '.join(conn.dialect.identifier_preparer.quote(t.name) for t in tables + dependents)
+        conn.execute(text(f'TRUNCATE {names}'))
+        return preserved
+
+    @staticmethod
+    def _restore_preserved(conn, preserved):
+        """Réinsérer les tables préservées ; références disparues -> NULL (ON DELETE SET NULL)."""
+        for table, rows in preserved.items():
+            if not rows:
+                continue
+            rows = [dict(r) for r in rows]
+            for fk in table.foreign_keys:
+                column, target = fk.parent.name, fk.column
+                valeurs = {r[column] for r in rows if r[column] is not None}
+                if not valeurs:
+                    continue
+                existantes = set(conn.scalars(sa.select(target).where(target.in_(valeurs))))
+                for r in rows:
+                    if r[column] not in existantes:
+                        r[column] = None
+            conn.execute(table.insert(), rows)
+
+    @staticmethod
+    def _copy_table(conn, table, columns, fills, rows):
+        """Chargement PostgreSQL par COPY FROM STDIN ; retourne le nombre de lignes."""
+        counter = {'rows': 0}
+        fill_values = [_csv_field(v) for v in fills.values()]
+
+        def chunks():
+            for row in rows:
+                fields = [_csv_field(row.get(c)) for c in columns] + fill_values
+                counter['rows'] += 1
+                yield b','.join(fields) + b'\n'
+
+        quote = conn.dialect.identifier_preparer.quote
+        cols_sql = ', '.join(quote(c) for c in list(columns) + list(fills))
+        sql = (f'COPY {quote(table.name)} ({cols_sql}) FROM STDIN '
+               "WITH (FORMAT csv, NULL '\\N', ENCODING 'UTF8')")
+        cursor = conn.connection.driver_connection.cursor()
+        try:
+            cursor.copy_expert(sql, _ByteStream(chunks()))
+        finally:
+            cursor.close()
+        return counter['rows']
+
+    @staticmethod
+    def _upsert_statement(conn, table, columns):
+        """INSERT … ON CONFLICT (pk) DO UPDATE des colonnes archivées (secrets existants conservés)."""
+        if conn.dialect.name == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table)
+        pk_names = [c.name for c in table.primary_key.columns]
+        updates = {c: stmt.excluded[c] for c in columns if c not in pk_names}
+        if not updates:
+            return stmt.on_conflict_do_nothing(index_elements=pk_names)
+        return stmt.on_conflict_do_update(index_elements=pk_names, set_=updates)
+
+    @staticmethod
+    def _insert_batches(conn, table, columns, fills, rows, batch_size, upsert=False):
+        """
+        Chargement générique (executemany). upsert=True met à jour les lignes
+        existantes en place (pas de DELETE : les clés étrangères non
+        différables des enfants restent satisfaites).
+        """
+        table_cols = [table.c[c] for c in columns]
+        stmt = table.insert()
+        if upsert and table.primary_key.columns:
+            stmt = RestoreService._upsert_statement(conn, table, columns)
+        count = 0
+        batch = []
+        for row in rows:
+            record = {c.name: _decode(c, row.get(c.name)) for c in table_cols}
+            record.update(fills)
+            batch.append(record)
+            if len(batch) >= batch_size:
+                conn.execute(stmt, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            conn.execute(stmt, batch)
+            count += len(batch)
+        return count
+
+    @staticmethod
+    def _kept_keys(zf, table, entry):
+        """
+        Incrémental : clés primaires à conserver, ou None si la table n'est pas
+        concernée. Table exportée par updatedAt : liste .ids ; table exportée
+        intégralement : clés du membre de données lui-même.
+        """
+        pk_cols = list(table.primary_key.columns)
+        if not pk_cols:
+            return None
+        if entry.get('ids'):
+            keys = RestoreService._iter_member(zf, f'{table.name}.ids.ndjson', entry['ids']['sha256'])
+            return {tuple(_decode(c, v) for c, v in zip(pk_cols, key)) for key in keys}
+        if entry.get('mode') == 'full':
+            rows = RestoreService._iter_member(zf, f'{table.name}.ndjson', entry['sha256'])
+            return {tuple(_decode(c, row.get(c.name)) for c in pk_cols) for row in rows}
+        return None
+
+    @staticmethod
+    def _apply_deletions(conn, table, kept, batch_size):
+        """Supprimer les lignes dont la clé primaire n'est pas dans `kept`."""
+        pk_cols = list(table.primary_key.columns)
+        to_delete = [
+            tuple(row) for row in conn.execute(sa.select(*pk_cols))
+            if tuple(row) not in kept
+        ]
+        for i in range(0, len(to_delete), batch_size):
+            conn.execute(table.delete().where(tuple_(*pk_cols).in_(to_delete[i:i + batch_size])))
+        return len(to_delete)
+
+    @staticmethod
+    def restore_archive(filepath, force=False):
+        """
+        Restaurer une archive (complète : remplace les données ; incrémentale :
+        appliquée par-dessus l'état courant). Tout ou rien.
+
+        Returns:
+            dict rapport {type, tables: {nom: {rows, expected, deleted}}, secrets, duration_s}
+        """
+        started = _time.monotonic()
+        batch_size = current_app.config.get('BACKUP_BATCH_SIZE', 1000)
+
+        with zipfile.ZipFile(filepath) as zf:
+            manifest = json.loads(zf.read(MANIFEST_NAME))
+            if manifest.get('format_version') != FORMAT_VERSION:
+                raise ValueError('Format de sauvegarde non supporté.')
+            incremental = manifest['type'] == 'incremental'
+            tables = [t for t in backup_tables() if t.name in manifest['tables']]
+
+            report = {'type': manifest['type'], 'tables': {}}
+            with db.engine.begin() as conn:
+                # COPY / chargements volumineux : pas de statement_timeout
+                disable_statement_timeout(conn)
+                current_revision = conn.execute(
+                    text('SELECT version_num FROM alembic_version')
+                ).scalar() if sa.inspect(conn).has_table('alembic_version') else None
+                if (not force and manifest.get('alembic_revision')
+                        and manifest['alembic_revision'] != current_revision):
+                    raise ValueError(
+                        f"Révision de schéma différente (archive {manifest['alembic_revision']}, "
+                        f'base {current_revision}). Migrer la base ou forcer.'
+                    )
+
+                if incremental and not force:
+                    RestoreService._check_base(conn, tables, manifest)
+
+                live_secrets = RestoreService._live_secrets(conn, tables, manifest)
+                report['constraints'] = RestoreService._disable_constraints(conn)
+                deleted = {}
+                if incremental:
+                    # Suppressions d'abord, enfants avant parents (ordre FK inverse)
+                    for table in reversed(tables):
+                        kept = RestoreService._kept_keys(zf, table, manifest['tables'][table.name])
+                        if kept is not None:
+                            deleted[table.name] = RestoreService._apply_deletions(
+                                conn, table, kept, batch_size
+                            )
+                else:
+                    preserved = RestoreService._truncate(conn, tables)
+                use_copy = conn.dialect.name == 'postgresql' and not incremental
+
+                for table in tables:
+                    entry = manifest['tables'][table.name]
+                    columns = [c for c in entry['columns'] if c in table.c]
+                    fills = RestoreService._missing_columns(table, columns)
+
+                    rows = RestoreService._iter_member(zf, f'{table.name}.ndjson', entry['sha256'])
+                    if use_copy:
+                        loaded = RestoreService._copy_table(conn, table, columns, fills, rows)
+                    else:
+                        loaded = RestoreService._insert_batches(
+                            conn, table, columns, fills, rows, batch_size, upsert=incremental
+                        )
+                    if loaded != entry['rows']:
+                        raise ValueError(
+                            f"{table.name} : {loaded} ligne(s) chargée(s), {entry['rows']} attendue(s)."
+                        )
+                    # Table complète (y compris exportée intégralement dans une incrémentale)
+                    if not incremental or entry.get('mode') == 'full':
+                        in_db = conn.execute(sa.select(sa.func.count()).select_from(table)).scalar()
+                        if in_db != entry['rows']:
+                            raise ValueError(
+                                f"{table.name} : {in_db} ligne(s) en base, {entry['rows']} attendue(s)."
+                            )
+                    report['tables'][table.name] = {
+                        'rows': loaded, 'expected': entry['rows'], 'deleted': deleted.get(table.name, 0)
+                    }
+
+                report['secrets'] = RestoreService._reapply_secrets(conn, live_secrets, batch_size)
+                if not incremental:
+                    RestoreService._restore_preserved(conn, preserved)
+                RestoreService._reset_caches(conn)
+
+        report['duration_s'] = round(_time.monotonic() - started, 2)
+        return report
+
+    @staticmethod
+    def _reset_caches(conn):
+        """Les données ont changé : invalider fiches en cache et ETags publics."""
+        from app.models.entite_detail_cache import EntiteDetailCache
+        from app.utils.http_cache import published_version_upsert
+
+        conn.execute(EntiteDetailCache.__table__.delete())
+        conn.execute(published_version_upsert(conn.dialect.name))
+
+    @staticmethod
+    def restore_chain(filepaths, force=False):
+        """Restaurer une sauvegarde complète puis des incrémentales, dans l'ordre donné."""
+        return [RestoreService.restore_archive(p, force=force) for p in filepaths]
@@ -0,0 +1,199 @@
+"""
+Tâches planifiées ARTCI DCP.
+
+Pas de démon : un cron (ou le scheduler de l'hébergeur) appelle toutes les
+quelques minutes `flask jobs run-due`, qui exécute les tâches dont le
+dernier succès est plus ancien que leur intervalle. Chaque exécution est
+tracée dans job_runs (durée, statut, métriques). Sous PostgreSQL un verrou
+consultatif empêche deux exécutions simultanées d'une même tâche.
+"""
+import time
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone, timedelta
+from typing import Callable
+from flask import current_app
+from sqlalchemy import func, select
+from app.extensions import db
+from app.models.job_runs import JobRun
+
+
+@dataclass(frozen=True)
+class Job:
+    name: str
+    func: Callable
+    interval: timedelta
+    description: str = ''
+
+
+JOBS = {}
+
+
+def job(name, minutes=None, hours=None, description=''):
+    """Décorateur : enregistrer une tâche planifiée."""
+    interval = timedelta(minutes=minutes or 0, hours=hours or 0)
+
+    def decorator(fn):
+        JOBS[name] = Job(name, fn, interval, description or (fn.__doc__ or '').strip())
+        return fn
+    return decorator
+
+
+class _AdvisoryLock:
+    """Verrou consultatif PostgreSQL (no-op sur les autres SGBD)."""
+
+    def __init__(self, name):
+        self.key = zlib.crc32(f'artci_job:{name}'.encode('utf-8'))
+        self.conn = None
+
+    def __enter__(self):
+        if db.engine.dialect.name != 'postgresql':
+            return True
+        self.conn = db.engine.connect()
+        acquired = self.conn.execute(select(func.pg_try_advisory_lock(self.key))).scalar()
+        if not acquired:
+            self.conn.close()
+            self.conn = None
+        return acquired
+
+    def __exit__(self, *exc):
+        if self.conn is not None:
+            self.conn.execute(select(func.pg_advisory_unlock(self.key)))
+            self.conn.close()
+
+
+class SchedulerService:
+
+    @staticmethod
+    def enabled_jobs():
+        disabled = set(current_app.config.get('SCHEDULER_DISABLED_JOBS', ()))
+        return [j for name, j in JOBS.items() if name not in disabled]
+
+    @staticmethod
+    def last_success(name):
+        return db.session.query(func.max(JobRun.started_at)).filter(
+            JobRun.job == name, JobRun.statut == 'succes'
+        ).scalar()
+
+    @staticmethod
+    def is_due(j, now=None):
+        now = now or datetime.now(timezone.utc)
+        last = SchedulerService.last_success(j.name)
+        return last is None or last + j.interval <= now
+
+    @staticmethod
+    def run_job(name):
+        """
+        Exécuter une tâche et tracer l'exécution.
+        Returns JobRun, ou None si la tâche tourne déjà ailleurs.
+        """
+        j = JOBS.get(name)
+        if j is None:
+            raise ValueError(f'Tâche inconnue : {name}')
+
+        with _AdvisoryLock(name) as acquired:
+            if not acquired:
+                return None
+            run = JobRun(job=name, statut='en_cours', started_at=datetime.now(timezone.utc))
+            db.session.add(run)
+            db.session.commit()
+            run_id = run.id
+
+            started = time.monotonic()
+            try:
+                resultat = j.func()
+                statut, erreur = 'succes', None
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.exception(f'Tâche {name} en échec')
+                resultat, statut, erreur = None, 'echec', str(e)[:2000]
+
+            run = db.session.get(JobRun, run_id)
+            run.statut = statut
+            run.erreur = erreur
+            run.resultat = resultat if isinstance(resultat, dict) else (
+                {'valeur': resultat} if resultat is not None else None
+            )
+            run.finished_at = datetime.now(timezone.utc)
+            run.duree_secondes = round(time.monotonic() - started, 3)
+            db.session.commit()
+            return run
+
+    @staticmethod
+    def run_due():
+        """Exécuter toutes les tâches dues ; retourne la liste des JobRun."""
+        now = datetime.now(timezone.utc)
+        runs = []
+        for j in SchedulerService.enabled_jobs():
+            if SchedulerService.is_due(j, now):
+                run = SchedulerService.run_job(j.name)
+                if run is not None:
+                    runs.append(run)
+        return runs
+
+    @staticmethod
+    def status():
+        """Dernier succès et prochaine échéance de chaque tâche."""
+        now = datetime.now(timezone.utc)
+        result = []
+        for j in SchedulerService.enabled_jobs():
+            last = SchedulerService.last_success(j.name)
+            result.append({
+                'job': j.name,
+                'description': j.description,
+                'intervalle_minutes': int(j.interval.total_seconds() // 60),
+                'dernier_succes': last.isoformat() if last else None,
+                'due': last is None or last + j.interval <= now,
+            })
+        return result
+
+
+# ============================================================
+# TÂCHES
+# ============================================================
+
+@job('echeances', minutes=60)
+def sweep_echeances():
+    """Marquer en retard les assignations dont l'échéance est dépassée."""
+    from app.services.workflow_service import WorkflowService
+    return WorkflowService.check_echeances_depassees()
+
+
+@job('otp_purge', hours=24)
+def purge_otp():
+    """Supprimer les codes OTP expirés ou utilisés."""
+    from app.utils.otp import purge_otp_codes
+    return {'supprimes': purge_otp_codes()}
+
+
+@job('backup', hours=24)
+def backup_planifie():
+    """Sauvegarde complète planifiée."""
+    from app.services.backup_service import BackupService
+    result = BackupService.create_backup(planifie=True)
+    return {'filename': result['filename'], 'taille_octets': result['taille_octets']}
+
+
+@job('backup_retention', hours=24)
+def backup_retention():
+    """Appliquer la politique de rétention des sauvegardes."""
+    from app.services.backup_service import BackupService
+    return {'supprimees': len(BackupService.apply_retention())}
+
+
+@job('apercus', minutes=5)
+def apercus_documents():
+    """Générer les aperçus de documents en attente (reprise du pipeline)."""
+    from app.services.apercu_service import ApercuService
+    return ApercuService.traiter_en_attente()
+
+
+@job('documents_gc', hours=24)
+def documents_gc():
+    """Réconcilier stockage et documents (suppression si DOCUMENTS_GC_DELETE)."""
+    from app.services.document_service import DocumentService
+    rapport = DocumentService.reconcilier(
+        dry_run=not current_app.config.get('DOCUMENTS_GC_DELETE', False)
+    )
+    rapport.pop('exemples_orphelins')
+    return rapport
@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 from app.extensions import db
 from app.models import EntiteBase, EntiteWorkflow, EntiteConformite, TraitementDossier, FormulaireDCP
 from app.models.enums import StatutWorkflowEnum
+from app.services.apercu_service import ApercuService
 from app.services.scoring_service import ScoringService
 
 
@@ -53,6 +54,8 @@ class TraitementService:
             'entite_denomination': entite.denomination if entite else None,
             'entite_numero_cc': entite.numero_cc if entite else None,
             'reponses_formulaire': formulaire.reponses if formulaire else {},
+            # Pièces du dossier : miniature et extrait de texte, sans les fichiers
+            'documents': ApercuService.serialize_documents(entite.documents) if entite else [],
             'commentaires_par_rubrique': traitement.commentaires_par_rubrique or {},
             'score_automatique': traitement.score_automatique,
             'score_manuel': traitement.score_manuel,
@@ -155,24 +158,18 @@ class TraitementService:
                 wf.date_validation = datetime.now(timezone.utc)
 
             # Notifier l'entreprise
-            try:
-                from app.models import Notification
-                if entite and entite.compte_entreprise_id:
-                    n = Notification(
-                        destinataire_type='entreprise',
-                        destinataire_id=entite.compte_entreprise_id,
-                        type='dossier_traite',
-                        titre='Votre dossier a ete examine',
-                        message=(
-                            "L'ARTCI a termine l'examen de votre dossier. "
-                            "Vous pouvez maintenant reviser votre formulaire si necessaire."
-                        ),
-                        entite_id=entite.id,
-                        lue=False,
-                    )
-                    db.session.add(n)
-            except Exception:
-                pass
+            if entite and entite.compte_entreprise_id:
+                from app.services.notification_service import NotificationService
+                NotificationService.notifier(
+                    'entreprise', entite.compte_entreprise_id,
+                    type='dossier_traite',
+                    titre='Votre dossier a ete examine',
+                    message=(
+                        "L'ARTCI a termine l'examen de votre dossier. "
+                        "Vous pouvez maintenant reviser votre formulaire si necessaire."
+                    ),
+                    entite_id=entite.id,
+                )
         else:  # retourne
             if wf:
                 wf.statut = StatutWorkflowEnum.brouillon  # remis en brouillon pour le traitant
@@ -3,7 +3,10 @@ Service de workflow pour ARTCI DCP Platform.
 Machine à états, assignation de demandes, validation N+1.
 """
 from datetime import datetime, timezone, date
-from app.extensions import db
+from flask import has_app_context
+from sqlalchemy import event, inspect, select as sa_select
+from sqlalchemy.orm import Session
+from app.extensions import db, event_bus
 from app.models import (
     EntiteBase, EntiteWorkflow, EntiteConformite,
     AssignationDemande, HistoriqueStatut
@@ -11,6 +14,7 @@ from app.models import (
 from app.models.enums import (
     StatutWorkflowEnum, StatutConformiteEnum, StatutAssignationEnum
 )
+from app.utils.event_bus import BROADCAST_ARTCI
 
 # Machine à états : transitions autorisées
 ALLOWED_TRANSITIONS = {
@@ -36,6 +40,22 @@ CONFORMITE_MAPPING = {
 }
 
 
+def _workflow_values(new_statut_str, now, commentaire=None):
+    """Colonnes d'EntiteWorkflow modifiées par une transition vers new_statut_str."""
+    values = {'statut': StatutWorkflowEnum(new_statut_str)}
+    if new_statut_str == 'soumis':
+        values['date_soumission'] = now
+    elif new_statut_str in ('conforme', 'conforme_sous_reserve', 'valide'):
+        values['date_validation'] = now
+    elif new_statut_str == 'rejete':
+        values['date_rejet'] = now
+        if commentaire:
+            values['motif_rejet'] = commentaire
+    elif new_statut_str == 'publie':
+        values['date_publication'] = now
+    return values
+
+
 class WorkflowService:
 
     @staticmethod
@@ -58,21 +78,12 @@ class WorkflowService:
             )
 
         ancien_statut = current
-        new_statut = StatutWorkflowEnum(new_statut_str)
-        workflow.statut = new_statut
 
-        # Mettre à jour les dates selon la transition
+        # Statut et dates selon la transition
         now = datetime.now(timezone.utc)
-        if new_statut_str == 'soumis':
-            workflow.date_soumission = now
-        elif new_statut_str in ('conforme', 'conforme_sous_reserve', 'valide'):
-            workflow.date_validation = now
-        elif new_statut_str == 'rejete':
-            workflow.date_rejet = now
-            if commentaire:
-                workflow.motif_rejet = commentaire
-        elif new_statut_str == 'publie':
-            workflow.date_publication = now
+        for column, value in _workflow_values(new_statut_str, now, commentaire).items():
+            setattr(workflow, column, value)
+        if new_statut_str == 'publie':
             # Publier sur la carte
             entite = EntiteBase.query.get(entite_id)
             if entite:
@@ -95,6 +106,122 @@ class WorkflowService:
         db.session.add(historique)
         db.session.commit()
 
+    @staticmethod
+    def transition_batch(transitions, user_id, tout_ou_rien=False):
+        """
+        Appliquer un lot de transitions [{entite_id, statut, commentaire}].
+
+        Toutes les transitions sont contrôlées d'abord contre ALLOWED_TRANSITIONS
+        (statuts courants lus en une requête, lignes verrouillées), puis les
+        transitions valides sont appliquées par mises à jour ensemblistes
+        (une par statut cible) et l'historique en une insertion groupée.
+        tout_ou_rien=True : rien n'est appliqué si une transition est refusée.
+
+        Returns dict {appliquees, refusees, resultats: [{entite_id, ok,
+        ancien_statut, nouveau_statut, erreur}]} dans l'ordre de la demande.
+        """
+        from sqlalchemy import select, update, insert
+        from app.services.detail_cache_service import DetailCacheService
+        from app.utils.http_cache import bump_if_public, bump_published_version
+
+        ids = list(dict.fromkeys(t['entite_id'] for t in transitions))
+        courants = dict(db.session.execute(
+            select(EntiteWorkflow.entite_id, EntiteWorkflow.statut)
+            .where(EntiteWorkflow.entite_id.in_(ids))
+            .with_for_update()
+        ).all())
+
+        resultats, acceptees, vus = [], [], set()
+        for t in transitions:
+            entite_id, new_statut_str = t['entite_id'], t['statut']
+            current = courants.get(entite_id)
+            resultat = {
+                'entite_id': entite_id, 'ok': False,
+                'ancien_statut': current.value if current else None,
+                'nouveau_statut': new_statut_str, 'erreur': None,
+            }
+            allowed = ALLOWED_TRANSITIONS.get(current.value, []) if current else []
+            if current is None:
+                resultat['erreur'] = 'Entité non trouvée.'
+            elif entite_id in vus:
+                resultat['erreur'] = 'Entité présente plusieurs fois dans le lot.'
+            elif new_statut_str not in allowed:
+                resultat['erreur'] = (
+                    f'Transition non autorisée : {current.value} -> {new_statut_str}. '
+                    f'Transitions possibles : {allowed}'
+                )
+            else:
+                resultat['ok'] = True
+                acceptees.append(t)
+            vus.add(entite_id)
+            resultats.append(resultat)
+
+        refusees = len(resultats) - len(acceptees)
+        if not acceptees or (tout_ou_rien and refusees):
+            db.session.rollback()
+            if tout_ou_rien:
+                for resultat in resultats:
+                    if resultat['ok']:
+                        resultat['ok'] = False
+                        resultat['erreur'] = 'Lot annulé : au moins une transition refusée.'
+            return {'appliquees': 0, 'refusees': len(resultats), 'resultats': resultats}
+
+        # Une mise à jour par (statut cible, commentaire) : le motif de rejet en dépend
+        now = datetime.now(timezone.utc)
+        groupes = {}
+        for t in acceptees:
+            groupes.setdefault((t['statut'], t.get('commentaire')), []).append(t['entite_id'])
+        for (new_statut_str, commentaire), entite_ids in groupes.items():
+            db.session.execute(
+                update(EntiteWorkflow)
+                .where(EntiteWorkflow.entite_id.in_(entite_ids))
+                .values(**_workflow_values(new_statut_str, now, commentaire)),
+                execution_options={'synchronize_session': False},
+            )
+
+        par_statut = {}
+        for t in acceptees:
+            par_statut.setdefault(t['statut'], []).append(t['entite_id'])
+        for new_statut_str, entite_ids in par_statut.items():
+            if new_statut_str in CONFORMITE_MAPPING:
+                db.session.execute(
+                    update(EntiteConformite)
+                    .where(EntiteConformite.entite_id.in_(entite_ids))
+                    .values(statut_conformite=CONFORMITE_MAPPING[new_statut_str]),
+                    execution_options={'synchronize_session': False},
+                )
+        if par_statut.get('publie'):
+            db.session.execute(
+                update(EntiteBase)
+                .where(EntiteBase.id.in_(par_statut['publie']))
+                .values(publie_sur_carte=True),
+                execution_options={'synchronize_session': False},
+            )
+
+        db.session.execute(insert(HistoriqueStatut), [
+            {
+                'entite_id': t['entite_id'],
+                'ancien_statut': courants[t['entite_id']].value,
+                'nouveau_statut': t['statut'],
+                'modifie_par': user_id,
+                'commentaire': t.get('commentaire'),
+            }
+            for t in acceptees
+        ])
+        # Les statuts changés par UPDATE groupé ne passent pas par les hooks de
+        # l'ORM : purger les fiches, la version publiée et notifier le flux SSE
+        DetailCacheService.invalidate([t['entite_id'] for t in acceptees])
+        if any(statut in CONFORMITE_MAPPING or statut == 'publie' for statut in par_statut):
+            bump_published_version()
+        else:
+            bump_if_public([t['entite_id'] for t in acceptees])
+        publier_changements_workflow([
+            (t['entite_id'], courants[t['entite_id']].value, t['statut']) for t in acceptees
+        ])
+        db.session.commit()
+
+        return {'appliquees': len(acceptees), 'refusees': refusees, 'resultats': resultats}
+
     @staticmethod
     def assign_demande(entite_id, agent_id, echeance, assigned_by):
         """
@@ -139,6 +266,141 @@ class WorkflowService:
         db.session.commit()
         return assignation
 
+    @staticmethod
+    def dispatch_demandes(assigned_by, entite_ids=None, filters=None,
+                          agent_ids=None, echeance=None):
+        """
+        Répartir en masse des demandes soumises entre les éditeurs actifs,
+        par charge ouverte croissante (assignations en_cours / en_retard).
+        Une seule transaction : assignations, transitions workflow,
+        conformité et historique en insertions / mises à jour ensemblistes.
+        agent_ids restreint la répartition à ces éditeurs ; un ID qui n'est pas
+        celui d'un éditeur actif est refusé (ValueError).
+
+        Returns dict {assignees, repartition {agent_id: n}, ignores [entite_id]}.
+        """
+        import heapq
+        from datetime import timedelta
+        from flask import current_app
+        from sqlalchemy import select, update, insert, func
+        from app.models import User
+        from app.models.enums import RoleEnum
+        from app.services.entite_service import EntiteService
+        from app.services.detail_cache_service import DetailCacheService
+        from app.schemas.entite import effective_filters
+        from app.utils.http_cache import bump_if_public
+
+        filters = effective_filters(filters)
+        if not entite_ids and not filters:
+            raise ValueError('Préciser des entités (entite_ids) ou un filtre.')
+
+        # Agents cibles : éditeurs actifs, éventuellement restreints à agent_ids
+        agents_query = select(User.id).where(
+            User.is_active == True,  # noqa: E712
+            User.role == RoleEnum.editor,
+        )
+        if agent_ids:
+            agents_query = agents_query.where(User.id.in_(agent_ids))
+        agents = db.session.execute(agents_query).scalars().all()
+        if agent_ids:
+            refuses = sorted(set(agent_ids) - set(agents))
+            if refuses:
+                raise ValueError(
+                    f"Agent(s) non éligible(s) (éditeur actif requis) : {', '.join(refuses)}."
+                )
+        if not agents:
+            raise ValueError('Aucun agent actif disponible pour la répartition.')
+
+        # Demandes éligibles (soumises), verrouillées contre un dispatch concurrent
+        candidates = select(EntiteWorkflow.entite_id).where(
+            EntiteWorkflow.statut == StatutWorkflowEnum.soumis
+        )
+        if entite_ids:
+            candidates = candidates.where(EntiteWorkflow.entite_id.in_(entite_ids))
+        if filters:
+            filtered = EntiteService.apply_entite_filters(
+                db.session.query(EntiteBase.id), filters
+            )
+            candidates = candidates.where(EntiteWorkflow.entite_id.in_(filtered.statement))
+        candidates = candidates.order_by(EntiteWorkflow.date_soumission.asc().nulls_last())
+        eligible = db.session.execute(
+            candidates.with_for_update(skip_locked=True)
+        ).scalars().all()
+        ignores = sorted(set(entite_ids or []) - set(eligible))
+        if not eligible:
+            return {'assignees': 0, 'repartition': {}, 'ignores': ignores}
+
+        # Charge ouverte actuelle des agents (index ix_assign_agent_statut)
+        charges = dict(db.session.execute(
+            select(AssignationDemande.agent_id, func.count())
+            .where(
+                AssignationDemande.agent_id.in_(agents),
+                AssignationDemande.statut.in_([
+                    StatutAssignationEnum.en_cours, StatutAssignationEnum.en_retard
+                ]),
+            )
+            .group_by(AssignationDemande.agent_id)
+        ).all())
+        heap = [(charges.get(agent_id, 0), agent_id) for agent_id in agents]
+        heapq.heapify(heap)
+
+        repartition = {}
+        for entite_id in eligible:
+            charge, agent_id = heapq.heappop(heap)
+            repartition.setdefault(agent_id, []).append(entite_id)
+            heapq.heappush(heap, (charge + 1, agent_id))
+
+        if echeance is None:
+            echeance = date.today() + timedelta(
+                days=current_app.config.get('ASSIGNATION_DELAI_JOURS', 15)
+            )
+        now = datetime.now(timezone.utc)
+
+        db.session.execute(insert(AssignationDemande), [
+            {
+                'entite_id': entite_id, 'agent_id': agent_id, 'echeance': echeance,
+                'statut': StatutAssignationEnum.en_cours, 'date_assignation': now,
+            }
+            for agent_id, ids in repartition.items() for entite_id in ids
+        ])
+        for agent_id, ids in repartition.items():
+            db.session.execute(
+                update(EntiteWorkflow)
+                .where(EntiteWorkflow.entite_id.in_(ids))
+                .values(statut=StatutWorkflowEnum.en_verification, assignedTo=agent_id),
+                execution_options={'synchronize_session': False},
+            )
+        db.session.execute(
+            update(EntiteConformite)
+            .where(EntiteConformite.entite_id.in_(eligible))
+            .values(statut_conformite=CONFORMITE_MAPPING['en_verification']),
+            execution_options={'synchronize_session': False},
+        )
+        db.session.execute(insert(HistoriqueStatut), [
+            {
+                'entite_id': entite_id,
+                'ancien_statut': 'soumis',
+                'nouveau_statut': 'en_verification',
+                'modifie_par': assigned_by,
+                'commentaire': f'Demande assignée à l\'agent {agent_id} (répartition automatique)',
+            }
+            for agent_id, ids in repartition.items() for entite_id in ids
+        ])
+        # Toutes les demandes réparties passent soumis -> en_verification en une
+        # seule instruction : leurs fiches en cache portent encore « soumis »
+        DetailCacheService.invalidate(eligible)
+        bump_if_public(eligible)
+        publier_changements_workflow([
+            (entite_id, 'soumis', 'en_verification') for entite_id in eligible
+        ])
+        db.session.commit()
+
+        return {
+            'assignees': len(eligible),
+            'repartition': {agent_id: len(ids) for agent_id, ids in repartition.items()},
+            'ignores': ignores,
+        }
+
     @staticmethod
     def traiter_assignation(assignation_id, agent_id):
         """
@@ -205,18 +467,105 @@ class WorkflowService:
     @staticmethod
     def check_echeances_depassees():
         """
-        Marquer les assignations en retard (échéance dépassée).
+        Marquer les assignations en retard (échéance dépassée) en un seul
+        UPDATE ... RETURNING, puis notifier les agents concernés en masse.
+        Returns dict {en_retard, notifications}.
         """
+        from sqlalchemy import update, select
+        from app.services.notification_service import NotificationService
+
         today = date.today()
-        overdue = AssignationDemande.query.filter(
-            AssignationDemande.echeance < today,
-            AssignationDemande.statut == StatutAssignationEnum.en_cours
+        overdue = db.session.execute(
+            update(AssignationDemande)
+            .where(
+                AssignationDemande.statut == StatutAssignationEnum.en_cours,
+                AssignationDemande.echeance < today,
+            )
+            .values(statut=StatutAssignationEnum.en_retard)
+            .returning(
+                AssignationDemande.agent_id, AssignationDemande.entite_id,
+                AssignationDemande.echeance
+            ),
+            execution_options={'synchronize_session': False},
         ).all()
 
-        for assignation in overdue:
-            assignation.statut = StatutAssignationEnum.en_retard
-
-        if overdue:
+        if not overdue:
             db.session.commit()
+            return {'en_retard': 0, 'notifications': 0}
+
+        denominations = dict(db.session.execute(
+            select(EntiteBase.id, EntiteBase.denomination)
+            .where(EntiteBase.id.in_({row.entite_id for row in overdue}))
+        ).all())
+        notifications = NotificationService.creer([
+            {
+                'destinataire_type': 'artci',
+                'destinataire_id': row.agent_id,
+                'type': 'echeance',
+                'titre': 'Échéance dépassée',
+                'message': (
+                    f"Le dossier {denominations.get(row.entite_id, row.entite_id)} "
+                    f"devait être traité avant le {row.echeance.strftime('%d/%m/%Y')}."
+                ),
+                'entite_id': row.entite_id,
+            }
+            for row in overdue
+        ])
+        db.session.commit()
+        return {'en_retard': len(overdue), 'notifications': notifications}
+
+
+# ============================================================
+# Événements temps réel (flux SSE) des changements de statut
+# ============================================================
+
+def publier_changements_workflow(changements, session=None):
+    """
+    Publier des changements de statut [(entite_id, ancien, nouveau)] :
+    au personnel ARTCI (par paquets de 50) et à l'entreprise propriétaire.
+    Délivrés au commit de la transaction.
+    """
+    session = session or db.session
+    if not changements:
+        return
+    owners = dict(session.connection().execute(
+        sa_select(EntiteBase.id, EntiteBase.compte_entreprise_id)
+        .where(EntiteBase.id.in_({c[0] for c in changements}))
+    ).all())
+    items = [
+        {'entite_id': entite_id, 'ancien_statut': ancien, 'nouveau_statut': nouveau}
+        for entite_id, ancien, nouveau in changements
+    ]
+    for i in range(0, len(items), 50):
+        event_bus.publish(
+            [('artci', BROADCAST_ARTCI)], 'workflow', {'changements': items[i:i + 50]},
+            session=session
+        )
+    for item in items:
+        owner = owners.get(item['entite_id'])
+        if owner:
+            event_bus.publish(
+                [('entreprise', owner)], 'workflow', {'changements': [item]}, session=session
+            )
+
 
-        return overdue
+def _statut_value(statut):
+    return statut.value if isinstance(statut, StatutWorkflowEnum) else statut
+
+
+@event.listens_for(Session, 'after_flush')
+def _publier_workflow_on_flush(session, flush_context):
+    # Transitions faites par l'ORM (transition_statut, traitements, retours...)
+    changements = []
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, EntiteWorkflow):
+            continue
+        history = inspect(obj).attrs.statut.history
+        if not history.added or history.added[0] is None:
+            continue
+        ancien = _statut_value(history.deleted[0]) if history.deleted else None
+        nouveau = _statut_value(history.added[0])
+        if ancien != nouveau:
+            changements.append((obj.entite_id, ancien, nouveau))
+    if changements and has_app_context():
+        publier_changements_workflow(changements, session=session)
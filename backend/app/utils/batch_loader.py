@@ -0,0 +1,87 @@
+"""
+Chargement groupé des relations ONE-TO-MANY (lazy='dynamic') pour la lecture.
+
+Les relations dynamiques interdisent selectinload : sérialiser N entités coûte
+N requêtes par relation. batch_load_children() charge, pour un ensemble
+d'entités, tous les enfants d'une relation en UNE requête `IN`, puis renvoie
+des vues PreloadedEntity que les schémas Marshmallow parcourent sans requête.
+"""
+from collections import defaultdict
+from sqlalchemy import inspect
+
+
+class PreloadedList(list):
+    """Liste d'enfants préchargés, compatible avec l'API AppenderQuery usuelle."""
+
+    def all(self):
+        return list(self)
+
+    def first(self):
+        return self[0] if self else None
+
+    def count(self, *args):
+        # list.count(x) reste disponible ; sans argument = nombre d'éléments
+        return super().count(*args) if args else len(self)
+
+
+class PreloadedEntity:
+    """
+    Vue lecture seule d'un objet ORM dont certaines relations sont préchargées.
+    Les autres attributs sont délégués à l'objet d'origine.
+    """
+    __slots__ = ('_obj', '_children')
+
+    def __init__(self, obj, children):
+        object.__setattr__(self, '_obj', obj)
+        object.__setattr__(self, '_children', children)
+
+    def __getattr__(self, name):
+        children = object.__getattribute__(self, '_children')
+        if name in children:
+            return children[name]
+        return getattr(object.__getattribute__(self, '_obj'), name)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PreloadedEntity est en lecture seule.')
+
+    def __repr__(self):
+        return f'<Preloaded {object.__getattribute__(self, "_obj")!r}>'
+
+
+def dynamic_relationships(model):
+    """Noms des relations lazy='dynamic' d'un modèle."""
+    return [rel.key for rel in inspect(model).relationships if rel.lazy == 'dynamic']
+
+
+def batch_load_children(objs, relations=None):
+    """
+    Précharger `relations` (toutes les relations dynamiques par défaut) pour
+    une liste d'objets ORM du même modèle.
+
+    Returns:
+        liste de PreloadedEntity dans le même ordre que `objs`.
+    """
+    objs = [o for o in objs if o is not None]
+    if not objs:
+        return []
+
+    mapper = inspect(type(objs[0]))
+    if relations is None:
+        relations = dynamic_relationships(type(objs[0]))
+    ids = [o.id for o in objs]
+
+    loaded = {o.id: {} for o in objs}
+    for name in relations:
+        rel = mapper.relationships[name]
+        target = rel.mapper.class_
+        # Relation ONE-TO-MANY simple : une seule colonne FK côté enfant
+        (fk_column,) = rel.remote_side
+        fk_attr = getattr(target, fk_column.key)
+
+        grouped = defaultdict(PreloadedList)
+        for child in target.query.filter(fk_attr.in_(ids)):
+            grouped[getattr(child, fk_column.key)].append(child)
+        for obj_id in ids:
+            loaded[obj_id][name] = grouped.get(obj_id, PreloadedList())
+
+    return [PreloadedEntity(o, loaded[o.id]) for o in objs]
@@ -0,0 +1,107 @@
+"""
+Compression des réponses (gzip, brotli) pour ARTCI DCP Platform.
+
+Les fiches (EntiteDetailOutputSchema), dossiers de traitement (réponses
+complètes) et pages de liste font des dizaines à centaines de Ko de JSON
+très redondant : compressés, ils se réduisent d'un facteur 5 à 10 sur les
+réseaux mobiles des entreprises.
+
+init_compression(app) enregistre un after_request qui compresse si :
+- le client l'accepte (Accept-Encoding) : br si le module brotli est
+  installé, sinon gzip ;
+- le type MIME est dans COMPRESS_MIMETYPES et le corps dépasse
+  COMPRESS_MIN_SIZE octets (seuil ajustable par blueprint) ;
+- la réponse est un corps en mémoire : fichiers (send_file, X-Accel-Redirect,
+  X-Sendfile), flux (SSE, exports en streaming), réponses partielles (206)
+  et contenus déjà encodés ne sont jamais touchés.
+
+COMPRESS_BLUEPRINTS règle chaque blueprint : "events=off,public=512"
+(off = jamais, nombre = seuil en octets).
+"""
+import gzip
+from flask import current_app, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    brotli = None
+
+
+def _parse_blueprints(value):
+    """{'events': None, 'public': 512} depuis "events=off,public=512" (ou dict)."""
+    if isinstance(value, dict):
+        return value
+    reglages = {}
+    for item in (value or '').split(','):
+        nom, sep, seuil = item.strip().partition('=')
+        if not sep or not nom:
+            continue
+        seuil = seuil.strip().lower()
+        reglages[nom.strip()] = None if seuil in ('off', 'false', '0', 'non') else int(seuil)
+    return reglages
+
+
+def _min_size(config):
+    """Seuil applicable à la requête courante, ou None si compression désactivée."""
+    reglages = _parse_blueprints(config.get('COMPRESS_BLUEPRINTS'))
+    if request.blueprint in reglages:
+        return reglages[request.blueprint]
+    return config.get('COMPRESS_MIN_SIZE', 1024)
+
+
+def _encoding():
+    """Encodage retenu selon Accept-Encoding (préférence serveur : br puis gzip)."""
+    offerts = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offerts)
+
+
+def _compressible(response, config):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if response.direct_passthrough or response.is_streamed:
+        return False
+    headers = response.headers
+    if 'Content-Encoding' in headers or 'X-Accel-Redirect' in headers or 'X-Sendfile' in headers:
+        return False
+    if 'no-transform' in (headers.get('Cache-Control') or ''):
+        return False
+    return response.mimetype in config.get('COMPRESS_MIMETYPES', ())
+
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config.get('COMPRESS_BR_LEVEL', 4))
+    return gzip.compress(data, compresslevel=config.get('COMPRESS_LEVEL', 6), mtime=0)
+
+
+def compress_response(response):
+    config = current_app.config
+    if not config.get('COMPRESS_ENABLED', True) or not _compressible(response, config):
+        return response
+    # Le contenu varie selon Accept-Encoding même quand on ne compresse pas
+    response.vary.add('Accept-Encoding')
+
+    min_size = _min_size(config)
+    if min_size is None:
+        return response
+    encoding = _encoding()
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    compressed = compress(data, encoding, config)
+    if len(compressed) >= len(data):
+        return response
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    # Représentation différente : ETag faible (comparaison faible des If-None-Match)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
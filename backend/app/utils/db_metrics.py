@@ -0,0 +1,122 @@
+"""
+Instrumentation SQL par requête HTTP pour ARTCI DCP Platform.
+
+Les événements before/after_cursor_execute de SQLAlchemy (tous les moteurs)
+comptent les requêtes SQL et leur durée :
+- par requête HTTP (flask.g) : en-têtes X-DB-Queries, X-DB-Time-Ms et
+  Server-Timing en debug ou avec DB_METRICS_HEADER ;
+- par endpoint et pour le processus : agrégats exposés par GET /metrics
+  (format texte Prometheus, un worker gunicorn par collecte).
+
+Détecteur N+1 : au-delà de DB_QUERY_BUDGET requêtes pour une même requête
+HTTP, un avertissement est journalisé avec l'instruction la plus répétée.
+Les requêtes exécutées hors requête HTTP (tâches, pool des aperçus, CLI)
+ne comptent que dans les totaux du processus.
+"""
+import threading
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_lock = threading.Lock()
+_totaux = {'requetes_sql': 0, 'duree_sql': 0.0, 'requetes_sql_hors_http': 0}
+_endpoints = {}
+
+
+def _stats_requete():
+    if not has_request_context():
+        return None
+    return g.get('_db_stats')
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _avant_execution(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_db_debuts', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _apres_execution(conn, cursor, statement, parameters, context, executemany):
+    debuts = conn.info.get('_db_debuts')
+    if not debuts:
+        return
+    duree = time.perf_counter() - debuts.pop()
+    stats = _stats_requete()
+    with _lock:
+        _totaux['requetes_sql'] += 1
+        _totaux['duree_sql'] += duree
+        if stats is None:
+            _totaux['requetes_sql_hors_http'] += 1
+    if stats is not None:
+        stats['requetes'] += 1
+        stats['duree'] += duree
+        stats['instructions'][statement] += 1
+
+
+@event.listens_for(Engine, 'handle_error')
+def _erreur_execution(exception_context):
+    # after_cursor_execute n'est pas appelé en cas d'erreur : dépiler le départ
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('_db_debuts'):
+        conn.info['_db_debuts'].pop()
+
+
+def _debut_requete():
+    if current_app.config.get('DB_METRICS_ENABLED', True):
+        g._db_stats = {'requetes': 0, 'duree': 0.0, 'instructions': Counter()}
+
+
+def _fin_requete(response):
+    stats = g.pop('_db_stats', None)
+    if stats is None:
+        return response
+    config = current_app.config
+    endpoint = request.endpoint or 'inconnu'
+    with _lock:
+        agregat = _endpoints.setdefault(
+            endpoint, {'requetes_http': 0, 'requetes_sql': 0, 'duree_sql': 0.0, 'max_requetes_sql': 0}
+        )
+        agregat['requetes_http'] += 1
+        agregat['requetes_sql'] += stats['requetes']
+        agregat['duree_sql'] += stats['duree']
+        agregat['max_requetes_sql'] = max(agregat['max_requetes_sql'], stats['requetes'])
+
+    if current_app.debug or config.get('DB_METRICS_HEADER'):
+        duree_ms = stats['duree'] * 1000
+        response.headers['X-DB-Queries'] = str(stats['requetes'])
+        response.headers['X-DB-Time-Ms'] = f'{duree_ms:.1f}'
+        response.headers.add('Server-Timing', f'db;desc="SQL x{stats["requetes"]}";dur={duree_ms:.1f}')
+
+    budget = config.get('DB_QUERY_BUDGET', 30)
+    if budget and stats['requetes'] > budget:
+        instruction, repetitions = stats['instructions'].most_common(1)[0]
+        current_app.logger.warning(
+            f'{request.method} {request.path} ({endpoint}) : {stats["requetes"]} requêtes SQL '
+            f'(budget {budget}), {repetitions}x : {" ".join(instruction.split())[:300]}'
+        )
+    return response
+
+
+def snapshot():
+    """Copie des compteurs du processus : (totaux, {endpoint: agrégat})."""
+    with _lock:
+        return dict(_totaux), {e: dict(a) for e, a in _endpoints.items()}
+
+
+def pool_status(engine):
+    """État du pool de connexions (QueuePool) ; {} pour un autre type de pool."""
+    pool = engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return {}
+    return {
+        'taille': pool.size(),
+        'utilisees': pool.checkedout(),
+        'disponibles': pool.checkedin(),
+        'debordement': pool.overflow(),
+    }
+
+
+def init_db_metrics(app):
+    app.before_request(_debut_requete)
+    app.after_request(_fin_requete)
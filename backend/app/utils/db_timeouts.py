@@ -0,0 +1,23 @@
+"""
+Délai d'exécution des requêtes SQL pour ARTCI DCP Platform.
+
+En production, chaque connexion du pool porte un statement_timeout
+(DB_STATEMENT_TIMEOUT_MS, voir config.engine_options) qui protège les
+requêtes HTTP. Les traitements de maintenance (sauvegarde, restauration,
+rattrapages en masse) le lèvent pour leur seule transaction.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+
+def disable_statement_timeout(bind):
+    """
+    Lever le statement_timeout pour la transaction courante (SET LOCAL) :
+    rétabli automatiquement au commit / rollback. Sans effet hors PostgreSQL.
+
+    Args:
+        bind: Connection ou Session SQLAlchemy (db.session compris)
+    """
+    connection = bind if isinstance(bind, Connection) else bind.connection()
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('SET LOCAL statement_timeout = 0'))
@@ -0,0 +1,197 @@
+"""
+Bus d'événements temps réel ARTCI DCP (flux SSE /api/events/stream).
+
+Un événement vise un destinataire ('artci', user_id), ('entreprise', compte_id)
+ou tout le personnel ARTCI ('artci', '*'). Deux backends :
+
+- postgres : pg_notify dans la transaction courante (délivré au commit,
+  annulé avec elle) ; chaque worker gunicorn écoute le canal (LISTEN) sur une
+  connexion dédiée et redistribue aux flux SSE qu'il sert.
+- memory : événements gardés dans session.info et distribués au commit aux
+  abonnés du même processus (tests, développement sur un seul worker).
+"""
+import json
+import queue
+import select
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event, func
+from sqlalchemy import select as sa_select
+from sqlalchemy.orm import Session
+
+CHANNEL = 'artci_events'
+BROADCAST_ARTCI = '*'
+
+# Limite PostgreSQL : 8000 octets par NOTIFY
+_MAX_PAYLOAD = 7900
+
+
+def channel_key(destinataire_type, destinataire_id):
+    return f'{destinataire_type}:{destinataire_id}'
+
+
+class Subscription:
+    """File d'événements d'un flux SSE ; à utiliser comme context manager."""
+
+    def __init__(self, bus, keys, maxsize=256):
+        self.bus = bus
+        self.keys = frozenset(keys)
+        self.queue = queue.Queue(maxsize=maxsize)
+
+    def get(self, timeout):
+        """Prochain événement {event, data}, ou None après timeout secondes."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def __enter__(self):
+        self.bus._add(self)
+        return self
+
+    def __exit__(self, *exc):
+        self.bus._remove(self)
+
+
+class EventBus:
+
+    def __init__(self, app=None):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        self._listener = None
+        self._engine = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('EVENTS_BACKEND', 'auto')
+        app.config.setdefault('EVENTS_HEARTBEAT', 15)
+        app.extensions['event_bus'] = self
+
+    # --- Publication ---
+
+    @staticmethod
+    def _backend(dialect_name):
+        backend = current_app.config.get('EVENTS_BACKEND', 'auto')
+        if backend == 'auto':
+            backend = 'postgres' if dialect_name == 'postgresql' else 'memory'
+        return backend
+
+    def publish(self, destinataires, event_name, data, session=None):
+        """
+        Publier un événement dans la transaction de `session` (db.session par défaut).
+        destinataires : liste de couples (destinataire_type, destinataire_id).
+        """
+        from app.extensions import db
+        session = session or db.session
+        keys = sorted({channel_key(t, d) for t, d in destinataires if d})
+        if not keys:
+            return
+        payload = json.dumps(
+            {'k': keys, 'e': event_name, 'd': data}, ensure_ascii=False, default=str
+        )
+        if len(payload.encode('utf-8')) > _MAX_PAYLOAD:
+            current_app.logger.warning(f'Événement {event_name} trop volumineux, ignoré.')
+            return
+
+        if self._backend(session.get_bind().dialect.name) == 'postgres':
+            session.connection().execute(sa_select(func.pg_notify(CHANNEL, payload)))
+        else:
+            session.info.setdefault('_pending_events', []).append(payload)
+
+    def dispatch(self, payload):
+        """Distribuer un événement (JSON) aux abonnés locaux concernés."""
+        message = json.loads(payload)
+        keys = set(message['k'])
+        item = {'event': message['e'], 'data': message['d']}
+        with self._lock:
+            targets = [s for key in keys for s in self._subscribers.get(key, ())]
+        for subscription in set(targets):
+            try:
+                subscription.queue.put_nowait(item)
+            except queue.Full:
+                # Client trop lent : on perd l'événement plutôt que de bloquer
+                pass
+
+    # --- Abonnements ---
+
+    def subscribe(self, keys):
+        from app.extensions import db
+        if self._backend(db.engine.dialect.name) == 'postgres':
+            self._ensure_listener()
+        return Subscription(self, keys)
+
+    def _add(self, subscription):
+        with self._lock:
+            for key in subscription.keys:
+                self._subscribers.setdefault(key, set()).add(subscription)
+
+    def _remove(self, subscription):
+        with self._lock:
+            for key in subscription.keys:
+                subs = self._subscribers.get(key)
+                if subs is not None:
+                    subs.discard(subscription)
+                    if not subs:
+                        del self._subscribers[key]
+
+    # --- Écoute PostgreSQL ---
+
+    def _ensure_listener(self):
+        from app.extensions import db
+        with self._lock:
+            if self._listener is not None and self._listener.is_alive():
+                return
+            self._engine = db.engine
+            self._listener = threading.Thread(
+                target=self._listen_forever, name='event-bus-listener', daemon=True
+            )
+            self._listener.start()
+
+    def _listen_forever(self):
+        """Connexion LISTEN dédiée ; reconnexion avec backoff en cas de coupure."""
+        delay = 1
+        while True:
+            conn = None
+            try:
+                conn = self._engine.raw_connection()
+                driver_conn = conn.driver_connection
+                driver_conn.autocommit = True
+                cursor = driver_conn.cursor()
+                cursor.execute(f'LISTEN {CHANNEL}')
+                delay = 1
+                while True:
+                    if select.select([driver_conn], [], [], 30) == ([], [], []):
+                        continue
+                    driver_conn.poll()
+                    while driver_conn.notifies:
+                        self.dispatch(driver_conn.notifies.pop(0).payload)
+            except Exception:
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.invalidate()
+                    except Exception:
+                        pass
+
+
+# ============================================================
+# Backend mémoire : distribution au commit
+# ============================================================
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_pending(session):
+    pending = session.info.pop('_pending_events', None)
+    if not pending:
+        return
+    from app.extensions import event_bus
+    for payload in pending:
+        event_bus.dispatch(payload)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    session.info.pop('_pending_events', None)
@@ -0,0 +1,87 @@
+"""
+Envoi de fichiers (documents, sauvegardes) pour ARTCI DCP Platform.
+
+- Requêtes conditionnelles et Range (reprise de téléchargement, 206) via
+  send_file(conditional=True) ; ETag fort = SHA-256 du contenu quand il est connu.
+- DOWNLOAD_ACCEL délègue la transmission au serveur web frontal, le worker
+  gunicorn ne fait que les contrôles d'accès :
+      x-accel   -> en-tête X-Accel-Redirect (nginx, location `internal`) ;
+                   DOWNLOAD_ACCEL_MAP="/chemin/local=/prefixe-interne,..."
+      x-sendfile -> en-tête X-Sendfile (Apache mod_xsendfile, lighttpd)
+  Les fichiers hors des racines déclarées sont servis normalement.
+"""
+import os
+from urllib.parse import quote
+from flask import Response, current_app, request, send_file
+
+
+def _accel_map():
+    pairs = []
+    for item in (current_app.config.get('DOWNLOAD_ACCEL_MAP') or '').split(','):
+        root, sep, prefix = item.strip().partition('=')
+        if sep and root and prefix:
+            pairs.append((os.path.abspath(root), '/' + prefix.strip('/') + '/'))
+    return pairs
+
+
+def _internal_uri(path):
+    path = os.path.abspath(path)
+    for root, prefix in _accel_map():
+        if path.startswith(root + os.sep):
+            rel = os.path.relpath(path, root).replace(os.sep, '/')
+            return prefix + quote(rel)
+    return None
+
+
+def content_disposition(download_name, as_attachment=True):
+    kind = 'attachment' if as_attachment else 'inline'
+    ascii_name = download_name.encode('ascii', 'ignore').decode('ascii').replace('"', '') or 'fichier'
+    return f'{kind}; filename="{ascii_name}"; filename*=UTF-8\'\'{quote(download_name)}'
+
+
+def _offloaded(path, mode, download_name, mimetype, etag, as_attachment):
+    if mode == 'x-accel':
+        uri = _internal_uri(path)
+        if uri is None:
+            return None
+        header = ('X-Accel-Redirect', uri)
+    elif mode == 'x-sendfile':
+        header = ('X-Sendfile', os.path.abspath(path))
+    else:
+        return None
+
+    response = Response(status=200, mimetype=mimetype or 'application/octet-stream')
+    response.headers[header[0]] = header[1]
+    response.headers['Content-Disposition'] = content_disposition(download_name, as_attachment)
+    if etag:
+        response.set_etag(etag)
+    # 304 si le client a déjà cette version ; le Range est traité par le serveur frontal
+    return response.make_conditional(request)
+
+
+def send_download(source, download_name, mimetype=None, etag=None, as_attachment=True):
+    """
+    Envoyer un fichier (chemin local ou flux binaire).
+
+    Args:
+        source: chemin local (délégable au serveur frontal) ou objet fichier
+        etag: valeur d'ETag forte (ex. sha256) ; à défaut, calculée par
+              Werkzeug pour un chemin, aucune pour un flux
+    """
+    if isinstance(source, str):
+        mode = current_app.config.get('DOWNLOAD_ACCEL', '')
+        if mode:
+            response = _offloaded(source, mode, download_name, mimetype, etag, as_attachment)
+            if response is not None:
+                return response
+    elif etag is None:
+        etag = False
+
+    return send_file(
+        source,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=True,
+        etag=etag if etag is not None else True,
+    )
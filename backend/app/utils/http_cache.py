@@ -0,0 +1,282 @@
+"""
+Cache HTTP des endpoints publics pour ARTCI DCP Platform.
+
+- ETag = hash(version des données publiées + chemin + query string normalisée).
+  La version (table cache_versions, partagée entre workers) est incrémentée
+  automatiquement par un flush qui publie / dépublie une entité, change une
+  conformité, ou modifie une colonne lue par les vues publiques (PUBLIC_COLUMNS)
+  d'une entité visible (publiée ou conforme). Brouillons, champs privés et
+  workflow interne ne l'incrémentent pas : la ligne de version, verrouillée
+  jusqu'au commit, ne sérialise pas toutes les écritures d'entités.
+- GET conditionnel : If-None-Match / If-Modified-Since -> 304 sans exécuter la vue.
+- LRU en mémoire (par worker) des corps de réponse pour les clés chaudes.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, request, make_response
+from sqlalchemy import event, inspect, or_, select
+from sqlalchemy.orm import Session
+
+
+PUBLISHED_DATA = 'published_data'
+
+# Colonnes lues par /api/public/* (EntiteListOutputSchema, EntitePublicDetailSchema,
+# filtres et statistiques), par modèle
+PUBLIC_COLUMNS = {
+    'EntiteBase': frozenset({
+        'denomination', 'numero_cc', 'decret_creation', 'forme_juridique', 'secteur_activite',
+        'adresse', 'ville', 'region', 'telephone', 'email', 'origine_saisie', 'publie_sur_carte',
+    }),
+    'EntiteConformite': frozenset({
+        'entite_id', 'statut_conformite', 'score_conformite', 'a_dpo', 'volume_donnees_traitees',
+    }),
+    'EntiteWorkflow': frozenset({'entite_id', 'statut', 'numero_autorisation_artci'}),
+    'EntiteLocalisation': frozenset({'entite_id', 'latitude', 'longitude'}),
+    'EntiteContact': frozenset({
+        'entite_id', 'responsable_legal_nom', 'responsable_legal_fonction',
+        'responsable_legal_email', 'responsable_legal_telephone', 'site_web',
+    }),
+    'DPO': frozenset({
+        'entite_id', 'nom', 'prenom', 'email', 'telephone', 'type', 'organisme', 'date_designation',
+    }),
+    'FinaliteBaseLegale': frozenset({'entite_id', 'finalite', 'base_legale', 'pourcentage', 'description'}),
+    'DocumentJoint': frozenset({'entite_id', 'type_document'}),
+}
+
+_SESSION_FLAG = 'published_version_bumped'
+
+
+# ============================================================
+# VERSION DES DONNÉES PUBLIÉES
+# ============================================================
+
+def get_published_version():
+    """Returns (version, updatedAt) du compteur 'published_data'."""
+    from app.extensions import db
+    from app.models.cache_versions import CacheVersion
+
+    row = db.session.get(CacheVersion, PUBLISHED_DATA)
+    if row is None:
+        return 0, None
+    return row.version, row.updatedAt
+
+
+def published_version_upsert(dialect='postgresql'):
+    """
+    INSERT … ON CONFLICT DO UPDATE du compteur 'published_data' : la ligne
+    est créée si absente (base créée par create_all / seed.py, sans la
+    migration qui l'initialise), sinon incrémentée.
+    """
+    from app.models.cache_versions import CacheVersion
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+
+    table = CacheVersion.__table__
+    now = datetime.now(timezone.utc)
+    return insert(table).values(name=PUBLISHED_DATA, version=1, updatedAt=now).on_conflict_do_update(
+        index_elements=[table.c.name],
+        set_={'version': table.c.version + 1, 'updatedAt': now},
+    )
+
+
+def bump_if_public(entite_ids, session=None):
+    """bump_published_version après une mise à jour en masse, si l'une des entités est visible."""
+    from app.extensions import db
+
+    session = session or db.session
+    if public_entite_ids(session, entite_ids):
+        bump_published_version(session)
+
+
+def bump_published_version(session=None):
+    """
+    Incrémenter la version des données publiées (une seule fois par transaction).
+    À appeler explicitement après des UPDATE/DELETE en masse qui contournent
+    l'unit of work (les flush ORM sont couverts par le listener).
+    """
+    from app.extensions import db
+
+    session = session or db.session
+    if session.info.get(_SESSION_FLAG):
+        return
+    session.info[_SESSION_FLAG] = True
+    connection = session.connection()
+    connection.execute(published_version_upsert(connection.dialect.name))
+
+
+def _changed(obj, keys):
+    attrs = inspect(obj).attrs
+    return any(attrs[key].history.has_changes() for key in keys)
+
+
+def _entite_id(obj):
+    """entite_id d'un enfant, y compris rattaché par relation et pas encore flushé."""
+    if obj.entite_id is not None:
+        return obj.entite_id
+    for relationship in inspect(obj).mapper.relationships:
+        if relationship.mapper.class_.__name__ == 'EntiteBase':
+            parent = getattr(obj, relationship.key)
+            return parent.id if parent is not None else None
+    return None
+
+
+def public_entite_ids(session, entite_ids):
+    """Parmi entite_ids, celles visibles publiquement (publiées ou conformes), état en base."""
+    from app.models import EntiteBase, EntiteConformite
+    from app.models.enums import StatutConformiteEnum
+
+    entite_ids = [e for e in set(entite_ids) if e]
+    if not entite_ids:
+        return set()
+    return set(session.connection().scalars(
+        select(EntiteBase.id).outerjoin(EntiteConformite, EntiteConformite.entite_id == EntiteBase.id)
+        .where(EntiteBase.id.in_(entite_ids), or_(
+            EntiteBase.publie_sur_carte.is_(True),
+            EntiteConformite.statut_conformite == StatutConformiteEnum.conforme,
+        ))
+    ))
+
+
+def _touches_public_data(session):
+    """
+    True si le flush change une donnée publique : publication / dépublication
+    et conformité toujours ; sinon colonne de PUBLIC_COLUMNS (ou ligne créée /
+    supprimée) d'une entité visible avant le flush.
+    """
+    candidates = set()
+    for obj, state in ([(o, 'new') for o in session.new] + [(o, 'deleted') for o in session.deleted]
+                       + [(o, 'dirty') for o in session.dirty]):
+        name = type(obj).__name__
+        columns = PUBLIC_COLUMNS.get(name)
+        if columns is None:
+            continue
+        if name == 'EntiteConformite':
+            if state != 'dirty' or _changed(obj, columns):
+                return True
+            continue
+        if name == 'EntiteBase':
+            if state == 'new':
+                if obj.publie_sur_carte:
+                    return True
+                continue
+            if state == 'dirty' and _changed(obj, ('publie_sur_carte',)):
+                return True
+        if state == 'dirty' and not _changed(obj, columns):
+            continue
+        candidates.add(obj.id if name == 'EntiteBase' else _entite_id(obj))
+    return bool(public_entite_ids(session, candidates))
+
+
+@event.listens_for(Session, 'before_flush')
+def _detect_public_changes(session, flush_context, instances):
+    # before_flush : new/dirty/deleted sont encore renseignés
+    if not session.info.get(_SESSION_FLAG) and _touches_public_data(session):
+        session.info['published_data_pending'] = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_on_public_changes(session, flush_context):
+    if session.info.pop('published_data_pending', False):
+        bump_published_version(session)
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_soft_rollback')
+def _reset_bump_flag(session, *args):
+    session.info.pop(_SESSION_FLAG, None)
+    session.info.pop('published_data_pending', None)
+
+
+# ============================================================
+# LRU EN MÉMOIRE
+# ============================================================
+
+class LRUCache:
+    """Cache LRU borné et thread-safe."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_response_cache = LRUCache()
+
+
+def normalized_query_string():
+    """Query string triée, sans paramètres vides (clés équivalentes -> même cache)."""
+    items = sorted(
+        (k, v) for k, values in request.args.lists() for v in values if v != ''
+    )
+    return '&'.join(f'{k}={v}' for k, v in items)
+
+
+def _apply_cache_headers(response, etag, last_modified, max_age):
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
+
+
+def cached_public_response(fn):
+    """
+    Décorateur des vues publiques en lecture : ETag, Last-Modified,
+    Cache-Control, 304 conditionnel et LRU des réponses 200.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not current_app.config.get('PUBLIC_CACHE_ENABLED', True) or request.method != 'GET':
+            return fn(*args, **kwargs)
+
+        version, last_modified = get_published_version()
+        max_age = current_app.config.get('PUBLIC_CACHE_MAX_AGE', 60)
+        key = f'{version}:{request.path}?{normalized_query_string()}'
+        etag = f'v{version}-' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+        # Comparaison faible : l'ETag devient W/ quand la réponse est compressée
+        if request.if_none_match.contains_weak(etag) or (
+                last_modified is not None and request.if_modified_since
+                and not request.if_none_match
+                and last_modified.replace(microsecond=0) <= request.if_modified_since):
+            response = current_app.response_class(status=304)
+            return _apply_cache_headers(response, etag, last_modified, max_age)
+
+        _response_cache.max_entries = current_app.config.get('PUBLIC_CACHE_MAX_ENTRIES', 512)
+        cached = _response_cache.get(key)
+        if cached is not None:
+            body, mimetype = cached
+            response = current_app.response_class(body, status=200, mimetype=mimetype)
+            return _apply_cache_headers(response, etag, last_modified, max_age)
+
+        response = make_response(fn(*args, **kwargs))
+        if response.status_code != 200:
+            return response
+        _response_cache.set(key, (response.get_data(), response.mimetype))
+        return _apply_cache_headers(response, etag, last_modified, max_age)
+
+    return wrapper
@@ -0,0 +1,69 @@
+"""
+Encodage JSON des réponses API basé sur orjson (app.json).
+
+orjson sérialise nativement datetime / date / time (ISO 8601), UUID, les
+dataclasses et les Enum (par leur valeur : StatutWorkflowEnum, RoleEnum...),
+plusieurs fois plus vite que le module json. Les services peuvent donc
+retourner les valeurs telles quelles sans .isoformat() / .value.
+
+Différences avec le fournisseur par défaut de Flask :
+- datetimes en ISO 8601 (et non au format date HTTP) ;
+- clés non triées (ordre des schémas conservé), sauf sort_keys = True ;
+- Decimal et objets __html__ convertis en chaîne (comme Flask).
+Sans orjson installé, ou pour une valeur qu'il refuse (entier > 64 bits...),
+l'encodage retombe sur le fournisseur par défaut.
+"""
+import decimal
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dépendance de requirements.txt
+    orjson = None
+
+
+def _default(obj):
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f'Type non sérialisable en JSON : {type(obj).__name__}')
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Fournisseur JSON Flask s'appuyant sur orjson (repli : json stdlib)."""
+
+    sort_keys = False
+
+    def _options(self):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps_bytes(self, obj):
+        """Encoder en octets UTF-8 (évite le décodage / ré-encodage d'une str)."""
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=_default, option=self._options())
+            except TypeError:
+                pass
+        return super().dumps(obj).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if kwargs or orjson is None:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs or orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
@@ -1,7 +1,10 @@
 """
 Utilitaires OTP pour ARTCI DCP Platform.
 Génération, envoi email, vérification des codes à 6 chiffres.
+Les codes sont stockés hashés (HMAC-SHA256) et purgés périodiquement.
 """
+import hashlib
+import hmac
 import secrets
 from datetime import datetime, timezone, timedelta
 from flask import current_app
@@ -14,37 +17,50 @@ def generate_otp_code(length=6):
     return ''.join([str(secrets.randbelow(10)) for _ in range(length)])
 
 
+def hash_otp_code(compte_entreprise_id, code):
+    """
+    HMAC-SHA256 du code, salé par l'identifiant du compte.
+    Sans SECRET_KEY, une fuite de la table ne permet pas de retrouver les codes.
+    """
+    key = current_app.config['SECRET_KEY'].encode('utf-8')
+    message = f'{compte_entreprise_id}:{code}'.encode('utf-8')
+    return hmac.new(key, message, hashlib.sha256).hexdigest()
+
+
 def create_otp(compte_entreprise_id, otp_type):
     """
     Créer un enregistrement OTP en base.
     1. Invalide les OTP précédents non utilisés du même type
-    2. Génère un nouveau code
+    2. Génère un nouveau code (seul son hash est persisté)
     3. Définit expires_at
+    Returns (otp, code_en_clair) : le code en clair n'existe qu'ici, pour l'email.
     """
     from app.models.otp_codes import OTPCode
     from app.models.enums import TypeOTPEnum
 
-    # Invalider les anciens OTP non utilisés
+    # Invalider les anciens OTP non utilisés (servi par ix_otp_verification)
     OTPCode.query.filter_by(
         compte_entreprise_id=compte_entreprise_id,
         type=TypeOTPEnum(otp_type),
         used=False
-    ).update({'used': True})
+    ).update({'used': True}, synchronize_session=False)
 
     # Créer le nouveau
     expiration_minutes = current_app.config.get('OTP_EXPIRATION_MINUTES', 10)
     code_length = current_app.config.get('OTP_LENGTH', 6)
+    code = generate_otp_code(code_length)
 
     otp = OTPCode(
         compte_entreprise_id=compte_entreprise_id,
-        code=generate_otp_code(code_length),
+        code_hash=hash_otp_code(compte_entreprise_id, code),
         type=TypeOTPEnum(otp_type),
         expires_at=datetime.now(timezone.utc) + timedelta(minutes=expiration_minutes),
-        used=False
+        used=False,
+        attempts=0
     )
     db.session.add(otp)
     db.session.commit()
-    return otp
+    return otp, code
 
 
 def send_otp_email(email, code, otp_type):
@@ -88,42 +104,89 @@ L'équipe ARTCI - Protection des Données Personnelles
 def verify_otp(email, code, otp_type):
     """
     Vérifier un code OTP.
-    1. Trouver le CompteEntreprise par email
-    2. Chercher un OTPCode valide (code, type, non utilisé, non expiré)
-    3. Marquer comme utilisé
-    4. Si inscription : marquer email_verified = True
+    1. Chercher le dernier OTPCode actif du compte (jointure sur l'email,
+       prédicat couvert par ix_otp_verification)
+    2. Refuser si expiré ou si le nombre de tentatives est épuisé
+    3. Comparer les hash en temps constant ; en cas d'échec, incrémenter attempts
+    4. Marquer comme utilisé ; si inscription : marquer email_verified = True
     Returns (is_valid, error_message).
     """
     from app.models.comptes_entreprises import CompteEntreprise
     from app.models.otp_codes import OTPCode
     from app.models.enums import TypeOTPEnum
 
-    compte = CompteEntreprise.query.filter_by(email=email).first()
-    if not compte:
-        return False, 'Aucun compte trouvé avec cet email.'
-
-    otp = OTPCode.query.filter_by(
-        compte_entreprise_id=compte.id,
-        code=code,
-        type=TypeOTPEnum(otp_type),
-        used=False
-    ).first()
+    otp = OTPCode.query.join(
+        CompteEntreprise, OTPCode.compte_entreprise_id == CompteEntreprise.id
+    ).filter(
+        CompteEntreprise.email == email,
+        OTPCode.type == TypeOTPEnum(otp_type),
+        OTPCode.used == False  # noqa: E712
+    ).order_by(OTPCode.createdAt.desc()).first()
 
+    # Même message qu'un code faux : pas d'énumération des comptes
     if not otp:
         return False, 'Code OTP invalide.'
 
-    if datetime.now(timezone.utc) > otp.expires_at.replace(tzinfo=timezone.utc) \
-            if otp.expires_at.tzinfo is None else otp.expires_at:
+    expires_at = otp.expires_at
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if datetime.now(timezone.utc) > expires_at:
         otp.used = True
         db.session.commit()
         return False, 'Code OTP expiré.'
 
+    max_attempts = current_app.config.get('OTP_MAX_ATTEMPTS', 5)
+    if otp.attempts >= max_attempts:
+        otp.used = True
+        db.session.commit()
+        return False, 'Trop de tentatives. Demandez un nouveau code.'
+
+    if not hmac.compare_digest(otp.code_hash, hash_otp_code(otp.compte_entreprise_id, code)):
+        # Incrément atomique : deux requêtes concurrentes ne peuvent pas le contourner ;
+        # RETURNING donne la valeur après incrément (otp.attempts est périmé)
+        attempts = db.session.execute(
+            db.update(OTPCode).where(OTPCode.id == otp.id)
+            .values(attempts=OTPCode.attempts + 1).returning(OTPCode.attempts),
+            execution_options={'synchronize_session': False},
+        ).scalar()
+        db.session.commit()
+        if attempts >= max_attempts:
+            return False, 'Trop de tentatives. Demandez un nouveau code.'
+        return False, 'Code OTP invalide.'
+
     # Marquer comme utilisé
     otp.used = True
 
     # Si inscription, activer le compte
     if otp_type == 'inscription':
-        compte.email_verified = True
+        otp.compte_entreprise.email_verified = True
 
     db.session.commit()
     return True, ''
+
+
+def purge_otp_codes(batch_size=None):
+    """
+    Supprimer les codes OTP expirés ou déjà utilisés, par lots.
+    Chaque lot est commité séparément pour ne pas verrouiller la table longtemps.
+    Returns le nombre de codes supprimés.
+    """
+    from app.models.otp_codes import OTPCode
+
+    if batch_size is None:
+        batch_size = current_app.config.get('OTP_PURGE_BATCH_SIZE', 1000)
+
+    now = datetime.now(timezone.utc)
+    total = 0
+    while True:
+        ids = [
+            row.id for row in db.session.query(OTPCode.id).filter(
+                db.or_(OTPCode.used == True, OTPCode.expires_at < now)  # noqa: E712
+            ).limit(batch_size)
+        ]
+        if not ids:
+            break
+        OTPCode.query.filter(OTPCode.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        total += len(ids)
+    return total
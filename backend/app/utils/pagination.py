@@ -1,19 +1,26 @@
 """
 Helper de pagination générique pour ARTCI DCP Platform.
-Encapsule SQLAlchemy .paginate() avec sérialisation Marshmallow.
+Encapsule SQLAlchemy .paginate() avec sérialisation par le schéma Marshmallow
+pré-compilé (app.utils.serializers), et fournit les curseurs opaques de la
+pagination par clé (keyset).
 """
+import base64
+import json
 from flask import request, current_app
 
 
-def paginate(query, schema, page=None, per_page=None):
+def paginate(query, schema, page=None, per_page=None, loader=None, only=None):
     """
     Paginer une requête SQLAlchemy et sérialiser les résultats.
 
     Args:
-        query: SQLAlchemy query object
-        schema: Instance de Marshmallow schema pour la sérialisation
+        query: SQLAlchemy query object (objets ORM ou projection par colonnes)
+        schema: Schéma Marshmallow de sortie (classe ou instance)
         page: Numéro de page (par défaut depuis request.args)
         per_page: Éléments par page (par défaut depuis config)
+        loader: Callable optionnel appliqué aux items de la page avant
+                sérialisation (ex. préchargement groupé des relations)
+        only: Champs à sérialiser (champs clairsemés, voir parse_fields)
 
     Returns:
         dict avec items, total, page, per_page, pages, has_next, has_prev
@@ -31,10 +38,14 @@ def paginate(query, schema, page=None, per_page=None):
     per_page = min(per_page, 200)
     page = max(page, 1)
 
+    # Import local : app.utils est importé par app.extensions (cycle via app.models)
+    from app.utils.serializers import serializer_for
+
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+    items = loader(pagination.items) if loader else pagination.items
 
     return {
-        'items': schema.dump(pagination.items, many=True),
+        'items': serializer_for(schema, only=only).dump(items, many=True),
         'total': pagination.total,
         'page': pagination.page,
         'per_page': pagination.per_page,
@@ -42,3 +53,35 @@ def paginate(query, schema, page=None, per_page=None):
         'has_next': pagination.has_next,
         'has_prev': pagination.has_prev
     }
+
+
+def encode_cursor(*values):
+    """Curseur opaque (base64 urlsafe) à partir des clés de tri de la dernière ligne."""
+    raw = json.dumps([v.isoformat() if hasattr(v, 'isoformat') else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """
+    Décoder un curseur produit par encode_cursor.
+
+    Raises:
+        ValueError: curseur illisible ou de taille inattendue
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise ValueError('Curseur de pagination invalide.')
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('Curseur de pagination invalide.')
+    return values
+
+
+def page_limit(limit=None):
+    """Taille de page demandée (request.args 'limit'), bornée à 200."""
+    if limit is None:
+        limit = request.args.get(
+            'limit', current_app.config.get('ITEMS_PER_PAGE', 50), type=int
+        )
+    return max(1, min(limit, 200))
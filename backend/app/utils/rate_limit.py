@@ -0,0 +1,227 @@
+"""
+Limitation de débit (rate limiting) pour ARTCI DCP Platform.
+Algorithme token bucket : chaque clé (portée + client) dispose d'un seau de
+`capacity` jetons rechargé en continu à `rate` jetons/seconde.
+
+Le stockage est partagé entre les workers gunicorn (SQLite sur disque par
+défaut) et interchangeable via RATELIMIT_STORAGE_URI :
+    memory://                    -> process courant uniquement (dev/tests)
+    sqlite:////tmp/ratelimit.db  -> fichier partagé entre workers
+    package.module:Classe        -> backend personnalisé (ex. Redis)
+"""
+import importlib
+import math
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from flask import current_app, request
+from app.utils.responses import error_response
+
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+_LIMIT_RE = re.compile(
+    r'^\s*(\d+)\s*(?:per|/)\s*(\d+)?\s*(second|minute|hour|day)s?\s*$', re.IGNORECASE
+)
+
+
+def parse_limit(spec):
+    """
+    Convertir '100 per minute', '5/hour' ou '20 per 10 minutes'
+    en (capacity, rate en jetons/seconde).
+    """
+    match = _LIMIT_RE.match(spec or '')
+    if not match:
+        raise ValueError(f'Limite de débit invalide : {spec!r}')
+    amount = int(match.group(1))
+    multiplier = int(match.group(2) or 1)
+    period = _PERIODS[match.group(3).lower()] * multiplier
+    return amount, amount / period
+
+
+# ============================================================
+# STOCKAGES
+# ============================================================
+
+class MemoryStorage:
+    """Seaux en mémoire (non partagés entre workers)."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, cost=1):
+        """Returns (allowed, remaining, retry_after_seconds)."""
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+        retry_after = 0 if allowed else (cost - tokens) / rate
+        return allowed, int(tokens), retry_after
+
+
+class SQLiteStorage:
+    """
+    Seaux dans un fichier SQLite partagé par tous les workers de la machine.
+    BEGIN IMMEDIATE sérialise les lectures-écritures concurrentes d'une même clé.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS buckets ('
+            'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+        )
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def consume(self, key, capacity, rate, cost=1):
+        """Returns (allowed, remaining, retry_after_seconds)."""
+        now = time.time()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT tokens, updated FROM buckets WHERE key = ?', (key,)
+            ).fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            conn.execute(
+                'INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                (key, tokens, now)
+            )
+            # Nettoyage opportuniste des seaux inactifs depuis plus d'un jour
+            if random.random() < 0.001:
+                conn.execute('DELETE FROM buckets WHERE updated < ?', (now - 86400,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        retry_after = 0 if allowed else (cost - tokens) / rate
+        return allowed, int(tokens), retry_after
+
+
+def storage_from_uri(uri):
+    """Instancier le stockage décrit par RATELIMIT_STORAGE_URI."""
+    if not uri or uri == 'memory://':
+        return MemoryStorage()
+    if uri.startswith('sqlite:///'):
+        return SQLiteStorage(uri[len('sqlite:///'):])
+    module_name, _, class_name = uri.partition(':')
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def default_storage_uri():
+    """Fichier SQLite dans le répertoire temporaire (partagé par les workers)."""
+    return 'sqlite:///' + os.path.join(tempfile.gettempdir(), 'artci_dcp_ratelimit.sqlite3')
+
+
+# ============================================================
+# LIMITEUR
+# ============================================================
+
+class RateLimiter:
+    """
+    Extension Flask : applique RATELIMIT_DEFAULT aux blueprints listés dans
+    RATELIMIT_BLUEPRINTS, et les limites déclarées par @limiter.limit sur
+    les routes plus sensibles (login, OTP, export, contact).
+    """
+
+    def __init__(self):
+        self.storage = None
+
+    def init_app(self, app):
+        app.extensions['rate_limiter'] = self
+        if not app.config.get('RATELIMIT_ENABLED', True):
+            return
+        self.storage = storage_from_uri(
+            app.config.get('RATELIMIT_STORAGE_URI') or default_storage_uri()
+        )
+        app.before_request(self._check_request)
+
+    def limit(self, spec_or_config_key, scope=None, cost=1):
+        """
+        Décorateur de route : limite spécifique (remplace la limite par défaut).
+        Accepte une limite littérale ('5 per hour') ou une clé de config
+        ('RATELIMIT_EXPORT'). `scope` permet à plusieurs routes de partager
+        le même budget.
+        """
+        def decorator(fn):
+            fn._rate_limits = getattr(fn, '_rate_limits', []) + [(spec_or_config_key, scope, cost)]
+            return fn
+        return decorator
+
+    def exempt(self, fn):
+        """Décorateur : exclure une route de toute limitation."""
+        fn._rate_limit_exempt = True
+        return fn
+
+    @staticmethod
+    def _client_key():
+        """
+        Adresse du client : remote_addr, ou avec RATELIMIT_PROXY_HOPS = n
+        proxies de confiance, la n-ième adresse en partant de la fin de
+        X-Forwarded-For (celle ajoutée par le premier proxy).
+        """
+        hops = current_app.config.get('RATELIMIT_PROXY_HOPS', 0)
+        route = request.access_route
+        if hops and len(route) >= hops:
+            return route[-hops]
+        return request.remote_addr or 'inconnu'
+
+    def _limits_for_request(self):
+        view = current_app.view_functions.get(request.endpoint)
+        if view is None or getattr(view, '_rate_limit_exempt', False):
+            return []
+        declared = getattr(view, '_rate_limits', None)
+        if declared:
+            return [
+                (current_app.config.get(spec, spec), scope or request.endpoint, cost)
+                for spec, scope, cost in declared
+            ]
+        if request.blueprint in current_app.config.get('RATELIMIT_BLUEPRINTS', ()):
+            return [(current_app.config.get('RATELIMIT_DEFAULT'), request.blueprint, 1)]
+        return []
+
+    def _check_request(self):
+        if request.method == 'OPTIONS':
+            return None
+        client = self._client_key()
+        for spec, scope, cost in self._limits_for_request():
+            capacity, rate = parse_limit(spec)
+            try:
+                allowed, remaining, retry_after = self.storage.consume(
+                    f'{scope}:{client}', capacity, rate, cost
+                )
+            except Exception as e:
+                # Fail-open : une panne du stockage ne doit pas bloquer l'API
+                current_app.logger.warning(f'Rate limiting indisponible : {e}')
+                return None
+            if not allowed:
+                response, status = error_response(
+                    'Trop de requêtes. Veuillez réessayer plus tard.', 429
+                )
+                response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                response.headers['X-RateLimit-Limit'] = str(capacity)
+                response.headers['X-RateLimit-Remaining'] = '0'
+                return response, status
+        return None
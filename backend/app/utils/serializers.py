@@ -0,0 +1,213 @@
+"""
+Sérialisation rapide des listes pour ARTCI DCP Platform.
+
+Schema.dump(many=True) de Marshmallow refait, pour chaque ligne et chaque
+champ, la résolution de l'accesseur, les hooks et la conversion. Pour les
+pages de 200 lignes des listes (entités, utilisateurs, feedbacks...), c'est
+l'essentiel du temps CPU de la requête.
+
+RowSerializer « compile » une fois un schéma de sortie : chaque champ devient
+un couple (lecture de l'attribut, conversion) selon son type. Les schémas
+Marshmallow restent la seule définition des sorties ; le résultat est
+identique à schema.dump() (voir benchmarks/bench_serialization.py).
+Les types de champs non reconnus passent par field.serialize, et un schéma
+avec des hooks pre_dump / post_dump est délégué entièrement à Marshmallow.
+
+Les objets sérialisés peuvent être des instances ORM ou des lignes
+(Row) d'une requête par colonnes (voir columns_for).
+"""
+import threading
+from collections.abc import Mapping
+from marshmallow import Schema, fields, missing
+from app.schemas.common import EnumField
+
+_cache = {}
+_cache_lock = threading.Lock()
+# Schémas complets + combinaisons de champs clairsemés conservées
+_CACHE_MAX = 256
+
+
+def _identity(value):
+    return value
+
+
+def _enum_value(value):
+    return value.value if hasattr(value, 'value') else value
+
+
+def _isoformat(value):
+    return value.isoformat()
+
+
+def _getter(attr):
+    """Lecture d'un attribut (pointé ou non) ; `missing` si absent, comme Marshmallow."""
+    parts = attr.split('.')
+
+    def get(obj):
+        for part in parts:
+            if obj is None:
+                return missing
+            if isinstance(obj, Mapping):
+                obj = obj.get(part, missing)
+            else:
+                obj = getattr(obj, part, missing)
+            if obj is missing:
+                return missing
+        return obj
+    return get
+
+
+class RowSerializer:
+    """Schéma de sortie Marshmallow pré-compilé (voir serializer_for)."""
+
+    def __init__(self, schema):
+        self.schema = schema
+        hooks = getattr(schema, '_hooks', {})
+        self.delegate = any(
+            hooks.get((tag, pass_many)) for tag in ('pre_dump', 'post_dump') for pass_many in (False, True)
+        )
+        self.plan = [] if self.delegate else [
+            step for step in (self._compile(name, field) for name, field in schema.dump_fields.items())
+            if step is not None
+        ]
+
+    def _compile(self, name, field):
+        key = field.data_key if field.data_key is not None else name
+        default = field.dump_default
+
+        if isinstance(field, fields.Method):
+            if field.serialize_method_name is None:
+                return None
+            method = getattr(self.schema, field.serialize_method_name)
+            return key, method, _identity, missing
+
+        conv = self._converter(field)
+        if conv is None:
+            # Type non compilé : conversion Marshmallow, au champ près
+            schema = self.schema
+
+            def serialize(obj, _name=name, _field=field):
+                return _field.serialize(_name, obj, accessor=schema.get_attribute)
+            return key, serialize, _identity, missing
+        return key, _getter(field.attribute or name), conv, default
+
+    def _converter(self, field):
+        """Fonction de conversion d'une valeur non nulle, ou None si non gérée."""
+        if isinstance(field, EnumField):
+            return _enum_value
+        if isinstance(field, fields.Nested):
+            nested = RowSerializer(field.schema)
+            if field.many:
+                return lambda value: [nested.dump_one(v) for v in value]
+            return nested.dump_one
+        if isinstance(field, fields.List):
+            inner = self._converter(field.inner)
+            if inner is None:
+                return None
+            return lambda value: [None if v is None else inner(v) for v in value]
+        if type(field) in (fields.DateTime, fields.Date):
+            # Sous-classes (NaiveDateTime, AwareDateTime, Time...) : laissées à Marshmallow
+            return _isoformat if field.format in (None, 'iso', 'iso8601') else None
+        if isinstance(field, (fields.Integer, fields.Float)):
+            if field.as_string:
+                return None
+            return int if isinstance(field, fields.Integer) else float
+        if isinstance(field, fields.Boolean):
+            return bool
+        if isinstance(field, (fields.String, fields.UUID)):
+            return str
+        if type(field) is fields.Raw:
+            return _identity
+        if type(field) is fields.Dict and field.key_field is None and field.value_field is None:
+            return dict
+        return None
+
+    def dump_one(self, obj):
+        if self.delegate:
+            return self.schema.dump(obj)
+        out = {}
+        for key, get, conv, default in self.plan:
+            value = get(obj)
+            if value is missing:
+                if default is missing:
+                    continue
+                value = default() if callable(default) else default
+            out[key] = None if value is None else conv(value)
+        return out
+
+    def dump(self, obj, many=False):
+        if many:
+            if self.delegate:
+                return self.schema.dump(obj, many=True)
+            dump_one = self.dump_one
+            return [dump_one(o) for o in obj]
+        return self.dump_one(obj)
+
+
+def serializer_for(schema, only=None):
+    """
+    RowSerializer d'un schéma (classe ou instance), mis en cache par classe.
+    `only` restreint les champs sérialisés (champs clairsemés, voir parse_fields) ;
+    chaque combinaison est mise en cache dans la limite de _CACHE_MAX entrées.
+    Une instance avec only / exclude / context est compilée à part, sans cache.
+    """
+    if isinstance(schema, type) and issubclass(schema, Schema):
+        schema_cls, instance = schema, None
+    else:
+        schema_cls, instance = type(schema), schema
+        if instance.only is not None or instance.exclude or instance.context:
+            return RowSerializer(instance)
+
+    key = schema_cls if only is None else (schema_cls, frozenset(only))
+    serializer = _cache.get(key)
+    if serializer is None:
+        if only is not None:
+            instance = schema_cls(only=tuple(only))
+        with _cache_lock:
+            serializer = _cache.get(key)
+            if serializer is None:
+                serializer = RowSerializer(instance or schema_cls())
+                if len(_cache) < _CACHE_MAX:
+                    _cache[key] = serializer
+    return serializer
+
+
+def parse_fields(value, schema, always=('id',)):
+    """
+    Champs demandés par un paramètre `fields=a,b,c` (champs clairsemés).
+
+    Returns:
+        tuple des champs (ordre du schéma, `always` inclus), ou None si vide
+    Raises:
+        ValueError: champ inconnu du schéma
+    """
+    demandes = {f.strip() for f in (value or '').split(',') if f.strip()}
+    if not demandes:
+        return None
+    schema = schema() if isinstance(schema, type) else schema
+    disponibles = schema.dump_fields
+    inconnus = demandes - disponibles.keys()
+    if inconnus:
+        raise ValueError(
+            f'Champ(s) inconnu(s) : {", ".join(sorted(inconnus))}. '
+            f'Champs disponibles : {", ".join(disponibles)}.'
+        )
+    demandes |= set(always) & disponibles.keys()
+    return tuple(name for name in disponibles if name in demandes)
+
+
+def columns_for(model, schema):
+    """
+    Colonnes du modèle lues par le schéma : une requête
+    db.session.query(*columns_for(User, UserOutputSchema)) retourne des lignes
+    légères (sans objets ORM ni identity map) que RowSerializer sait sérialiser.
+    Les champs Method / Nested / Function exigent des objets : non supportés ici.
+    """
+    schema = schema() if isinstance(schema, type) else schema
+    columns = []
+    for name, field in schema.dump_fields.items():
+        if isinstance(field, (fields.Method, fields.Function, fields.Nested)):
+            raise ValueError(f'{type(schema).__name__}.{name} : champ calculé, projection impossible.')
+        columns.append(getattr(model, field.attribute or name))
+    return columns
+
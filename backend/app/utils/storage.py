@@ -0,0 +1,276 @@
+"""
+Stockage des documents adressé par contenu pour ARTCI DCP Platform.
+
+Un fichier est identifié par le SHA-256 de son contenu et rangé sous
+    blobs/<2 premiers hex>/<2 suivants>/<sha256>
+Deux téléversements identiques (même entité ou non) partagent le même blob ;
+DocumentJoint.chemin_fichier contient cette clé et DocumentJoint.sha256 le hash.
+Les aperçus (miniatures) sont rangés de la même façon sous previews/.
+
+Le contenu est lu par morceaux : le hash est calculé pendant l'écriture dans un
+fichier temporaire, renommé atomiquement (local) ou envoyé (S3) une fois le
+hash connu. Backends (STORAGE_BACKEND) :
+    local -> répertoire UPLOAD_FOLDER
+    s3    -> bucket S3 ou compatible (MinIO : STORAGE_S3_ENDPOINT_URL), boto3 requis
+"""
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+from flask import current_app
+
+
+CHUNK_SIZE = 64 * 1024
+BLOB_PREFIX = 'blobs/'
+PREVIEW_PREFIX = 'previews/'
+
+StoredBlob = namedtuple('StoredBlob', ['key', 'sha256', 'taille', 'deduplique'])
+
+
+def blob_key(sha256):
+    """Clé adressée par contenu, répartie sur deux niveaux de répertoires."""
+    return f'{BLOB_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+
+def is_blob_key(chemin):
+    return bool(chemin) and chemin.startswith(BLOB_PREFIX)
+
+
+def preview_key(sha256, extension='jpg'):
+    """Clé d'un aperçu dérivé d'un blob (partagé comme le blob lui-même)."""
+    return f'{PREVIEW_PREFIX}{sha256[:2]}/{sha256[2:4]}/{sha256}.{extension}'
+
+
+def _touch(path):
+    """Rafraîchir la date d'un blob réutilisé (protège du ramasse-miettes)."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def copy_hashing(stream, dest, chunk_size=CHUNK_SIZE):
+    """Copier stream -> dest par morceaux ; retourne (sha256 hex, taille)."""
+    sha256 = hashlib.sha256()
+    taille = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        sha256.update(chunk)
+        taille += len(chunk)
+        dest.write(chunk)
+    return sha256.hexdigest(), taille
+
+
+class LocalStorage:
+    """Blobs sur le système de fichiers local (UPLOAD_FOLDER)."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    @property
+    def tmp_dir(self):
+        return os.path.join(self.root, 'tmp')
+
+    def save_stream(self, stream):
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                sha256, taille = copy_hashing(stream, tmp)
+            key = blob_key(sha256)
+            target = self.path(key)
+            if os.path.exists(target):
+                os.remove(tmp_path)
+                _touch(target)
+                return StoredBlob(key, sha256, taille, True)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(tmp_path, target)
+            return StoredBlob(key, sha256, taille, False)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def put(self, key, data):
+        """Écrire un petit contenu dérivé (aperçu...) sous une clé donnée."""
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f'{target}.{os.getpid()}.part'
+        with open(tmp_path, 'wb') as tmp:
+            tmp.write(data)
+        os.replace(tmp_path, target)
+
+    def save_spooled(self, spool):
+        """
+        Enregistrer un téléversement déjà haché (app.utils.uploads.UploadSpool) :
+        simple renommage atomique si le fichier temporaire est dans tmp_dir.
+        """
+        if os.path.dirname(os.path.abspath(spool.path)) != self.tmp_dir:
+            spool.seek(0)
+            return self.save_stream(spool)
+        spool.flush()
+        key = blob_key(spool.sha256)
+        target = self.path(key)
+        if os.path.exists(target):
+            _touch(target)
+            return StoredBlob(key, spool.sha256, spool.taille, True)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(spool.path, target)
+        spool.adopte = True
+        return StoredBlob(key, spool.sha256, spool.taille, False)
+
+    def open(self, key):
+        return open(self.path(key), 'rb')
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def size(self, key):
+        return os.path.getsize(self.path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def iter_keys(self):
+        """Toutes les clés de blobs présentes (parcours os.scandir)."""
+        for key, _, _ in self.iter_entries(BLOB_PREFIX):
+            yield key
+
+    def iter_entries(self, prefix='', exclude=()):
+        """
+        (clé, taille, mtime) des fichiers sous `prefix` (parcours os.scandir,
+        sans suivre les liens) ; `exclude` : répertoires absolus à ignorer.
+        """
+        exclude = {os.path.abspath(d) for d in exclude}
+        stack = [os.path.join(self.root, *prefix.rstrip('/').split('/')) if prefix else self.root]
+        while stack:
+            try:
+                entries = os.scandir(stack.pop())
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.path not in exclude:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        st = entry.stat(follow_symlinks=False)
+                        key = os.path.relpath(entry.path, self.root).replace(os.sep, '/')
+                        yield key, st.st_size, st.st_mtime
+
+
+class S3Storage:
+    """Blobs dans un bucket S3 (ou compatible : MinIO, Ceph...)."""
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError('STORAGE_BACKEND=s3 nécessite le paquet boto3.')
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix else ''
+        self.client = boto3.client('s3', endpoint_url=endpoint_url or None, region_name=region or None)
+
+    def _object_key(self, key):
+        return self.prefix + key
+
+    def save_stream(self, stream):
+        # Le hash (donc la clé) n'est connu qu'en fin de lecture : fichier temporaire
+        with tempfile.TemporaryFile() as tmp:
+            sha256, taille = copy_hashing(stream, tmp)
+            key = blob_key(sha256)
+            if self.exists(key):
+                return StoredBlob(key, sha256, taille, True)
+            tmp.seek(0)
+            self.client.upload_fileobj(
+                tmp, self.bucket, self._object_key(key),
+                ExtraArgs={'Metadata': {'sha256': sha256}}
+            )
+            return StoredBlob(key, sha256, taille, False)
+
+    def put(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self._object_key(key), Body=data)
+
+    def save_spooled(self, spool):
+        """Téléversement déjà haché (UploadSpool) : envoi direct, sans recopie."""
+        key = blob_key(spool.sha256)
+        if self.exists(key):
+            return StoredBlob(key, spool.sha256, spool.taille, True)
+        spool.seek(0)
+        self.client.upload_fileobj(
+            spool, self.bucket, self._object_key(key),
+            ExtraArgs={'Metadata': {'sha256': spool.sha256}}
+        )
+        return StoredBlob(key, spool.sha256, spool.taille, False)
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))['Body']
+
+    def exists(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise
+
+    def size(self, key):
+        return self.client.head_object(
+            Bucket=self.bucket, Key=self._object_key(key)
+        )['ContentLength']
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def presigned_url(self, key, download_name=None, mimetype=None, expires=300):
+        """URL signée temporaire : le client télécharge directement depuis S3."""
+        params = {'Bucket': self.bucket, 'Key': self._object_key(key)}
+        if download_name:
+            from app.utils.file_delivery import content_disposition
+            params['ResponseContentDisposition'] = content_disposition(download_name)
+        if mimetype:
+            params['ResponseContentType'] = mimetype
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=expires)
+
+    def iter_keys(self):
+        for key, _, _ in self.iter_entries(BLOB_PREFIX):
+            yield key
+
+    def iter_entries(self, prefix='', exclude=()):
+        """(clé, taille, mtime) des objets sous `prefix` (pages de 1000 clés)."""
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            for obj in page.get('Contents', ()):
+                yield obj['Key'][len(self.prefix):], obj['Size'], obj['LastModified'].timestamp()
+
+
+def get_storage():
+    """Backend de stockage de l'application (instancié une fois par app)."""
+    storage = current_app.extensions.get('document_storage')
+    if storage is None:
+        config = current_app.config
+        backend = config.get('STORAGE_BACKEND', 'local')
+        if backend == 's3':
+            storage = S3Storage(
+                config['STORAGE_S3_BUCKET'],
+                prefix=config.get('STORAGE_S3_PREFIX', ''),
+                endpoint_url=config.get('STORAGE_S3_ENDPOINT_URL'),
+                region=config.get('STORAGE_S3_REGION'),
+            )
+        elif backend == 'local':
+            storage = LocalStorage(config.get('UPLOAD_FOLDER', 'uploads'))
+        else:
+            raise RuntimeError(f'STORAGE_BACKEND inconnu : {backend}')
+        current_app.extensions['document_storage'] = storage
+    return storage
+
@@ -0,0 +1,196 @@
+"""
+Validation des téléversements au fil de l'eau pour ARTCI DCP Platform.
+
+Werkzeug écrit chaque fichier d'un formulaire multipart dans le flux retourné
+par Request._get_file_stream. UploadRequest y substitue un UploadSpool quand
+la route a déclaré une politique (@validated_upload) :
+
+- l'extension du nom de fichier est vérifiée avant toute écriture ;
+- la signature (magic bytes) est contrôlée sur le premier morceau reçu ;
+- la taille est contrôlée à chaque écriture : un fichier trop gros est rejeté
+  (413) sans lire la suite du corps ;
+- le contenu est haché pendant l'écriture dans un fichier temporaire du
+  stockage, renommé atomiquement en blob (LocalStorage.save_spooled) : pas de
+  seconde copie ni de seconde lecture.
+
+Un fichier refusé lève UnsupportedMediaType (415) ou RequestEntityTooLarge
+(413) ; le fichier temporaire est supprimé à la fermeture de la requête.
+"""
+import hashlib
+import os
+import tempfile
+from collections import namedtuple
+from functools import wraps
+from flask import Request, current_app, request
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+# Signatures par extension ; None = texte (aucun octet nul dans le premier morceau)
+UPLOAD_SIGNATURES = {
+    'pdf': (b'%PDF-',),
+    'png': (b'\x89PNG\r\n\x1a\n',),
+    'jpg': (b'\xff\xd8\xff',),
+    'jpeg': (b'\xff\xd8\xff',),
+    'docx': (b'PK\x03\x04',),
+    'xlsx': (b'PK\x03\x04',),
+    'doc': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',),
+    'xls': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',),
+    'csv': None,
+}
+
+UPLOAD_MIMETYPES = {
+    'pdf': 'application/pdf',
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'doc': 'application/msword',
+    'xls': 'application/vnd.ms-excel',
+    'csv': 'text/csv',
+}
+
+# Octets nécessaires pour reconnaître la plus longue signature
+_HEAD_SIZE = 16
+
+UploadPolicy = namedtuple('UploadPolicy', ['extensions', 'max_size'])
+
+
+def file_extension(filename):
+    _, ext = os.path.splitext(filename or '')
+    return ext[1:].lower()
+
+
+class UploadSpool:
+    """
+    Fichier temporaire recevant un téléversement : vérifie signature et taille
+    à l'écriture et calcule le SHA-256 au passage.
+    """
+
+    def __init__(self, filename, extension, max_size, tmp_dir=None):
+        self.filename = filename
+        self.extension = extension
+        self.mimetype = UPLOAD_MIMETYPES.get(extension)
+        self.max_size = max_size
+        if tmp_dir:
+            os.makedirs(tmp_dir, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=tmp_dir, suffix='.upload')
+        self._file = os.fdopen(fd, 'w+b')
+        self._hash = hashlib.sha256()
+        self._head = b''
+        self.taille = 0
+        self.verifie = False
+        self.adopte = False
+
+    # --- Écriture (parseur multipart) ---
+
+    def write(self, data):
+        self.taille += len(data)
+        if self.max_size and self.taille > self.max_size:
+            self.close()
+            raise RequestEntityTooLarge(
+                f'Fichier trop volumineux (maximum {self.max_size // (1024 * 1024)} MB).'
+            )
+        if not self.verifie:
+            self._head += data[:_HEAD_SIZE]
+            if len(self._head) >= _HEAD_SIZE:
+                self._verifier()
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def _verifier(self):
+        signatures = UPLOAD_SIGNATURES.get(self.extension)
+        if signatures is None:
+            valide = b'\x00' not in self._head
+        else:
+            valide = any(self._head.startswith(sig) for sig in signatures)
+        if not valide:
+            self.close()
+            raise UnsupportedMediaType(
+                f'Le contenu du fichier ne correspond pas à son extension (.{self.extension}).'
+            )
+        self.verifie = True
+
+    def seek(self, offset, whence=0):
+        # Appelé par le parseur en fin de fichier : contrôler les fichiers très courts
+        if not self.verifie:
+            if not self._head:
+                self.close()
+                raise UnsupportedMediaType('Fichier vide.')
+            self._verifier()
+        return self._file.seek(offset, whence)
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    # --- Lecture / cycle de vie ---
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        if not self.adopte:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class UploadRequest(Request):
+    """Request dont les fichiers sont validés au fil de l'eau (voir validated_upload)."""
+
+    upload_policy = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        policy = self.upload_policy
+        if policy is None or not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+        extension = file_extension(filename)
+        if extension not in policy.extensions:
+            raise UnsupportedMediaType(
+                f'Format non supporté (.{extension or "?"}). '
+                f'Formats acceptés : {", ".join(sorted(policy.extensions))}.'
+            )
+        if policy.max_size and content_length and content_length > policy.max_size:
+            raise RequestEntityTooLarge(
+                f'Fichier trop volumineux (maximum {policy.max_size // (1024 * 1024)} MB).'
+            )
+        return UploadSpool(filename, extension, policy.max_size, tmp_dir=_spool_dir())
+
+
+def _spool_dir():
+    """Répertoire temporaire du stockage local (renommage atomique possible)."""
+    from app.utils.storage import get_storage, LocalStorage
+    storage = get_storage()
+    if isinstance(storage, LocalStorage):
+        return storage.tmp_dir
+    return None
+
+
+def validated_upload(extensions=None, max_size=None):
+    """
+    Décorateur : valider les fichiers téléversés sur la route (extension,
+    signature, taille) pendant la réception.
+    Défauts : ALLOWED_EXTENSIONS et UPLOAD_MAX_FILE_SIZE (config).
+    À placer sous le décorateur d'authentification.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            config = current_app.config
+            request.upload_policy = UploadPolicy(
+                frozenset(extensions or config['ALLOWED_EXTENSIONS']),
+                max_size or config.get('UPLOAD_MAX_FILE_SIZE') or config.get('MAX_CONTENT_LENGTH'),
+            )
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
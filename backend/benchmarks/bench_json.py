@@ -0,0 +1,136 @@
+"""
+Benchmark : encodage JSON des réponses, fournisseur Flask par défaut vs orjson.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_json.py [--rows 200] [--repeat 50]
+
+Deux charges représentatives :
+- dashboard : statistiques admin (compteurs par statut / secteur / région,
+  activité récente) ;
+- liste : page de `rows` entités telle que produite par paginate().
+Chaque charge existe en version « préconvertie » (.isoformat() / .value,
+comme les services actuels) et « native » (datetime, UUID et Enum laissés
+tels quels, que seul OrjsonProvider sait encoder).
+"""
+import argparse
+import os
+import sys
+import timeit
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+from app.models.enums import (  # noqa: E402
+    OrigineSaisieEnum, StatutConformiteEnum, StatutWorkflowEnum,
+)
+from app.utils.json_provider import OrjsonProvider, orjson  # noqa: E402
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+SECTEURS = ['Banque', 'Assurance', 'Télécoms', 'Santé', 'Commerce', 'Transport', 'Éducation']
+REGIONS = ['Lagunes', 'Vallée du Bandama', 'Gbêkê', 'San-Pédro', 'Poro', 'Haut-Sassandra']
+
+
+def _preconvertir(value):
+    """Conversion faite aujourd'hui dans les services avant jsonify."""
+    if isinstance(value, dict):
+        return {(k.value if hasattr(k, 'value') else k): _preconvertir(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_preconvertir(v) for v in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if hasattr(value, 'value'):
+        return value.value
+    return value
+
+
+def _dashboard():
+    return {
+        'total_entites': 1842,
+        'par_statut_workflow': {s.value: 40 + i for i, s in enumerate(StatutWorkflowEnum)},
+        'par_statut_conformite': {s.value: 300 + i for i, s in enumerate(StatutConformiteEnum)},
+        'par_secteur': {s: 120 + i for i, s in enumerate(SECTEURS)},
+        'par_region': {r: 80 + i for i, r in enumerate(REGIONS)},
+        'par_origine': {o.value: 600 + i for i, o in enumerate(OrigineSaisieEnum)},
+        'demandes_en_cours': 37,
+        'demandes_en_retard': 4,
+        'agents_actifs': 18,
+        'alertes_sans_dpo': 112,
+        'alertes_sans_declaration': 96,
+        'alertes_violations': 3,
+        'activite_recente': [{
+            'entite_id': uuid.uuid4(),
+            'denomination': f'Entreprise {i}',
+            'ancien_statut': StatutWorkflowEnum.soumis,
+            'nouveau_statut': StatutWorkflowEnum.conforme,
+            'date': NOW - timedelta(hours=i),
+        } for i in range(5)],
+    }
+
+
+def _liste(rows):
+    return {
+        'items': [{
+            'id': uuid.uuid4(),
+            'denomination': f'Entreprise {i}',
+            'numero_cc': f'CC{i:06d}',
+            'forme_juridique': 'SA',
+            'secteur_activite': SECTEURS[i % len(SECTEURS)],
+            'ville': 'Abidjan',
+            'region': REGIONS[i % len(REGIONS)],
+            'origine_saisie': OrigineSaisieEnum.auto_recensement,
+            'publie_sur_carte': i % 2 == 0,
+            'createdAt': NOW - timedelta(days=i),
+            'conformite': {
+                'statut_conformite': StatutConformiteEnum.conforme,
+                'score_conformite': 70 + i % 30,
+                'a_dpo': True,
+            },
+            'workflow': {'statut': StatutWorkflowEnum.conforme, 'numero_autorisation_artci': f'AUT-{i}'},
+            'localisation': {'latitude': 5.35 + i / 1000, 'longitude': -4.0 - i / 1000},
+            'finalites': [{'finalite': f'Finalité {k}', 'pourcentage': 10 * k} for k in range(1, 5)],
+        } for i in range(rows)],
+        'total': 1842,
+        'page': 1,
+        'per_page': rows,
+        'pages': -(-1842 // rows),
+    }
+
+
+def _ms(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    defaut = DefaultJSONProvider(app)
+    rapide = OrjsonProvider(app)
+    if orjson is None:
+        print('orjson non installé : OrjsonProvider utilise le repli json (stdlib).')
+
+    cas = [('dashboard', _dashboard()), ('liste', _liste(args.rows))]
+    print(f'{args.rows} lignes par page, meilleur de {args.repeat} essais (ms)')
+    print(f'{"charge":<12}{"défaut":>10}{"orjson":>10}{"gain":>7}{"natif":>10}')
+    with app.app_context():
+        for nom, natif in cas:
+            preconverti = _preconvertir(natif)
+            assert rapide.loads(rapide.dumps(preconverti)) == defaut.loads(defaut.dumps(preconverti))
+            assert rapide.loads(rapide.dumps(natif)) == preconverti, f'{nom} : encodage natif différent'
+
+            t_defaut = _ms(lambda: defaut.response(preconverti).get_data(), args.repeat)
+            t_rapide = _ms(lambda: rapide.response(preconverti).get_data(), args.repeat)
+            t_natif = _ms(lambda: rapide.response(natif).get_data(), args.repeat)
+            print(f'{nom:<12}{t_defaut:>10.3f}{t_rapide:>10.3f}{t_defaut / t_rapide:>6.1f}x{t_natif:>10.3f}')
+
+
+if __name__ == '__main__':
+    main()
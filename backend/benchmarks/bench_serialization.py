@@ -0,0 +1,111 @@
+"""
+Benchmark : sérialisation des pages de liste, Marshmallow vs RowSerializer.
+
+Usage (depuis backend/) :
+    python benchmarks/bench_serialization.py [--rows 200] [--repeat 50]
+
+Pour chaque schéma de liste, une page de `rows` objets factices (mêmes
+attributs que les modèles, relations chargées) est sérialisée par
+schema.dump(many=True) puis par serializer_for(schema).dump(many=True) ; les
+deux résultats doivent être identiques. L'encodage JSON de la page est
+mesuré avec json (stdlib) et, s'il est installé, orjson.
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.enums import (  # noqa: E402
+    OrigineSaisieEnum, RoleEnum, StatutConformiteEnum, StatutWorkflowEnum, TypeDocumentEnum,
+)
+from app.schemas.entite import EntiteListOutputSchema  # noqa: E402
+from app.schemas.user import UserOutputSchema  # noqa: E402
+from app.schemas.workflow import FeedbackOutputSchema  # noqa: E402
+from app.utils.serializers import serializer_for  # noqa: E402
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+def _user(i):
+    return SimpleNamespace(
+        id=str(uuid.uuid4()), nom=f'Nom{i}', prenom=f'Prenom{i}', email=f'agent{i}@artci.ci',
+        role=RoleEnum.editor, telephone='0700000000', is_active=True,
+        last_login=NOW - timedelta(hours=i), createdAt=NOW - timedelta(days=i),
+    )
+
+
+def _entite(i):
+    return SimpleNamespace(
+        id=str(uuid.uuid4()), denomination=f'Entreprise {i}', numero_cc=f'CC{i:06d}',
+        decret_creation=None, forme_juridique='SA', secteur_activite='Banque',
+        ville='Abidjan', region='Lagunes', origine_saisie=OrigineSaisieEnum.auto_recensement,
+        publie_sur_carte=i % 2 == 0, createdAt=NOW - timedelta(days=i),
+        conformite=SimpleNamespace(
+            statut_conformite=StatutConformiteEnum.conforme, score_conformite=70 + i % 30, a_dpo=True,
+        ),
+        workflow=SimpleNamespace(statut=StatutWorkflowEnum.conforme, numero_autorisation_artci=f'AUT-{i}'),
+        localisation=SimpleNamespace(latitude=5.35 + i / 1000, longitude=-4.0 - i / 1000),
+        dpos=[SimpleNamespace(nom='Kouassi', prenom='Awa', email='dpo@example.ci', telephone='0101')],
+        finalites=[
+            SimpleNamespace(finalite=f'Finalité {k}', pourcentage=10 * k) for k in range(1, 5)
+        ],
+        documents=[SimpleNamespace(id=str(uuid.uuid4()), type_document=TypeDocumentEnum.autorisation)],
+    )
+
+
+def _feedback(i, agents):
+    return SimpleNamespace(
+        id=str(uuid.uuid4()), entite_id=str(uuid.uuid4()), agent_id=agents[i % len(agents)].id,
+        date_feedback=NOW - timedelta(days=i), commentaires='Pièces manquantes ' * 5,
+        elements_manquants=['cni', 'registre'], delai_fourniture=date(2026, 11, 30),
+        agent=agents[i % len(agents)], createdAt=NOW - timedelta(days=i),
+    )
+
+
+def _ms(fn, repeat):
+    return min(timeit.repeat(fn, number=1, repeat=repeat)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+
+    agents = [_user(i) for i in range(10)]
+    cas = [
+        ('entites', EntiteListOutputSchema, [_entite(i) for i in range(args.rows)]),
+        ('utilisateurs', UserOutputSchema, [_user(i) for i in range(args.rows)]),
+        ('feedbacks', FeedbackOutputSchema, [_feedback(i, agents) for i in range(args.rows)]),
+    ]
+
+    print(f'{args.rows} lignes par page, meilleur de {args.repeat} essais (ms)')
+    print(f'{"liste":<14}{"marshmallow":>12}{"compilé":>10}{"gain":>7}{"json":>9}{"orjson":>9}')
+    for nom, schema_cls, items in cas:
+        schema = schema_cls()
+        fast = serializer_for(schema_cls)
+        attendu = schema.dump(items, many=True)
+        obtenu = fast.dump(items, many=True)
+        assert obtenu == attendu, f'{nom} : sortie différente de Marshmallow'
+
+        t_ma = _ms(lambda: schema.dump(items, many=True), args.repeat)
+        t_fast = _ms(lambda: fast.dump(items, many=True), args.repeat)
+        t_json = _ms(lambda: json.dumps(obtenu), args.repeat)
+        t_orjson = _ms(lambda: orjson.dumps(obtenu), args.repeat) if orjson else None
+        orjson_col = f'{t_orjson:>9.2f}' if t_orjson is not None else f'{"-":>9}'
+        print(f'{nom:<14}{t_ma:>12.2f}{t_fast:>10.2f}{t_ma / t_fast:>6.1f}x{t_json:>9.2f}{orjson_col}')
+
+
+if __name__ == '__main__':
+    main()
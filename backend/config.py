@@ -4,9 +4,42 @@ Configuration Flask pour ARTCI DCP Platform
 import os
 from datetime import timedelta
 from dotenv import load_dotenv
+from sqlalchemy.engine import make_url
 
 load_dotenv()
 
+# Render donne postgres://, SQLAlchemy exige postgresql://
+DATABASE_URL = os.getenv(
+    'DATABASE_URL', 'postgresql://localhost/artci_dcp'
+).replace('postgres://', 'postgresql://', 1)
+
+
+def engine_options(database_url, pool_size, max_overflow, statement_timeout_ms):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS (pool de connexions), surchargeable par les
+    variables DB_* ; les valeurs passées sont les défauts de l'environnement.
+    pool_size : au moins GUNICORN_THREADS (une connexion par thread de requête).
+    application_name et statement_timeout sont des paramètres de connexion
+    PostgreSQL : omis pour un autre SGBD (SQLite en local).
+    """
+    timeout = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', statement_timeout_ms))
+    options = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', pool_size)),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', max_overflow)),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),  # secondes d'attente d'une connexion
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),  # secondes (coupures proxy / PgBouncer)
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', 'True').lower() == 'true',
+    }
+    if make_url(database_url).get_backend_name() != 'postgresql':
+        return options
+    options['connect_args'] = {'application_name': os.getenv('DB_APPLICATION_NAME', 'artci_dcp')}
+    if timeout:
+        # Requête interrompue côté serveur au-delà de ce délai (0 = aucun) ;
+        # levé par les sauvegardes / restaurations (app.utils.db_timeouts)
+        options['connect_args']['options'] = f'-c statement_timeout={timeout}'
+    return options
+
+
 class Config:
     """Configuration de base"""
     
@@ -15,12 +48,17 @@ class Config:
     DEBUG = False
     TESTING = False
     
-    # Database (Render donne postgres://, SQLAlchemy exige postgresql://)
-    SQLALCHEMY_DATABASE_URI = os.getenv(
-        'DATABASE_URL', 'postgresql://localhost/artci_dcp'
-    ).replace('postgres://', 'postgresql://', 1)
+    # Database
+    SQLALCHEMY_DATABASE_URI = DATABASE_URL
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(DATABASE_URL, pool_size=8, max_overflow=4, statement_timeout_ms=0)
+    
+    # Instrumentation SQL par requête (app.utils.db_metrics)
+    DB_METRICS_ENABLED = os.getenv('DB_METRICS_ENABLED', 'True').lower() == 'true'
+    DB_METRICS_HEADER = os.getenv('DB_METRICS_HEADER', 'False').lower() == 'true'  # toujours actif en debug
+    DB_QUERY_BUDGET = int(os.getenv('DB_QUERY_BUDGET', 30))  # requêtes SQL par requête HTTP avant alerte (N+1)
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # jeton Bearer de /metrics ; vide = désactivé (hors debug)
     
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
@@ -43,11 +81,49 @@ class Config:
     # OTP
     OTP_EXPIRATION_MINUTES = int(os.getenv('OTP_EXPIRATION_MINUTES', 10))
     OTP_LENGTH = int(os.getenv('OTP_LENGTH', 6))
+    OTP_MAX_ATTEMPTS = int(os.getenv('OTP_MAX_ATTEMPTS', 5))
+    OTP_PURGE_BATCH_SIZE = int(os.getenv('OTP_PURGE_BATCH_SIZE', 1000))
     
     # File Upload
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 10485760))  # 10 MB
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'jpeg', 'doc', 'docx', 'xls', 'xlsx'}
+    UPLOAD_MAX_FILE_SIZE = int(os.getenv('UPLOAD_MAX_FILE_SIZE', 0)) or None  # par fichier ; défaut MAX_CONTENT_LENGTH
+    # Stockage des documents (adressé par contenu) : local (UPLOAD_FOLDER) ou s3
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'local')
+    STORAGE_S3_BUCKET = os.getenv('STORAGE_S3_BUCKET', '')
+    STORAGE_S3_PREFIX = os.getenv('STORAGE_S3_PREFIX', '')
+    STORAGE_S3_ENDPOINT_URL = os.getenv('STORAGE_S3_ENDPOINT_URL', '')  # ex. http://localhost:9000 (MinIO)
+    STORAGE_S3_REGION = os.getenv('STORAGE_S3_REGION', '')
+    # Téléchargements : délégation au serveur frontal ('' | x-accel | x-sendfile)
+    DOWNLOAD_ACCEL = os.getenv('DOWNLOAD_ACCEL', '')
+    DOWNLOAD_ACCEL_MAP = os.getenv('DOWNLOAD_ACCEL_MAP', '')  # ex. /srv/uploads=/protected-uploads
+    DOWNLOAD_S3_REDIRECT = os.getenv('DOWNLOAD_S3_REDIRECT', 'True').lower() == 'true'
+    DOWNLOAD_S3_URL_EXPIRES = int(os.getenv('DOWNLOAD_S3_URL_EXPIRES', 300))  # secondes
+    # Aperçus des documents (miniature + texte extrait, en arrière-plan)
+    APERCUS_ASYNC = os.getenv('APERCUS_ASYNC', 'True').lower() == 'true'  # sinon : tâche 'apercus' seule
+    APERCUS_WORKERS = int(os.getenv('APERCUS_WORKERS', 1))  # threads par worker gunicorn
+    APERCU_TAILLE = int(os.getenv('APERCU_TAILLE', 320))  # px, plus grand côté
+    APERCU_TEXTE_MAX = int(os.getenv('APERCU_TEXTE_MAX', 20000))  # caractères conservés
+    APERCU_MAX_OCTETS = int(os.getenv('APERCU_MAX_OCTETS', 20971520))  # 20 MB
+    APERCU_MAX_TENTATIVES = int(os.getenv('APERCU_MAX_TENTATIVES', 3))
+    # Ramasse-miettes des fichiers (tâche 'documents_gc' / flask documents gc)
+    DOCUMENTS_GC_DELETE = os.getenv('DOCUMENTS_GC_DELETE', 'False').lower() == 'true'  # sinon : rapport seul
+    DOCUMENTS_GC_MIN_AGE_HOURS = float(os.getenv('DOCUMENTS_GC_MIN_AGE_HOURS', 24))
+    
+    # Sauvegardes (archive zip NDJSON)
+    BACKUP_FOLDER = os.getenv('BACKUP_FOLDER', '')  # vide = <UPLOAD_FOLDER>/backups
+    BACKUP_BATCH_SIZE = int(os.getenv('BACKUP_BATCH_SIZE', 1000))  # lignes par lot de curseur
+    BACKUP_INCLUDE_SECRETS = os.getenv('BACKUP_INCLUDE_SECRETS', 'False').lower() == 'true'
+    # Incrémental : marge (s) sous la borne de la sauvegarde de référence
+    BACKUP_INCREMENTAL_OVERLAP_SECONDS = int(os.getenv('BACKUP_INCREMENTAL_OVERLAP_SECONDS', 300))
+    BACKUP_RETENTION_DAYS = int(os.getenv('BACKUP_RETENTION_DAYS', 30))
+    BACKUP_RETENTION_MIN_KEEP = int(os.getenv('BACKUP_RETENTION_MIN_KEEP', 5))  # chaînes (complète + incrémentales) toujours conservées
+    
+    # Tâches planifiées (flask jobs run-due via cron)
+    SCHEDULER_DISABLED_JOBS = [
+        j.strip() for j in os.getenv('SCHEDULER_DISABLED_JOBS', '').split(',') if j.strip()
+    ]
     
     # Security
     PASSWORD_MIN_LENGTH = int(os.getenv('PASSWORD_MIN_LENGTH', 8))
@@ -59,9 +135,50 @@ class Config:
     # Pagination
     ITEMS_PER_PAGE = int(os.getenv('ITEMS_PER_PAGE', 50))
     
+    # Assignations : échéance par défaut des répartitions automatiques
+    ASSIGNATION_DELAI_JOURS = int(os.getenv('ASSIGNATION_DELAI_JOURS', 15))
+    
     # Rate Limiting
     RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True').lower() == 'true'
     RATELIMIT_DEFAULT = os.getenv('RATELIMIT_DEFAULT', '100 per minute')
+    RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URI', '')  # vide = SQLite partagé dans /tmp
+    RATELIMIT_BLUEPRINTS = ('auth', 'public')
+    # Proxies de confiance devant l'application (Render : 1). 0 = remote_addr ; au-delà,
+    # l'adresse est lue dans X-Forwarded-For, que tout client peut forger sans proxy
+    RATELIMIT_PROXY_HOPS = int(os.getenv('RATELIMIT_PROXY_HOPS', 0))
+    RATELIMIT_AUTH = os.getenv('RATELIMIT_AUTH', '10 per minute')
+    RATELIMIT_OTP = os.getenv('RATELIMIT_OTP', '5 per 10 minutes')
+    RATELIMIT_EXPORT = os.getenv('RATELIMIT_EXPORT', '10 per hour')
+    RATELIMIT_CONTACT = os.getenv('RATELIMIT_CONTACT', '5 per hour')
+    
+    # Cache HTTP des endpoints publics (ETag sur la version des données publiées)
+    PUBLIC_CACHE_ENABLED = os.getenv('PUBLIC_CACHE_ENABLED', 'True').lower() == 'true'
+    PUBLIC_CACHE_MAX_AGE = int(os.getenv('PUBLIC_CACHE_MAX_AGE', 60))  # secondes
+    PUBLIC_CACHE_MAX_ENTRIES = int(os.getenv('PUBLIC_CACHE_MAX_ENTRIES', 512))  # LRU par worker
+    
+    # Cache des fiches entités sérialisées (table entite_detail_cache)
+    DETAIL_CACHE_ENABLED = os.getenv('DETAIL_CACHE_ENABLED', 'True').lower() == 'true'
+    DETAIL_CACHE_TTL = int(os.getenv('DETAIL_CACHE_TTL', 3600))  # secondes
+    
+    # Compression des réponses (gzip, br si le module brotli est installé)
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'True').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # octets
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))  # gzip 1-9
+    COMPRESS_BR_LEVEL = int(os.getenv('COMPRESS_BR_LEVEL', 4))  # brotli 0-11
+    COMPRESS_MIMETYPES = {
+        m.strip() for m in os.getenv(
+            'COMPRESS_MIMETYPES', 'application/json,text/csv,text/plain,text/html,image/svg+xml'
+        ).split(',') if m.strip()
+    }
+    COMPRESS_BLUEPRINTS = os.getenv('COMPRESS_BLUEPRINTS', 'events=off')  # ex. events=off,public=512
+    
+    # Événements temps réel (flux SSE /api/events/stream)
+    EVENTS_BACKEND = os.getenv('EVENTS_BACKEND', 'auto')  # auto | postgres | memory
+    EVENTS_HEARTBEAT = int(os.getenv('EVENTS_HEARTBEAT', 15))  # secondes
+    EVENTS_STREAM_MAX_SECONDS = int(os.getenv('EVENTS_STREAM_MAX_SECONDS', 300))
+    # Flux simultanés par worker (chacun tient un thread) ; au-delà : 503, le client recharge périodiquement
+    EVENTS_MAX_STREAMS = int(os.getenv('EVENTS_MAX_STREAMS', 4))  # < GUNICORN_THREADS
+    EVENTS_RETRY_AFTER = int(os.getenv('EVENTS_RETRY_AFTER', 60))  # secondes
     
     # Statuts de conformité (NOUVEAUX v2.2)
     STATUTS_CONFORMITE = [
@@ -103,16 +220,27 @@ class DevelopmentConfig(Config):
     """Configuration développement"""
     DEBUG = True
     SQLALCHEMY_ECHO = True
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(DATABASE_URL, pool_size=2, max_overflow=4, statement_timeout_ms=0)
 
 class ProductionConfig(Config):
     """Configuration production"""
     DEBUG = False
     TESTING = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        DATABASE_URL, pool_size=8, max_overflow=4, statement_timeout_ms=30000
+    )
 
 class TestingConfig(Config):
     """Configuration tests"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'postgresql://localhost/artci_dcp_test'
+    RATELIMIT_ENABLED = False
+    EVENTS_BACKEND = 'memory'
+    APERCUS_ASYNC = False
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(
+        SQLALCHEMY_DATABASE_URI, pool_size=2, max_overflow=2, statement_timeout_ms=10000
+    )
+    DB_QUERY_BUDGET = 20
 
 # Dictionnaire des configurations
 config = {
@@ -2,6 +2,10 @@
 import os
 
 bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
-workers = 2
-threads = 2
+workers = int(os.getenv('GUNICORN_WORKERS', 2))
+# Chaque flux SSE (/api/events/stream) occupe un thread pendant sa durée
+# (EVENTS_STREAM_MAX_SECONDS) : EVENTS_MAX_STREAMS plafonne ces flux par worker
+# pour laisser au moins GUNICORN_THREADS - EVENTS_MAX_STREAMS threads à l'API.
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 8))
 timeout = 120
@@ -0,0 +1,43 @@
+"""otp_codes : code hashe, compteur de tentatives, index de verification
+
+Revision ID: j0k1l2m3n4o5
+Revises: i9j0k1l2m3n4
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = 'j0k1l2m3n4o5'
+down_revision = 'i9j0k1l2m3n4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Les codes existants sont en clair et de courte duree : on les purge
+    op.execute('DELETE FROM otp_codes')
+
+    op.drop_index('ix_otp_compte_type_used', 'otp_codes')
+    op.drop_index('ix_otp_codes_code', 'otp_codes')
+    op.drop_column('otp_codes', 'code')
+    op.add_column('otp_codes', sa.Column('code_hash', sa.String(64), nullable=False))
+    op.add_column(
+        'otp_codes',
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+    )
+    op.create_index(
+        'ix_otp_verification', 'otp_codes',
+        ['compte_entreprise_id', 'type', 'used', 'expires_at'],
+    )
+
+
+def downgrade():
+    op.execute('DELETE FROM otp_codes')
+
+    op.drop_index('ix_otp_verification', 'otp_codes')
+    op.drop_column('otp_codes', 'attempts')
+    op.drop_column('otp_codes', 'code_hash')
+    op.add_column('otp_codes', sa.Column('code', sa.String(6), nullable=False))
+    op.create_index('ix_otp_codes_code', 'otp_codes', ['code'])
+    op.create_index('ix_otp_compte_type_used', 'otp_codes', ['compte_entreprise_id', 'type', 'used'])
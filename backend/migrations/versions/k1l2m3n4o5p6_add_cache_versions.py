@@ -0,0 +1,28 @@
+"""add cache_versions table (versions des donnees publiees pour les ETags)
+
+Revision ID: k1l2m3n4o5p6
+Revises: j0k1l2m3n4o5
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = 'k1l2m3n4o5p6'
+down_revision = 'j0k1l2m3n4o5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cache_versions',
+        sa.Column('name', sa.String(50), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='1'),
+        sa.Column('updatedAt', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.execute("INSERT INTO cache_versions (name, version) VALUES ('published_data', 1)")
+
+
+def downgrade():
+    op.drop_table('cache_versions')
@@ -0,0 +1,29 @@
+"""add entite_detail_cache table (fiches entites serialisees)
+
+Revision ID: l2m3n4o5p6q7
+Revises: k1l2m3n4o5p6
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = 'l2m3n4o5p6q7'
+down_revision = 'k1l2m3n4o5p6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'entite_detail_cache',
+        sa.Column('entite_id', sa.String(36), sa.ForeignKey('entites_base.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('vue', sa.String(20), primary_key=True),
+        sa.Column('payload', postgresql.JSONB(), nullable=False),
+        sa.Column('createdAt', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table('entite_detail_cache')
@@ -0,0 +1,45 @@
+"""add sauvegardes table (index des archives de sauvegarde)
+
+Revision ID: m3n4o5p6q7r8
+Revises: l2m3n4o5p6q7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = 'm3n4o5p6q7r8'
+down_revision = 'l2m3n4o5p6q7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sauvegardes',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('filename', sa.String(255), nullable=False, unique=True),
+        sa.Column('type', sa.Enum('manuel', 'planifie', 'incremental', name='type_sauvegarde_enum'), nullable=False),
+        sa.Column('statut', sa.Enum('en_cours', 'termine', 'echec', name='statut_sauvegarde_enum'), nullable=False),
+        sa.Column('taille_octets', sa.BigInteger(), nullable=True),
+        sa.Column('total_lignes', sa.BigInteger(), nullable=True),
+        sa.Column('lignes_par_table', postgresql.JSONB(), nullable=True),
+        sa.Column('duree_secondes', sa.Float(), nullable=True),
+        sa.Column('sha256', sa.String(64), nullable=True),
+        sa.Column('erreur', sa.Text(), nullable=True),
+        sa.Column('depuis', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_by', sa.String(36), sa.ForeignKey('users.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('createdAt', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('termine_le', sa.DateTime(timezone=True), nullable=True),
+    )
+    op.create_index('ix_sauvegardes_createdAt', 'sauvegardes', ['createdAt'])
+    op.create_index('ix_sauvegardes_statut_created', 'sauvegardes', ['statut', 'createdAt'])
+
+
+def downgrade():
+    op.drop_index('ix_sauvegardes_statut_created', 'sauvegardes')
+    op.drop_index('ix_sauvegardes_createdAt', 'sauvegardes')
+    op.drop_table('sauvegardes')
+    sa.Enum(name='statut_sauvegarde_enum').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='type_sauvegarde_enum').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,40 @@
+"""add job_runs table (historique des taches planifiees)
+
+Revision ID: n4o5p6q7r8s9
+Revises: m3n4o5p6q7r8
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+revision = 'n4o5p6q7r8s9'
+down_revision = 'm3n4o5p6q7r8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'job_runs',
+        sa.Column('id', sa.String(36), primary_key=True),
+        sa.Column('job', sa.String(50), nullable=False),
+        sa.Column('statut', sa.String(20), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('duree_secondes', sa.Float(), nullable=True),
+        sa.Column('resultat', postgresql.JSONB(), nullable=True),
+        sa.Column('erreur', sa.Text(), nullable=True),
+    )
+    op.create_index('ix_job_runs_job_started', 'job_runs', ['job', 'started_at'])
+    # Balayage des echeances : assignations en cours par date d'echeance
+    op.create_index(
+        'ix_assign_statut_echeance', 'assignations_demandes', ['statut', 'echeance']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_assign_statut_echeance', 'assignations_demandes')
+    op.drop_index('ix_job_runs_job_started', 'job_runs')
+    op.drop_table('job_runs')
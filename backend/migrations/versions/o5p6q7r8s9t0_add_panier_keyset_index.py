@@ -0,0 +1,25 @@
+"""add panier keyset index on assignations_demandes
+
+Revision ID: o5p6q7r8s9t0
+Revises: n4o5p6q7r8s9
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+
+revision = 'o5p6q7r8s9t0'
+down_revision = 'n4o5p6q7r8s9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Panier paginé par curseur : WHERE agent_id = ? ORDER BY echeance, id
+    op.create_index(
+        'ix_assign_agent_echeance_id', 'assignations_demandes',
+        ['agent_id', 'echeance', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_assign_agent_echeance_id', 'assignations_demandes')
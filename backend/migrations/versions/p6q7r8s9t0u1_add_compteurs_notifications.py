@@ -0,0 +1,39 @@
+"""add compteurs_notifications table (non lues par destinataire)
+
+Revision ID: p6q7r8s9t0u1
+Revises: o5p6q7r8s9t0
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = 'p6q7r8s9t0u1'
+down_revision = 'o5p6q7r8s9t0'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'compteurs_notifications',
+        sa.Column('destinataire_type', sa.String(20), primary_key=True),
+        sa.Column('destinataire_id', sa.String(36), primary_key=True),
+        sa.Column('non_lues', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updatedAt', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.func.now()),
+    )
+    # Compteurs initiaux depuis les notifications existantes
+    op.execute(
+        'INSERT INTO compteurs_notifications (destinataire_type, destinataire_id, non_lues) '
+        'SELECT destinataire_type, destinataire_id, count(*) FROM notifications '
+        'WHERE lue = false GROUP BY destinataire_type, destinataire_id'
+    )
+    op.create_index(
+        'ix_notifications_dest_created', 'notifications', ['destinataire_id', 'createdAt']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_notifications_dest_created', 'notifications')
+    op.drop_table('compteurs_notifications')
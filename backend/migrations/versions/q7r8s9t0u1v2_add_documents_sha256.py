@@ -0,0 +1,27 @@
+"""add sha256 to documents_joints (stockage adresse par contenu)
+
+Revision ID: q7r8s9t0u1v2
+Revises: p6q7r8s9t0u1
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = 'q7r8s9t0u1v2'
+down_revision = 'p6q7r8s9t0u1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('documents_joints', sa.Column('sha256', sa.String(64), nullable=True))
+    op.create_index('ix_documents_joints_sha256', 'documents_joints', ['sha256'])
+    # Comptage des références d'un blob avant suppression
+    op.create_index('ix_documents_joints_chemin_fichier', 'documents_joints', ['chemin_fichier'])
+
+
+def downgrade():
+    op.drop_index('ix_documents_joints_chemin_fichier', 'documents_joints')
+    op.drop_index('ix_documents_joints_sha256', 'documents_joints')
+    op.drop_column('documents_joints', 'sha256')
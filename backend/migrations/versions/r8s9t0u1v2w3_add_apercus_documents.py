@@ -0,0 +1,44 @@
+"""add apercus_documents table (miniatures et texte extrait)
+
+Revision ID: r8s9t0u1v2w3
+Revises: q7r8s9t0u1v2
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = 'r8s9t0u1v2w3'
+down_revision = 'q7r8s9t0u1v2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'apercus_documents',
+        sa.Column('sha256', sa.String(64), primary_key=True),
+        sa.Column('statut', sa.String(20), nullable=False, server_default='en_attente'),
+        sa.Column('miniature', sa.String(500), nullable=True),
+        sa.Column('largeur', sa.Integer(), nullable=True),
+        sa.Column('hauteur', sa.Integer(), nullable=True),
+        sa.Column('pages', sa.Integer(), nullable=True),
+        sa.Column('texte', sa.Text(), nullable=True),
+        sa.Column('tentatives', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('erreur', sa.Text(), nullable=True),
+        sa.Column('createdAt', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.func.now()),
+        sa.Column('updatedAt', sa.DateTime(timezone=True), nullable=False,
+                  server_default=sa.func.now()),
+    )
+    op.create_index('ix_apercus_documents_statut', 'apercus_documents', ['statut'])
+    # Documents existants : aperçus générés par la tâche planifiée 'apercus'
+    op.execute(
+        'INSERT INTO apercus_documents (sha256) '
+        'SELECT DISTINCT sha256 FROM documents_joints WHERE sha256 IS NOT NULL'
+    )
+
+
+def downgrade():
+    op.drop_index('ix_apercus_documents_statut', 'apercus_documents')
+    op.drop_table('apercus_documents')
@@ -0,0 +1,28 @@
+"""add borne and base_id to sauvegardes (référence du mode incrémental)
+
+Revision ID: s9t0u1v2w3x4
+Revises: r8s9t0u1v2w3
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = 's9t0u1v2w3x4'
+down_revision = 'r8s9t0u1v2w3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('sauvegardes', sa.Column('borne', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('sauvegardes', sa.Column(
+        'base_id', sa.String(36), sa.ForeignKey('sauvegardes.id', ondelete='SET NULL'), nullable=True
+    ))
+    op.create_index('ix_sauvegardes_base_id', 'sauvegardes', ['base_id'])
+
+
+def downgrade():
+    op.drop_index('ix_sauvegardes_base_id', 'sauvegardes')
+    op.drop_column('sauvegardes', 'base_id')
+    op.drop_column('sauvegardes', 'borne')
@@ -0,0 +1,28 @@
+"""add generation to entite_detail_cache (écritures conditionnelles)
+
+Revision ID: t0u1v2w3x4y5
+Revises: s9t0u1v2w3x4
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = 't0u1v2w3x4y5'
+down_revision = 's9t0u1v2w3x4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('entite_detail_cache', sa.Column(
+        'generation', sa.BigInteger(), server_default='0', nullable=False
+    ))
+    # payload NULL = fiche invalidée (la ligne garde sa génération)
+    op.alter_column('entite_detail_cache', 'payload', nullable=True)
+
+
+def downgrade():
+    op.execute('DELETE FROM entite_detail_cache WHERE payload IS NULL')
+    op.alter_column('entite_detail_cache', 'payload', nullable=False)
+    op.drop_column('entite_detail_cache', 'generation')
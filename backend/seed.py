@@ -31,6 +31,7 @@ from app.models.enums import (
     TypeDPOEnum, BaseLegaleEnum, StatutAssignationEnum, TypeMesureEnum,
     StatutRapprochementEnum, StatutRenouvellementEnum, TypeDocumentEnum,
 )
+from app.services.notification_service import NotificationService
 
 NOW = datetime.now(timezone.utc)
 PWD = 'Test@1234'
@@ -894,6 +895,9 @@ startxref
         # ── COMMIT FINAL ─────────────────────────────────────────────
         db.session.commit()
 
+        # Notifications insérées directement : reconstruire les compteurs de non lues
+        NotificationService.recalculer_compteurs()
+
         print("\n" + "=" * 55)
         print("  SEED TERMINE AVEC SUCCES !")
         print("=" * 55)
@@ -2,7 +2,7 @@
  * API Admin ARTCI — 18 fonctions pour l'interface d'administration.
  */
 import apiClient from './client';
-import type { ApiResponse, PaginatedData } from '@/types/api';
+import type { ApiResponse, CursorPage, PaginatedData } from '@/types/api';
 import type { User } from '@/types/auth';
 import type {
   AdminDashboardStats, AdminStatsFilter, AdminEntiteFilter,
@@ -221,12 +221,32 @@ export async function retourFormulaireEntreprise(
 // Workflow Traiter (spec §6 reunion 07/05)
 // ============================================================
 
+export interface DocumentApercu {
+  statut: 'en_attente' | 'pret' | 'non_supporte' | 'echec';
+  miniature_url: string | null;
+  largeur: number | null;
+  hauteur: number | null;
+  pages: number | null;
+  extrait: string | null;
+}
+
+export interface DocumentDossier {
+  id: string;
+  type_document: string;
+  nom_fichier: string;
+  taille: number | null;
+  mime_type: string | null;
+  uploadedAt: string | null;
+  apercu: DocumentApercu | null;
+}
+
 export interface Traitement {
   id: string;
   entite_id: string;
   entite_denomination: string | null;
   entite_numero_cc: string | null;
   reponses_formulaire: Record<string, unknown>;
+  documents: DocumentDossier[];
   commentaires_par_rubrique: Record<string, string>;
   score_automatique: number | null;
   score_manuel: number | null;
@@ -239,6 +259,22 @@ export interface Traitement {
   updatedAt: string | null;
 }
 
+/** GET /api/admin/documents/:id/miniature — URL objet (blob) de la miniature */
+export async function getDocumentMiniature(documentId: string): Promise<string> {
+  const res = await apiClient.get(`/admin/documents/${documentId}/miniature`, { responseType: 'blob' });
+  return window.URL.createObjectURL(res.data as Blob);
+}
+
+/** GET /api/admin/documents/:id/texte — texte extrait (PDF, DOCX) */
+export async function getDocumentTexte(
+  documentId: string,
+): Promise<{ id: string; nom_fichier: string; statut: string | null; pages: number | null; texte: string | null }> {
+  const res = await apiClient.get<ApiResponse<{
+    id: string; nom_fichier: string; statut: string | null; pages: number | null; texte: string | null;
+  }>>(`/admin/documents/${documentId}/texte`);
+  return res.data.data!;
+}
+
 /** POST /api/admin/entites/:id/traiter (recupere ou cree le traitement) */
 export async function commencerTraiter(entiteId: string): Promise<Traitement> {
   const res = await apiClient.post<ApiResponse<Traitement>>(`/admin/entites/${entiteId}/traiter`);
@@ -318,9 +354,11 @@ export async function uploadRapportAudit(
 // Workflow — Panier / Assignation
 // ============================================================
 
-/** GET /api/admin/panier */
-export async function getPanier(): Promise<AssignationItem[]> {
-  const res = await apiClient.get<ApiResponse<AssignationItem[]>>('/admin/panier');
+/** GET /api/admin/panier?cursor= (pagination par curseur) */
+export async function getPanier(cursor?: string): Promise<CursorPage<AssignationItem>> {
+  const res = await apiClient.get<ApiResponse<CursorPage<AssignationItem>>>('/admin/panier', {
+    params: cursor ? { cursor } : undefined,
+  });
   return res.data.data!;
 }
 
@@ -484,3 +522,15 @@ export async function getNotifications(filters?: NotificationsFilter): Promise<N
 export async function markNotificationRead(id: string): Promise<void> {
   await apiClient.put(`/admin/notifications/${id}/read`);
 }
+
+/** GET /api/admin/notifications/unread-count */
+export async function getUnreadNotificationsCount(): Promise<number> {
+  const res = await apiClient.get<ApiResponse<{ non_lues: number }>>('/admin/notifications/unread-count');
+  return res.data.data!.non_lues;
+}
+
+/** PUT /api/admin/notifications/read-all */
+export async function markAllNotificationsRead(): Promise<number> {
+  const res = await apiClient.put<ApiResponse<{ marquees: number }>>('/admin/notifications/read-all');
+  return res.data.data!.marquees;
+}
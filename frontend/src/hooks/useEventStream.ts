@@ -0,0 +1,105 @@
+import { useEffect, useRef } from 'react';
+
+const API_BASE = import.meta.env.VITE_API_URL || '/api';
+
+export type EventHandlers = Record<string, (data: unknown) => void>;
+
+function getToken(): string | null {
+  try {
+    const raw = localStorage.getItem('auth-storage');
+    return raw ? JSON.parse(raw)?.state?.accessToken ?? null : null;
+  } catch {
+    return null;
+  }
+}
+
+class StreamUnavailableError extends Error {
+  retryAfterMs: number;
+
+  constructor(retryAfterMs: number) {
+    super('SSE 503');
+    this.retryAfterMs = retryAfterMs;
+  }
+}
+
+/**
+ * Abonnement au flux SSE GET /api/events/stream (notifications, workflow).
+ * fetch + ReadableStream plutôt qu'EventSource : le jeton passe dans l'en-tête
+ * Authorization et non dans l'URL. Reconnexion automatique à la fermeture.
+ * Si le serveur refuse le flux (503, limite de flux par worker atteinte),
+ * `onUnavailable` est appelé (rechargement) à chaque Retry-After jusqu'à ce
+ * qu'un flux soit de nouveau accepté.
+ */
+export function useEventStream(
+  handlers: EventHandlers,
+  enabled = true,
+  onUnavailable?: () => void
+): void {
+  const handlersRef = useRef(handlers);
+  handlersRef.current = handlers;
+  const fallbackRef = useRef(onUnavailable);
+  fallbackRef.current = onUnavailable;
+
+  useEffect(() => {
+    if (!enabled) return;
+    const controller = new AbortController();
+
+    async function connect(): Promise<void> {
+      const token = getToken();
+      if (!token) return;
+      const res = await fetch(`${API_BASE}/events/stream`, {
+        headers: { Authorization: `Bearer ${token}`, Accept: 'text/event-stream' },
+        signal: controller.signal,
+      });
+      if (res.status === 503) {
+        const retryAfter = Number(res.headers.get('Retry-After')) || 60;
+        throw new StreamUnavailableError(retryAfter * 1000);
+      }
+      if (!res.ok || !res.body) throw new Error(`SSE ${res.status}`);
+
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) return;
+        buffer += decoder.decode(value, { stream: true });
+        let sep: number;
+        while ((sep = buffer.indexOf('\n\n')) >= 0) {
+          const block = buffer.slice(0, sep);
+          buffer = buffer.slice(sep + 2);
+          let event = 'message';
+          let data = '';
+          for (const line of block.split('\n')) {
+            if (line.startsWith('event: ')) event = line.slice(7);
+            else if (line.startsWith('data: ')) data += line.slice(6);
+          }
+          if (data) handlersRef.current[event]?.(JSON.parse(data));
+        }
+      }
+    }
+
+    async function loop(): Promise<void> {
+      let delay = 3000;
+      while (!controller.signal.aborted) {
+        try {
+          await connect();
+          delay = 3000;
+        } catch (err) {
+          if (err instanceof StreamUnavailableError) {
+            // Pas de flux disponible : rechargement périodique à la place
+            fallbackRef.current?.();
+            delay = err.retryAfterMs;
+          } else {
+            delay = Math.min(delay * 2, 60000);
+          }
+        }
+        if (controller.signal.aborted) return;
+        await new Promise((resolve) => setTimeout(resolve, delay));
+      }
+    }
+
+    loop();
+    return () => controller.abort();
+  }, [enabled]);
+}
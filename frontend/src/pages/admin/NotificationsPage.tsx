@@ -3,6 +3,7 @@ import {
   Bell, FileText, Clock, CheckCircle, RefreshCw, CheckCheck,
 } from 'lucide-react';
 import { useApi } from '@/hooks/useApi';
+import { useEventStream } from '@/hooks/useEventStream';
 import * as adminApi from '@/api/admin.api';
 import Loading from '@/components/common/Loading';
 import ErrorDisplay from '@/components/common/ErrorDisplay';
@@ -40,6 +41,10 @@ export default function NotificationsPage() {
 
   const { data, isLoading, error, refetch } = useApi(fetchNotifications, [typeFilter, lueFilter]);
 
+  // Nouvelles notifications poussées par le serveur (SSE) ; rechargement
+  // périodique si le serveur n'accepte plus de flux (503)
+  useEventStream({ notification: () => refetch() }, true, refetch);
+
   async function handleMarkRead(id: string) {
     try {
       await adminApi.markNotificationRead(id);
@@ -53,10 +58,7 @@ export default function NotificationsPage() {
     if (!data || data.length === 0) return;
     setMarkingAll(true);
     try {
-      const unread = data.filter((n) => !n.lue);
-      for (const notif of unread) {
-        await adminApi.markNotificationRead(notif.id);
-      }
+      await adminApi.markAllNotificationsRead();
       refetch();
     } catch {
       // erreur silencieuse
@@ -9,6 +9,7 @@ import EmptyState from '@/components/common/EmptyState';
 import { useAuth } from '@/hooks/useAuth';
 import { hasMinRole } from '@/components/admin/AdminSidebar';
 import { formatDate } from '@/utils/format';
+import type { AssignationItem } from '@/types/admin';
 
 const STATUT_BADGE_MAP: Record<string, string> = {
   en_cours: 'badge badge-encours',
@@ -20,17 +21,36 @@ const STATUT_BADGE_MAP: Record<string, string> = {
 export default function PanierPage() {
   const { user } = useAuth();
   const canTraiter = user && hasMinRole(user.role, 'editor');
-  const { data: panier, isLoading, error, refetch } = useApi(
-    () => adminApi.getPanier(),
-    []
+  // Pages déjà affichées + curseur de la page courante
+  const [cursor, setCursor] = useState<string | undefined>(undefined);
+  const [previous, setPrevious] = useState<AssignationItem[]>([]);
+  const { data: page, isLoading, error, refetch } = useApi(
+    () => adminApi.getPanier(cursor),
+    [cursor]
   );
   const [processing, setProcessing] = useState<string | null>(null);
+  const panier = [...previous, ...(page?.items ?? [])];
+
+  function loadMore() {
+    if (!page?.next_cursor) return;
+    setPrevious(panier);
+    setCursor(page.next_cursor);
+  }
+
+  function reload() {
+    if (cursor === undefined) {
+      refetch();
+    } else {
+      setPrevious([]);
+      setCursor(undefined);
+    }
+  }
 
   async function handleTraiter(id: string) {
     setProcessing(id);
     try {
       await adminApi.traiterAssignation(id);
-      refetch();
+      reload();
     } catch {
       // erreur silencieuse
     } finally {
@@ -38,7 +58,7 @@ export default function PanierPage() {
     }
   }
 
-  if (isLoading) return <Loading fullPage text="Chargement du panier..." />;
+  if (isLoading && previous.length === 0) return <Loading fullPage text="Chargement du panier..." />;
   if (error) return <ErrorDisplay message={error} onRetry={refetch} />;
 
   return (
@@ -48,7 +68,7 @@ export default function PanierPage() {
         Mon Panier
       </h1>
 
-      {!panier || panier.length === 0 ? (
+      {panier.length === 0 ? (
         <EmptyState />
       ) : (
         <div className="space-y-4">
@@ -102,6 +122,13 @@ export default function PanierPage() {
               </div>
             </div>
           ))}
+          {page?.has_next && (
+            <div className="flex justify-center">
+              <button className="btn btn-outline text-sm" onClick={loadMore} disabled={isLoading}>
+                {isLoading ? 'Chargement...' : 'Charger plus'}
+              </button>
+            </div>
+          )}
         </div>
       )}
     </div>
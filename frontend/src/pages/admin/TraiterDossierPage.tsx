@@ -12,14 +12,14 @@
  */
 import { useState, useEffect } from 'react';
 import { useParams, useNavigate, Link } from 'react-router-dom';
-import { ArrowLeft, Save, Send, MessageSquare, CheckCircle, XCircle, AlertTriangle, Award } from 'lucide-react';
+import { ArrowLeft, Save, Send, MessageSquare, CheckCircle, XCircle, AlertTriangle, Award, FileText } from 'lucide-react';
 import * as adminApi from '@/api/admin.api';
 import Loading from '@/components/common/Loading';
 import { useAuth } from '@/hooks/useAuth';
 import { hasMinRole } from '@/components/admin/AdminSidebar';
 import { ROUTES } from '@/utils/constants';
 import { cn } from '@/utils/cn';
-import type { Traitement } from '@/api/admin.api';
+import type { Traitement, DocumentDossier } from '@/api/admin.api';
 
 const RUBRIQUES = [
   { key: 'identification', label: 'Partie 1 — Identification de l\'entité' },
@@ -38,6 +38,51 @@ function getNiveauColor(niveau: string | null): string {
   return 'badge';
 }
 
+/** Vignette d'un document : miniature (chargée avec le jeton) et extrait de texte. */
+function DocumentApercuCard({ doc }: { doc: DocumentDossier }) {
+  const [miniature, setMiniature] = useState<string | null>(null);
+
+  useEffect(() => {
+    if (!doc.apercu?.miniature_url) return;
+    let url: string | null = null;
+    let cancelled = false;
+    adminApi.getDocumentMiniature(doc.id)
+      .then((u) => {
+        url = u;
+        if (!cancelled) setMiniature(u);
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+      if (url) window.URL.revokeObjectURL(url);
+    };
+  }, [doc.id, doc.apercu?.miniature_url]);
+
+  const apercu = doc.apercu;
+  return (
+    <div className="border border-gray-200 rounded p-2 flex gap-3">
+      <div className="w-24 h-32 flex-shrink-0 bg-gray-50 flex items-center justify-center overflow-hidden">
+        {miniature ? (
+          <img src={miniature} alt={doc.nom_fichier} className="max-w-full max-h-full object-contain" loading="lazy" />
+        ) : (
+          <FileText className="w-8 h-8 text-gray-300" />
+        )}
+      </div>
+      <div className="min-w-0">
+        <div className="text-sm font-semibold truncate">{doc.nom_fichier}</div>
+        <div className="text-xs text-gray-500">
+          {doc.type_document}
+          {apercu?.pages ? ` · ${apercu.pages} page(s)` : ''}
+          {apercu?.statut === 'en_attente' ? ' · aperçu en préparation' : ''}
+        </div>
+        {apercu?.extrait && (
+          <p className="text-xs text-gray-600 mt-1 line-clamp-4 whitespace-pre-line">{apercu.extrait}</p>
+        )}
+      </div>
+    </div>
+  );
+}
+
 export default function TraiterDossierPage() {
   const { entiteId } = useParams<{ entiteId: string }>();
   const navigate = useNavigate();
@@ -178,6 +223,21 @@ export default function TraiterDossierPage() {
         </div>
       )}
 
+      {/* Etape 3 : verification documentaire (apercus, sans telecharger les pieces) */}
+      {traitement.documents?.length > 0 && (
+        <div className="card mb-4">
+          <h2 className="text-lg font-bold mb-3 flex items-center gap-2">
+            <FileText className="w-5 h-5 text-[var(--artci-orange)]" />
+            Pièces du dossier ({traitement.documents.length})
+          </h2>
+          <div className="grid grid-cols-1 md:grid-cols-2 gap-3">
+            {traitement.documents.map((doc) => (
+              <DocumentApercuCard key={doc.id} doc={doc} />
+            ))}
+          </div>
+        </div>
+      )}
+
       {/* Commentaires par rubrique (etapes 1 et 2) */}
       <div className="card mb-4">
         <h2 className="text-lg font-bold mb-3 flex items-center gap-2">
@@ -21,3 +21,11 @@ export interface PaginatedData<T> {
   has_next: boolean;
   has_prev: boolean;
 }
+
+/** Pagination par curseur (keyset) : passer next_cursor pour la page suivante. */
+export interface CursorPage<T> {
+  items: T[];
+  next_cursor: string | null;
+  has_next: boolean;
+  limit: number;
+}